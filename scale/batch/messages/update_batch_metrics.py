@@ -69,6 +69,20 @@ class UpdateBatchMetrics(CommandMessage):
 
         return len(self._batch_ids) < MAX_NUM
 
+    def can_fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.can_fuse`
+        """
+
+        return len(self._batch_ids) + len(message._batch_ids) <= MAX_NUM
+
+    def fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.fuse`
+        """
+
+        for batch_id in message._batch_ids:
+            if batch_id not in self._batch_ids:
+                self.add_batch(batch_id)
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -1,8 +1,27 @@
 """Defines the handler for files processed by Strike and Scan"""
+from __future__ import unicode_literals
+
+import re
+import threading
+from collections import OrderedDict
+
+# Maximum number of file names whose matched rule is cached
+MATCH_CACHE_SIZE = 10000
+
+# Maximum number of capturing groups in one combined regex, the re module supports at most 100
+MAX_COMBINED_GROUPS = 99
+
+# Patterns that refer to their own groups or change flags inline cannot be safely combined with other patterns
+UNCOMBINABLE_REGEX = re.compile(r'\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]')
+
+# Cached value for a file name that did not match any rule
+NO_MATCH = object()
 
 
 class FileHandler(object):
-    """This class handles the rules for files processed by Strike and Scan
+    """This class handles the rules for files processed by Strike and Scan. The rule regular expressions are combined
+    into as few regular expressions as possible, and the matched rule for recent file names is cached. This class is
+    thread-safe.
     """
 
     def __init__(self):
@@ -11,6 +30,10 @@ class FileHandler(object):
 
         self.rules = []
 
+        self._lock = threading.Lock()
+        self._match_cache = OrderedDict()  # {File name: rule or NO_MATCH}, in least recently used order
+        self._matchers = None  # [(regex, {Group index: rule}, rule)], compiled on first use
+
     def add_rule(self, rule):
         """Adds the given rule to the handler
 
@@ -18,7 +41,10 @@ class FileHandler(object):
         :type rule: :class:`ingest.handlers.file_rule.FileRule`
         """
 
-        self.rules.append(rule)
+        with self._lock:
+            self.rules.append(rule)
+            self._match_cache.clear()
+            self._matchers = None
 
     def match_file_name(self, file_name):
         """Checks the given file name and returns the first rule that matches it, returning None if no match is made
@@ -29,7 +55,89 @@ class FileHandler(object):
         :rtype: :class:`ingest.handlers.file_rule.FileRule`
         """
 
+        with self._lock:
+            # Move a cached file name to the most recently used end, evicting the least recently used if full
+            rule = self._match_cache.pop(file_name, None)
+            if rule is None:
+                if self._matchers is None:
+                    self._matchers = self._compile_matchers()
+                rule = self._match_rules(file_name)
+            self._match_cache[file_name] = rule
+            if len(self._match_cache) > MATCH_CACHE_SIZE:
+                self._match_cache.popitem(last=False)
+
+        return None if rule is NO_MATCH else rule
+
+    def _compile_matchers(self):
+        """Combines consecutive rules into regular expressions of the form (rule_1)|(rule_2)|... that match the same
+        file names as the individual rules, in the same order. Each rule is wrapped in its own group, so the wrapping
+        group that matched (the last group to close) identifies the first matching rule. Rules whose patterns cannot be
+        combined are matched on their own.
+
+        :returns: The list of matchers, each a tuple of a regex, a dict of rules stored by group index for a combined
+            regex and the rule for a regex that is not combined
+        :rtype: :func:`list`
+        """
+
+        matchers = []
+        patterns = []
+        group_rules = {}
+        group_count = 0
+        flags = None
+
         for rule in self.rules:
-            if rule.matches_file_name(file_name):
-                return rule
-        return None
+            regex = rule.filename_regex
+            combinable = not UNCOMBINABLE_REGEX.search(regex.pattern)
+            too_many_groups = group_count + regex.groups + 1 > MAX_COMBINED_GROUPS
+            if patterns and (not combinable or too_many_groups or regex.flags != flags):
+                matchers.extend(self._combine(patterns, flags, group_rules))
+                patterns = []
+                group_rules = {}
+                group_count = 0
+
+            if not combinable:
+                matchers.append((regex, None, rule))
+                continue
+
+            flags = regex.flags
+            group_rules[group_count + 1] = rule
+            group_count += regex.groups + 1
+            patterns.append('(%s)' % regex.pattern)
+
+        if patterns:
+            matchers.extend(self._combine(patterns, flags, group_rules))
+        return matchers
+
+    def _combine(self, patterns, flags, group_rules):
+        """Compiles the given wrapped patterns into a single regex. If the patterns cannot be combined, for example
+        because they define the same group name, each rule is matched on its own instead.
+
+        :param patterns: The patterns, each wrapped in a group
+        :type patterns: [string]
+        :param flags: The flags shared by the patterns
+        :type flags: int
+        :param group_rules: The rules stored by the index of their wrapping group
+        :type group_rules: dict
+        :returns: The list of matchers
+        :rtype: :func:`list`
+        """
+
+        try:
+            return [(re.compile('|'.join(patterns), flags), group_rules, None)]
+        except re.error:
+            return [(group_rules[i].filename_regex, None, group_rules[i]) for i in sorted(group_rules)]
+
+    def _match_rules(self, file_name):
+        """Returns the first rule that matches the given file name
+
+        :param file_name: The name of the file
+        :type file_name: string
+        :returns: The matched rule, or NO_MATCH if no rule matches
+        :rtype: :class:`ingest.handlers.file_rule.FileRule`
+        """
+
+        for regex, group_rules, rule in self._matchers:
+            match = regex.match(file_name)
+            if match:
+                return rule if rule else group_rules[match.lastindex]
+        return NO_MATCH
@@ -12,7 +12,7 @@ from collections import namedtuple
 import django.utils.timezone as timezone
 import django.contrib.postgres.fields
 from django.contrib.postgres.indexes import GinIndex
-from django.db import models, transaction
+from django.db import connection, models, transaction
 from django.db.models import Q, Count, Sum, DateTimeField, Max
 from django.db.models.functions import Trunc
 from django.utils.timezone import now
@@ -27,7 +27,7 @@ from ingest.scan.scanners.exceptions import ScanIngestJobAlreadyLaunched
 from ingest.strike.configuration.strike_configuration import StrikeConfiguration
 from ingest.strike.configuration.json.configuration_v6 import StrikeConfigurationV6, convert_strike_config_to_v6_json
 from ingest.strike.configuration.exceptions import InvalidStrikeConfiguration
-from job.models import JobType
+from job.models import Job, JobType, JobTypeRevision
 from job.messages.process_job_input import create_process_job_input_messages
 from job.messages.cancel_jobs import create_cancel_jobs_messages
 from messaging.manager import CommandMessageManager
@@ -234,25 +234,35 @@ class IngestManager(models.Manager):
 
         return ingests
 
-    def get_dupe_ingests_by_scan(self, scan_id, new_ingests):
-        """Returns a list of ingests associated with a scan and file name/sizes
+    def get_dupe_ingests_by_scan(self, scan_id, name_sizes):
+        """Returns the file name/size pairs among the given ones that already have an ingest created by the given scan.
+        The pairs are matched against the ingest table with a single query.
 
         :param scan_id: Query ingests created by a specific scan processor.
         :type scan_id: int
-        :param new_ingests: dict of filename/file sizes
-        :type new_ingests: dict
-        :returns: The list of ingests that match the scan, filenames and file sizes
-        :rtype: [:class:`ingest.models.Ingest`]
+        :param name_sizes: The file name/size pairs to check
+        :type name_sizes: set
+        :returns: The file name/size pairs that already have an ingest for the scan
+        :rtype: set
         """
-        ingests = Ingest.objects.all().filter(scan_id=scan_id)
 
-        duplicates = []
-        for new_ingest in new_ingests:
-            dupes = ingests.filter(file_name=new_ingest['file_name'], file_size=new_ingest['file_size'])
-            if dupes.count():
-                duplicates.append(dupes.values())
+        if not name_sizes:
+            return set()
+
+        values = []
+        params = []
+        for file_name, file_size in name_sizes:
+            values.append('(%s, %s)')
+            params.extend([file_name, file_size])
+        params.append(scan_id)
 
-        return duplicates
+        qry = 'SELECT DISTINCT i.file_name, i.file_size FROM ingest i '
+        qry += 'JOIN (VALUES %s) AS v (file_name, file_size) ' % ', '.join(values)
+        qry += 'ON i.file_name = v.file_name AND i.file_size = v.file_size::bigint '
+        qry += 'WHERE i.scan_id = %s'
+        with connection.cursor() as cursor:
+            cursor.execute(qry, params)
+            return {(row[0], row[1]) for row in cursor.fetchall()}
 
     def get_details(self, ingest_id, is_staff=False):
         """Gets additional details for the given ingest model based on related model attributes.
@@ -287,7 +297,8 @@ class IngestManager(models.Manager):
             return Scan.objects.get(pk=ingest.scan.id).get_configuration()['recipe']
 
     def start_ingest_tasks(self, ingests, scan_id=None, strike_id=None):
-        """Starts a batch of tasks for the given scan in an atomic transaction.
+        """Starts a batch of tasks for the given scan in an atomic transaction. The trigger events, jobs, queue models
+        and ingest updates for the whole batch are each created with a single bulk statement.
 
         One of scan_id or strike_id must be set.
 
@@ -299,39 +310,72 @@ class IngestManager(models.Manager):
         :type strike_id: int
         """
 
-        ingest_job_type = Ingest.objects.get_ingest_job_type()
-
-        for ingest in ingests:
-            logger.debug('Creating ingest task for %s', ingest.file_name)
+        if scan_id:
+            trigger_type = 'SCAN_TRANSFER'
+        elif strike_id:
+            trigger_type = 'STRIKE_TRANSFER'
+        else:
+            raise Exception('One of scan_id or strike_id must be set')
 
-            when = ingest.transfer_ended if ingest.transfer_ended else now()
-            desc = {'file_name': ingest.file_name}
+        if not ingests:
+            return
 
-            if scan_id:
-                ingest_id = Ingest.objects.get(scan_id=ingest.scan_id, file_name=ingest.file_name).id
-                desc['scan_id'] = scan_id
-                event = TriggerEvent.objects.create_trigger_event('SCAN_TRANSFER', None, desc, when)
-            elif strike_id:
-                ingest_id = ingest.id
-                desc['strike_id'] = strike_id
-                event = TriggerEvent.objects.create_trigger_event('STRIKE_TRANSFER', None, desc, when)
-            else:
-                raise Exception('One of scan_id or strike_id must be set')
+        ingest_job_type = Ingest.objects.get_ingest_job_type()
+        job_type_rev = JobTypeRevision.objects.get_revision(ingest_job_type.name, ingest_job_type.version,
+                                                            ingest_job_type.revision_num)
 
-        data = Data()
-        data.add_value(JsonValue('ingest_id', ingest_id))
-        data.add_value(JsonValue('workspace', ingest.workspace.name))
-        if ingest.new_workspace:
-            data.add_value(JsonValue('new_workspace', ingest.new_workspace.name))
+        # Ingests bulk created by a scan may not have their IDs populated, so look up any missing IDs at once
+        if scan_id:
+            missing_file_names = [ingest.file_name for ingest in ingests if not ingest.id]
+            if missing_file_names:
+                qry = self.filter(scan_id=scan_id, file_name__in=missing_file_names)
+                ingest_ids = {file_name: ingest_id for file_name, ingest_id in qry.values_list('file_name', 'id')}
+                for ingest in ingests:
+                    if not ingest.id:
+                        ingest.id = ingest_ids[ingest.file_name]
 
-        ingest_job = None
         with transaction.atomic():
-            ingest_job = Queue.objects.queue_new_job_v6(ingest_job_type, data, event)
-            ingest.job = ingest_job
-            ingest.status = 'QUEUED'
-            ingest.save()
-
-        logger.debug('Successfully created ingest task for %s', ingest.file_name)
+            events = []
+            for ingest in ingests:
+                logger.debug('Creating ingest task for %s', ingest.file_name)
+                desc = {'file_name': ingest.file_name}
+                if scan_id:
+                    desc['scan_id'] = scan_id
+                else:
+                    desc['strike_id'] = strike_id
+                event = TriggerEvent()
+                event.type = trigger_type
+                event.description = desc
+                event.occurred = ingest.transfer_ended if ingest.transfer_ended else now()
+                events.append(event)
+            TriggerEvent.objects.bulk_create(events)
+
+            jobs = []
+            for ingest, event in zip(ingests, events):
+                data = Data()
+                data.add_value(JsonValue('ingest_id', ingest.id))
+                data.add_value(JsonValue('workspace', ingest.workspace.name))
+                if ingest.new_workspace:
+                    data.add_value(JsonValue('new_workspace', ingest.new_workspace.name))
+                jobs.append(Job.objects.create_job_v6(job_type_rev, event_id=event.id, input_data=data))
+            Job.objects.bulk_create(jobs)
+
+            Queue.objects.queue_jobs(jobs)
+
+            values = []
+            params = [now()]
+            for ingest, job in zip(ingests, jobs):
+                ingest.job = job
+                ingest.status = 'QUEUED'
+                values.append('(%s, %s)')
+                params.extend([ingest.id, job.id])
+
+            qry = 'UPDATE ingest i SET job_id = v.job_id, status = \'QUEUED\', last_modified = %s '
+            qry += 'FROM (VALUES %s) AS v (ingest_id, job_id) WHERE i.id = v.ingest_id' % ', '.join(values)
+            with connection.cursor() as cursor:
+                cursor.execute(qry, params)
+
+        logger.debug('Successfully created %i ingest task(s)', len(ingests))
 
     def start_ingest_tasks_cm(self, ingests, scan_id=None, strike_id=None):
         """Starts a batch of tasks for the given scan in an atomic transaction.
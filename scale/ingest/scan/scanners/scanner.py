@@ -3,9 +3,12 @@ from __future__ import unicode_literals
 
 import logging
 import os
+import threading
 from abc import ABCMeta, abstractmethod
+from Queue import Queue
 
-from django.db import transaction
+from django.db import connection, transaction
+from django.utils.timezone import now
 
 from ingest.models import Ingest, Scan
 from ingest.scan.scanners.exceptions import ScannerInterruptRequested
@@ -13,6 +16,12 @@ from storage.models import Workspace
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of matched batches waiting to be persisted, bounding how far matching runs ahead of the database
+PERSIST_QUEUE_SIZE = 2
+
+# The stages of a scan pipeline: listing the workspace, applying the ingest rules and persisting the ingests
+STAGES = ['list', 'match', 'persist']
+
 
 class Scanner(object):
     """Abstract class for a scanner that processes existing files to ingest. Sub-classes must have a no-argument
@@ -36,9 +45,14 @@ class Scanner(object):
         self._count = 0
         self._dry_run = False  # Used to only scan and skip ingest process
         self._file_handler = None  # The file handler configured for this scanner
+        self._persist_error = None  # Error raised by the persist stage thread
+        self._persist_queue = None  # Batches of ingests waiting for the persist stage thread
+        self._persist_thread = None
         self._recursive = True
         self._scanned_workspace = None  # The workspace model that is being scanned
         self._scanner_type = scanner_type
+        self._stage_counts = {stage: 0 for stage in STAGES}
+        self._stage_seconds = {stage: 0.0 for stage in STAGES}
         self._stop_received = False
         self._supported_broker_types = supported_broker_types
         self._workspaces = {}  # The workspaces needed by this scanner, stored by workspace name {string: workspace}
@@ -85,6 +99,10 @@ class Scanner(object):
     def run(self, dry_run=False):
         """Runs the scanner until signaled to stop by the stop() method or processing complete.
 
+        The scan runs as a pipeline: the workspace is listed by the storage broker (in parallel where supported), the
+        ingest rules are applied to each batch of listed files on this thread and the matched ingests are deduplicated
+        and saved to the database on a separate thread, so that the stages overlap.
+
         :param dry_run: Flag to enable file scanning only, no file ingestion will occur
         :type dry_run: bool
         """
@@ -95,19 +113,34 @@ class Scanner(object):
         # Initialize workspace scan via storage broker. Configuration determines if recursive workspace walk.
         files = self._scanned_workspace.list_files(recursive=self._recursive)
 
-        batched_files = []
-        for file in files:
-            batched_files.append(file)
-
-            # Process files every time a batch size is reached
-            if len(batched_files) >= self._batch_size:
+        if not self._dry_run:
+            self._start_persist_stage()
+        try:
+            batched_files = []
+            list_started = now()
+            for file in files:
+                batched_files.append(file)
+
+                # Process files every time a batch size is reached
+                if len(batched_files) >= self._batch_size:
+                    self._record_stage('list', len(batched_files), list_started)
+                    self._process_scanned(batched_files)
+                    batched_files = []
+                    list_started = now()
+
+            # If any remaining files, process
+            if len(batched_files):
+                self._record_stage('list', len(batched_files), list_started)
                 self._process_scanned(batched_files)
-                batched_files = []
-
-        # If any remaining files, process
-        if len(batched_files):
-            self._process_scanned(batched_files)
-
+        finally:
+            self._stop_persist_stage()
+        self._check_persist_error()
+
+        for stage in STAGES:
+            seconds = self._stage_seconds[stage]
+            rate = self._stage_counts[stage] / seconds if seconds else 0.0
+            logger.info('Scan %s stage handled %i files in %.1f seconds (%.1f files/sec)', stage,
+                        self._stage_counts[stage], seconds, rate)
         logger.info('%s %i files during scan.' % ('Detected' if self._dry_run else 'Processed', self._count))
 
     def setup_workspaces(self, scanned_workspace, file_handler):
@@ -166,6 +199,7 @@ class Scanner(object):
         """
 
         ingests = []
+        match_started = now()
 
         for file_details in file_list:
             if not self._stop_received:
@@ -176,21 +210,26 @@ class Scanner(object):
                 self._count += 1
             else:
                 raise ScannerInterruptRequested
+        self._record_stage('match', len(file_list), match_started)
 
         # If no ingests were added, don't bother moving on
         if not len(ingests):
             logger.debug('No ingests for batch, this will always be the case during a dry-run.')
             return
 
-        # Once all ingest rules have been applied, de-duplicate and then bulk insert
-        ingests = self._deduplicate_ingest_list(self.scan_id, ingests)
+        # Hand the batch to the persist stage thread if running, otherwise persist it now
+        if self._persist_queue:
+            self._check_persist_error()
+            self._persist_queue.put(ingests)
+        else:
+            self._persist_ingests(ingests)
 
-        # bulk insert remaining as queued and note detected files in Scan mode
-        with transaction.atomic():
-            Ingest.objects.bulk_create(ingests)
-            Scan.objects.filter(pk=self.scan_id).update(file_count=self._count)
+    def _check_persist_error(self):
+        """Raises the error from the persist stage thread, if one occurred
+        """
 
-        Ingest.objects.start_ingest_tasks(ingests, scan_id=self.scan_id)
+        if self._persist_error:
+            raise self._persist_error
 
     @staticmethod
     def _deduplicate_ingest_list(scan_id, new_ingests):
@@ -203,27 +242,44 @@ class Scanner(object):
         :returns: List of deduplicated ingest models
         :rtype: List[:class:`ingest.models.Ingest`]
         """
-        name_sizes = [{'file_name': ingest.file_name, 'file_size': ingest.file_size} for ingest in new_ingests]
-
         list_count = len(new_ingests)
-        existing_ingests = Ingest.objects.get_dupe_ingests_by_scan(scan_id, name_sizes)
-        existing_name_sizes = [{'file_name': ingest.file_name, 'file_size': ingest.file_size} for ingest in existing_ingests]
+        name_sizes = {(ingest.file_name, ingest.file_size) for ingest in new_ingests}
+        seen_name_sizes = Ingest.objects.get_dupe_ingests_by_scan(scan_id, name_sizes)
 
-        final_ingest_name_sizes = []
         final_ingests = []
         for ingest in new_ingests:
-            the_ingest = {'file_name': ingest.file_name, 'file_size': ingest.file_size}
-            if the_ingest not in existing_name_sizes and the_ingest not in final_ingest_name_sizes:
-                final_ingest_name_sizes.append(the_ingest)
+            name_size = (ingest.file_name, ingest.file_size)
+            if name_size not in seen_name_sizes:
+                seen_name_sizes.add(name_size)
                 final_ingests.append(ingest)
             else:
-                logging.info('Removed duplicate file_name %s file_size %d from ingests at file_path %s',
+                logger.debug('Removed duplicate file_name %s file_size %d from ingests at file_path %s',
                              ingest.file_name, ingest.file_size, ingest.file_path)
 
         logger.info('Removed %i duplicates of pre-existing ingests.', list_count - len(final_ingests))
 
         return final_ingests
 
+    def _persist_ingests(self, ingests):
+        """Deduplicates the given batch of matched ingests, saves them to the database and starts their ingest tasks
+
+        :param ingests: The batch of ingest models
+        :type ingests: [:class:`ingest.models.Ingest`]
+        """
+
+        persist_started = now()
+
+        # Once all ingest rules have been applied, de-duplicate and then bulk insert
+        ingests = self._deduplicate_ingest_list(self.scan_id, ingests)
+
+        # bulk insert remaining as queued and note detected files in Scan mode
+        with transaction.atomic():
+            Ingest.objects.bulk_create(ingests)
+            Scan.objects.filter(pk=self.scan_id).update(file_count=self._count)
+
+        Ingest.objects.start_ingest_tasks(ingests, scan_id=self.scan_id)
+        self._record_stage('persist', len(ingests), persist_started)
+
     def _process_ingest(self, file_path, file_size):
         """Processes the ingest file by applying the Scan configuration rules.
         
@@ -249,3 +305,59 @@ class Scanner(object):
             return ingest
 
         # If is_there_rule_match matches a rule, ingest will be returned above, otherwise None is default
+
+    def _record_stage(self, stage, count, started):
+        """Records that the given stage handled a number of files, for the files/sec reported at the end of the scan
+
+        :param stage: The name of the stage
+        :type stage: string
+        :param count: The number of files handled
+        :type count: int
+        :param started: When the stage started handling the files
+        :type started: :class:`datetime.datetime`
+        """
+
+        self._stage_counts[stage] += count
+        self._stage_seconds[stage] += (now() - started).total_seconds()
+
+    def _run_persist_stage(self):
+        """Persists batches of ingests from the persist queue until the stop sentinel is received. After an error, the
+        remaining batches are discarded so that the matching stage is never blocked.
+        """
+
+        try:
+            while True:
+                ingests = self._persist_queue.get()
+                if ingests is None:
+                    break
+                if self._persist_error:
+                    continue
+                try:
+                    self._persist_ingests(ingests)
+                except Exception as ex:
+                    logger.exception('Scan failed to persist ingests')
+                    self._persist_error = ex
+        finally:
+            # This thread has its own database connection
+            connection.close()
+
+    def _start_persist_stage(self):
+        """Starts the thread that persists matched ingests
+        """
+
+        self._persist_error = None
+        self._persist_queue = Queue(maxsize=PERSIST_QUEUE_SIZE)
+        self._persist_thread = threading.Thread(target=self._run_persist_stage, name='Scan persist stage')
+        self._persist_thread.daemon = True
+        self._persist_thread.start()
+
+    def _stop_persist_stage(self):
+        """Waits for the persist stage thread to finish the queued batches and stops it
+        """
+
+        if not self._persist_queue:
+            return
+
+        self._persist_queue.put(None)
+        self._persist_thread.join()
+        self._persist_queue = None
@@ -2,7 +2,6 @@
 from __future__ import unicode_literals
 
 import logging
-import math
 import os
 import time
 from datetime import datetime
@@ -12,14 +11,26 @@ from django.utils.timezone import now
 from ingest.models import Ingest
 from ingest.strike.monitors.exceptions import InvalidMonitorConfiguration
 from ingest.strike.monitors.monitor import Monitor
+from util.inotify import DirectoryWatcher
 from util.os_helper import makedirs
 from util.validation import ValidationWarning
 
 logger = logging.getLogger(__name__)
 
+# Seconds between full scans of the Strike directory, which also reconcile any changes missed by the change feed
+FULL_SCAN_PERIOD = 60
+
+# Maximum seconds to wait for changes before checking whether the monitor has been stopped
+CHANGE_WAIT = 5
+
+# Ingest statuses that are still in-flight and must continue to be processed by the monitor
+IN_FLIGHT_STATUSES = ['TRANSFERRING', 'TRANSFERRED']
+
 
 class DirWatcherMonitor(Monitor):
-    """A monitor that watches a file system directory for incoming files
+    """A monitor that watches a file system directory for incoming files. Where inotify is supported, files are
+    processed as soon as they finish being written to or are moved into the directory, with a full scan of the
+    directory every FULL_SCAN_PERIOD seconds. Otherwise the monitor falls back to only the periodic full scans.
     """
 
     def __init__(self):
@@ -32,6 +43,9 @@ class DirWatcherMonitor(Monitor):
         self._deferred_dir = None
         self._ingest_dir = None
         self._transfer_suffix = None
+        self._ingests = {}  # In-flight ingests stored by final file name {string: ingest}
+        self._watcher = None
+        self._watched_dir = None
 
     def load_configuration(self, configuration):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.load_configuration`
@@ -49,29 +63,32 @@ class DirWatcherMonitor(Monitor):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.run`
         """
 
-        throttle = 60
-
+        last_full_scan = None
         while self._running:
-            secs_passed = 0
             try:
-                self.reload_configuration()
-
-                # Process the directory and record number of seconds used
-                started = now()
-                self._mount_and_process_dir()
-                ended = now()
-
-                secs_passed = (ended - started).total_seconds()
+                if last_full_scan is None or (now() - last_full_scan).total_seconds() >= FULL_SCAN_PERIOD:
+                    last_full_scan = now()
+                    self.reload_configuration()
+                    # Start watching before the scan so that no changes are missed in between
+                    self._start_watching()
+                    self._mount_and_process_dir()
+                    continue
+
+                wait = min(FULL_SCAN_PERIOD - (now() - last_full_scan).total_seconds(), CHANGE_WAIT)
+                if not self._watcher:
+                    time.sleep(max(wait, 0))
+                    continue
+
+                file_names = self._read_changes(max(wait, 0))
+                if file_names is None:
+                    # Changes were lost, so fall back to a full scan
+                    last_full_scan = None
+                elif file_names:
+                    self._process_changes(file_names)
             except:
                 logger.exception('Strike encountered error')
-            finally:
-                if self._running:
-                    # If process time takes less than throttle, delay
-                    if secs_passed < throttle:
-                        # Delay until full throttle time reached
-                        delay = math.ceil(throttle - secs_passed)
-                        logger.debug('Pausing for %i seconds', delay)
-                        time.sleep(delay)
+
+        self._stop_watching()
 
     def stop(self):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.stop`
@@ -107,7 +124,7 @@ class DirWatcherMonitor(Monitor):
         """
 
         if file_name.endswith(self._transfer_suffix):
-            return file_name.rstrip(self._transfer_suffix)
+            return file_name[:-len(self._transfer_suffix)]
         return file_name
 
     def _init_dirs(self):
@@ -166,6 +183,29 @@ class DirWatcherMonitor(Monitor):
             else:
                 logger.error('Tried to move %s to %s, but the file is now lost', file_path, deferred_path)
 
+    def _process_changes(self, file_names):
+        """Processes the given changed files in the Strike directory, using the in-flight ingests kept from previous
+        passes
+
+        :param file_names: The names of the changed files, in the order they changed
+        :type file_names: [string]
+        """
+
+        logger.debug('Processing %i changed file(s) in %s', len(file_names), self._strike_dir)
+
+        for file_name in file_names:
+            file_path = os.path.join(self._strike_dir, file_name)
+            if not os.path.isfile(file_path):
+                # File was already moved or removed, the next full scan handles any ingest left behind
+                continue
+            final_file_name = self._final_filename(file_name)
+            logger.info('Processing %s', file_path)
+            try:
+                ingest = self._process_file(file_name, self._ingests.get(final_file_name))
+                self._track_ingest(final_file_name, ingest)
+            except Exception:
+                logger.exception('Error processing %s', file_path)
+
     def _process_dir(self):
         """Processes the current files in the Strike directory
         """
@@ -180,37 +220,35 @@ class DirWatcherMonitor(Monitor):
         file_list.sort(key=lambda x: os.path.getmtime(os.path.join(self._strike_dir, x)))
         logger.debug('%i file(s) in %s', len(file_list), self._strike_dir)
 
-        # Compile a dict of current ingests that need to be processed
+        # Reload the dict of current ingests that need to be processed
         # Ingests that are still TRANSFERRING or have TRANSFERRED but failed to update to DEFERRED, ERRORED, or QUEUED
         # still need to be processed
-        ingests = {}
-        statuses = ['TRANSFERRING', 'TRANSFERRED']
-        ingests_qry = Ingest.objects.filter(status__in=statuses, strike_id=self.strike_id)
+        self._ingests = {}
+        ingests_qry = Ingest.objects.filter(status__in=IN_FLIGHT_STATUSES, strike_id=self.strike_id)
         ingests_qry = ingests_qry.order_by('last_modified')
         for ingest in ingests_qry.iterator():
-            ingests[ingest.file_name] = ingest
+            self._ingests[ingest.file_name] = ingest
+        ingests = dict(self._ingests)
 
         # Process files in Strike dir
         for file_name in file_list:
             final_file_name = self._final_filename(file_name)
             file_path = os.path.join(self._strike_dir, file_name)
             logger.info('Processing %s', file_path)
-            ingest = None
-            if final_file_name in ingests:
-                ingest = ingests[final_file_name]
-                # Clear the ingest to see what's left after files are done
-                del ingests[final_file_name]
+            # Clear the ingest to see what's left after files are done
+            ingest = ingests.pop(final_file_name, None)
             try:
-                self._process_file(file_name, ingest)
+                ingest = self._process_file(file_name, ingest)
+                self._track_ingest(final_file_name, ingest)
             except Exception:
                 logger.exception('Error processing %s', file_path)
 
         # Process ingests where the file is missing from the Strike dir
-        for file_name in ingests.iterkeys():
-            ingest = ingests[file_name]
+        for file_name, ingest in ingests.items():
             logger.warning('Processing ingest for missing file %s', file_name)
             try:
-                self._process_file(None, ingest)
+                ingest = self._process_file(None, ingest)
+                self._track_ingest(file_name, ingest)
             except Exception:
                 msg = 'Error processing ingest for missing file %s'
                 logger.exception(msg, file_name)
@@ -225,6 +263,8 @@ class DirWatcherMonitor(Monitor):
         :type file_name: string
         :param ingest: The ingest model for the file (possibly None)
         :type ingest: :class:`ingest.models.Ingest`
+        :returns: The ingest model for the file
+        :rtype: :class:`ingest.models.Ingest`
         """
 
         if file_name is None and ingest is None:
@@ -251,7 +291,7 @@ class DirWatcherMonitor(Monitor):
                 ingest.status = 'ERRORED'
                 ingest.save()
                 logger.info('Ingest for %s marked as ERRORED', final_name)
-                return
+                return ingest
 
             # Update bytes transferred
             size = os.path.getsize(file_path)
@@ -289,13 +329,15 @@ class DirWatcherMonitor(Monitor):
                     ingest.status = 'ERRORED'
                     ingest.save()
                     logger.info('Ingest for %s marked as ERRORED', file_name)
-                    return
+                    return ingest
 
             self._process_ingest(ingest, rel_ingest_path, ingest.file_size)
 
         if ingest.status == 'DEFERRED':
             self._move_deferred_file(ingest)
 
+        return ingest
+
     def _get_ingest_path(self, file_name, ingest):
         from storage.models import ScaleFile
         same_files = ScaleFile.objects.filter(file_name=file_name, workspace=ingest.workspace)
@@ -309,4 +351,61 @@ class DirWatcherMonitor(Monitor):
             the_file_name = '%s_%d%s' % (split[0], same_files.count(), split[1])
 
         ingest_path = os.path.join(self._ingest_dir, the_file_name)
-        return ingest_path
\ No newline at end of file
+        return ingest_path
+
+    def _read_changes(self, timeout):
+        """Waits for and returns the names of changed files in the Strike directory. If the change feed fails, the
+        monitor falls back to periodic full scans.
+
+        :param timeout: The maximum number of seconds to wait for changes
+        :type timeout: float
+        :returns: The names of the changed files, possibly empty, or None if changes may have been lost
+        :rtype: [string]
+        """
+
+        try:
+            return self._watcher.read_changes(timeout)
+        except (IOError, OSError):
+            logger.exception('Failed to read changes for %s, falling back to polling', self._watched_dir)
+            self._stop_watching()
+            return None
+
+    def _start_watching(self):
+        """Starts watching the Strike directory for changes if it is not already being watched. If inotify is not
+        available, the monitor falls back to periodic full scans.
+        """
+
+        if self._watcher and self._watched_dir == self._strike_dir:
+            return
+        self._stop_watching()
+
+        try:
+            self._watcher = DirectoryWatcher(self._strike_dir)
+            self._watched_dir = self._strike_dir
+            logger.info('Watching %s for changes', self._strike_dir)
+        except (IOError, OSError):
+            logger.warning('Unable to watch %s for changes, polling every %i seconds', self._strike_dir,
+                           FULL_SCAN_PERIOD, exc_info=True)
+
+    def _stop_watching(self):
+        """Stops watching the Strike directory for changes
+        """
+
+        if self._watcher:
+            self._watcher.close()
+        self._watcher = None
+        self._watched_dir = None
+
+    def _track_ingest(self, final_file_name, ingest):
+        """Updates the in-flight ingests kept between passes with the given processed ingest
+
+        :param final_file_name: The final name of the ingest file
+        :type final_file_name: string
+        :param ingest: The processed ingest model
+        :type ingest: :class:`ingest.models.Ingest`
+        """
+
+        if ingest.status in IN_FLIGHT_STATUSES:
+            self._ingests[final_file_name] = ingest
+        else:
+            self._ingests.pop(final_file_name, None)
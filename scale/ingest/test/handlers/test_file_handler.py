@@ -0,0 +1,63 @@
+from __future__ import unicode_literals
+
+import re
+
+import django
+from django.test import TestCase
+from mock import patch
+
+from ingest.handlers.file_handler import FileHandler
+from ingest.handlers.file_rule import FileRule
+
+
+class TestFileHandler(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.patterns = [r'.*\.txt$', r'a(b)?c', r'(?i)foo.*', r'(x)\1', r'data_(?P<num>\d+)', r'.*_(\d+)\.h5',
+                         r'data_(?P<num>\d+)\.dat', r'(?:q|w)+e']
+        self.handler = FileHandler()
+        for pattern in self.patterns:
+            self.handler.add_rule(FileRule(re.compile(pattern), [], None, None))
+
+    def test_match_file_name(self):
+        """Tests that match_file_name() returns the same first matching rule as checking each rule in order"""
+
+        file_names = ['file.txt', 'abc', 'ac', 'FOObar', 'xx', 'data_12', 'data_12.dat', 'a_1.h5', 'qwqe', 'abc.txt',
+                      'nomatch']
+        for file_name in file_names:
+            expected_rule = None
+            for rule in self.handler.rules:
+                if rule.matches_file_name(file_name):
+                    expected_rule = rule
+                    break
+            self.assertIs(self.handler.match_file_name(file_name), expected_rule, file_name)
+
+        self.assertIsNone(self.handler.match_file_name('nomatch'))
+
+    def test_match_file_name_many_rules(self):
+        """Tests calling match_file_name() with more rule groups than fit in one combined regex"""
+
+        handler = FileHandler()
+        for i in range(150):
+            handler.add_rule(FileRule(re.compile(r'file_%i_(\w+)\.dat' % i), [], None, None))
+
+        self.assertIs(handler.match_file_name('file_7_a.dat'), handler.rules[7])
+        self.assertIs(handler.match_file_name('file_149_a.dat'), handler.rules[149])
+        self.assertIsNone(handler.match_file_name('file_150_a.dat'))
+
+    @patch('ingest.handlers.file_handler.MATCH_CACHE_SIZE', 2)
+    def test_match_cache(self):
+        """Tests that match_file_name() caches the matched rule of the most recently used file names"""
+
+        self.handler.match_file_name('file.txt')
+        self.handler.match_file_name('abc')
+        self.handler.match_file_name('file.txt')
+        self.handler.match_file_name('nomatch')
+
+        self.assertListEqual(list(self.handler._match_cache.keys()), ['file.txt', 'nomatch'])
+
+        # Adding a rule clears the cache
+        self.handler.add_rule(FileRule(re.compile(r'nomatch'), [], None, None))
+        self.assertIs(self.handler.match_file_name('nomatch'), self.handler.rules[-1])
@@ -2,7 +2,7 @@ from __future__ import unicode_literals
 
 import django
 from django.test import TestCase
-from mock import patch
+from mock import MagicMock, patch
 
 import storage.test.utils as storage_test_utils
 from ingest.models import Ingest
@@ -133,11 +133,46 @@ class TestScanner(TestCase):
         self.assertTrue(dedup.called)
         self.assertTrue(start_ingests.called)
 
+    @patch('ingest.scan.scanners.s3_scanner.S3Scanner._persist_ingests')
+    @patch('ingest.scan.scanners.s3_scanner.S3Scanner._ingest_file')
+    def test_run_pipelined(self, ingest_file, persist_ingests):
+        """Tests calling S3Scanner.run() with batches persisted by the persist stage thread"""
+
+        ingest_file.side_effect = lambda file_name, file_size: Ingest(file_name=file_name, file_size=file_size)
+        workspace = MagicMock()
+        workspace.list_files.return_value = iter([FileDetails('file_%i' % i, i) for i in range(2500)])
+        scanner = S3Scanner()
+        scanner._scanned_workspace = workspace
+
+        scanner.run()
+
+        self.assertEquals(scanner._count, 2500)
+        batches = [c[0][0] for c in persist_ingests.call_args_list]
+        self.assertListEqual([len(batch) for batch in batches], [1000, 1000, 500])
+        self.assertEquals(batches[2][-1].file_name, 'file_2499')
+        self.assertEquals(scanner._stage_counts['list'], 2500)
+        self.assertEquals(scanner._stage_counts['match'], 2500)
+        self.assertIsNone(scanner._persist_queue)
+
+    @patch('ingest.scan.scanners.s3_scanner.S3Scanner._persist_ingests')
+    @patch('ingest.scan.scanners.s3_scanner.S3Scanner._ingest_file')
+    def test_run_persist_error(self, ingest_file, persist_ingests):
+        """Tests calling S3Scanner.run() when the persist stage fails"""
+
+        ingest_file.side_effect = lambda file_name, file_size: Ingest(file_name=file_name, file_size=file_size)
+        persist_ingests.side_effect = ValueError('Database error')
+        workspace = MagicMock()
+        workspace.list_files.return_value = iter([FileDetails('file_%i' % i, i) for i in range(1500)])
+        scanner = S3Scanner()
+        scanner._scanned_workspace = workspace
+
+        self.assertRaises(ValueError, scanner.run)
+
     @patch('ingest.models.Ingest.objects.get_dupe_ingests_by_scan')
     def test_deduplicate_ingest_list_no_existing(self, ingests_by_scan):
         """Tests calling S3Scanner._deduplicate_ingest_list() without existing"""
 
-        ingests_by_scan.return_value = []
+        ingests_by_scan.return_value = set()
 
         ingests = [Ingest(file_name='test1', file_size=10), Ingest(file_name='test2', file_size=20), Ingest(file_name='test2', file_size=30)]
         final_ingests = S3Scanner._deduplicate_ingest_list(None, ingests)
@@ -148,7 +183,7 @@ class TestScanner(TestCase):
     def test_deduplicate_ingest_list_with_duplicate_file_names(self, ingests_by_scan):
         """Tests calling S3Scanner._deduplicate_ingest_list() with duplicates"""
 
-        ingests_by_scan.return_value = []
+        ingests_by_scan.return_value = set()
 
         ingests = [Ingest(file_name='test1', file_size=10), Ingest(file_name='test1', file_size=10)]
         final_ingests = S3Scanner._deduplicate_ingest_list(None, ingests)
@@ -160,7 +195,7 @@ class TestScanner(TestCase):
     def test_deduplicate_ingest_list_with_existing_no_other_dups(self, ingests_by_scan):
         """Tests calling S3Scanner._deduplicate_ingest_list() with existing and no other dups"""
 
-        ingests_by_scan.return_value = [Ingest(file_name='test1', file_size=10)]
+        ingests_by_scan.return_value = {('test1', 10)}
 
         ingests = [Ingest(file_name='test1', file_size=10), Ingest(file_name='test2', file_size=10)]
         final_ingests = S3Scanner._deduplicate_ingest_list(None, ingests)
@@ -1,8 +1,12 @@
 from __future__ import unicode_literals
 
+import os
+import shutil
+import tempfile
+
 import django
 from django.test import TestCase
-from mock import Mock
+from mock import MagicMock, Mock, call, patch
 
 from ingest.strike.monitors.dir_monitor import DirWatcherMonitor
 from ingest.strike.monitors.exceptions import InvalidMonitorConfiguration
@@ -64,3 +68,27 @@ class TestDirWatcherMonitor(TestCase):
         self.assertEqual(ingest_file.status, 'DEFERRED')
         self.assertEqual(ingest_file.file_size, file_size)
         self.assertEqual(ingest_file.file_path, file_path)
+
+    def test_process_changes(self):
+        """Tests _process_changes() using the in-flight ingests kept between passes"""
+
+        strike_dir = tempfile.mkdtemp()
+        try:
+            for file_name in ['file_1.txt', 'file_2.txt_tmp']:
+                with open(os.path.join(strike_dir, file_name), 'w') as f:
+                    f.write('data')
+            monitor = DirWatcherMonitor()
+            monitor._strike_dir = strike_dir
+            monitor._transfer_suffix = '_tmp'
+            transferring_ingest = MagicMock(status='TRANSFERRING')
+            monitor._ingests = {'file_1.txt': transferring_ingest}
+            queued_ingest = MagicMock(status='QUEUED')
+            new_ingest = MagicMock(status='TRANSFERRING')
+
+            with patch.object(monitor, '_process_file', side_effect=[queued_ingest, new_ingest]) as process_file:
+                monitor._process_changes(['file_1.txt', 'gone.txt', 'file_2.txt_tmp'])
+
+            process_file.assert_has_calls([call('file_1.txt', transferring_ingest), call('file_2.txt_tmp', None)])
+            self.assertDictEqual(monitor._ingests, {'file_2.txt': new_ingest})
+        finally:
+            shutil.rmtree(strike_dir)
@@ -4,12 +4,14 @@ import django
 from django.test import TestCase, TransactionTestCase
 from mock import patch
 
+import ingest.test.utils as ingest_test_utils
 import recipe.test.utils as recipe_test_utils
 import storage.test.utils as storage_test_utils
 from ingest.strike.configuration.json.configuration_v6 import StrikeConfigurationV6
 from ingest.models import Ingest, Strike
 from messaging.backends.amqp import AMQPMessagingBackend
 from messaging.backends.factory import add_message_backend
+from queue.models import Queue
 from storage.exceptions import InvalidDataTypeTag
 
 
@@ -45,6 +47,27 @@ class TestIngestAddDataTypeTag(TestCase):
         self.assertSetEqual(tags, correct_set)
 
 
+class TestIngestManagerGetDupeIngestsByScan(TestCase):
+    def setUp(self):
+        django.setup()
+
+    def test_get_dupe_ingests_by_scan(self):
+        """Tests calling get_dupe_ingests_by_scan() to find the file name/sizes already ingested by a scan"""
+
+        scan = ingest_test_utils.create_scan()
+        other_scan = ingest_test_utils.create_scan()
+        ingest_1 = ingest_test_utils.create_ingest(file_name='file_1.txt', scan=scan)
+        ingest_2 = ingest_test_utils.create_ingest(file_name='file_2.txt', scan=other_scan)
+
+        name_sizes = {('file_1.txt', ingest_1.file_size), ('file_1.txt', ingest_1.file_size + 1),
+                      ('file_2.txt', ingest_2.file_size), ('file_3.txt', 100)}
+        with self.assertNumQueries(1):
+            dupes = Ingest.objects.get_dupe_ingests_by_scan(scan.id, name_sizes)
+
+        self.assertSetEqual(dupes, {('file_1.txt', ingest_1.file_size)})
+        self.assertSetEqual(Ingest.objects.get_dupe_ingests_by_scan(scan.id, set()), set())
+
+
 class TestIngestGetDataTypeTags(TestCase):
     def setUp(self):
         django.setup()
@@ -71,6 +94,50 @@ class TestIngestGetDataTypeTags(TestCase):
         self.assertSetEqual(tags, set())
 
 
+class TestIngestManagerStartIngestTasks(TestCase):
+    def setUp(self):
+        django.setup()
+
+    def test_start_ingest_tasks_scan(self):
+        """Tests calling start_ingest_tasks() for a batch of scan ingests"""
+
+        scan = ingest_test_utils.create_scan()
+        new_workspace = storage_test_utils.create_workspace()
+        ingest_1 = ingest_test_utils.create_ingest(file_name='file_1.txt', scan=scan)
+        ingest_2 = ingest_test_utils.create_ingest(file_name='file_2.txt', scan=scan, new_workspace=new_workspace)
+
+        Ingest.objects.start_ingest_tasks([ingest_1, ingest_2], scan_id=scan.id)
+
+        for ingest in [ingest_1, ingest_2]:
+            ingest = Ingest.objects.select_related('job__event').get(id=ingest.id)
+            self.assertEqual(ingest.status, 'QUEUED')
+            self.assertEqual(ingest.job.status, 'QUEUED')
+            self.assertEqual(ingest.job.event.type, 'SCAN_TRANSFER')
+            self.assertDictEqual(ingest.job.event.description, {'file_name': ingest.file_name, 'scan_id': scan.id})
+            self.assertEqual(ingest.job.get_input_data().values['ingest_id'].value, ingest.id)
+            self.assertTrue(Queue.objects.filter(job_id=ingest.job_id).exists())
+        input_data = Ingest.objects.get(id=ingest_2.id).job.get_input_data()
+        self.assertEqual(input_data.values['new_workspace'].value, new_workspace.name)
+
+    def test_start_ingest_tasks_strike(self):
+        """Tests calling start_ingest_tasks() for a strike ingest"""
+
+        strike = ingest_test_utils.create_strike()
+        ingest = ingest_test_utils.create_ingest(file_name='file_1.txt', strike=strike)
+
+        Ingest.objects.start_ingest_tasks([ingest], strike_id=strike.id)
+
+        ingest = Ingest.objects.select_related('job__event').get(id=ingest.id)
+        self.assertEqual(ingest.status, 'QUEUED')
+        self.assertEqual(ingest.job.event.type, 'STRIKE_TRANSFER')
+        self.assertTrue(Queue.objects.filter(job_id=ingest.job_id).exists())
+
+    def test_start_ingest_tasks_missing_id(self):
+        """Tests calling start_ingest_tasks() without a scan or strike ID"""
+
+        self.assertRaises(Exception, Ingest.objects.start_ingest_tasks, [])
+
+
 class TestStrikeManagerCreateStrikeProcess(TransactionTestCase):
     fixtures = ['ingest_job_types.json']
 
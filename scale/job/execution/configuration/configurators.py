@@ -5,6 +5,7 @@ import json
 import logging
 import math
 import os
+import threading
 
 from django.conf import settings
 from django.utils.timezone import now
@@ -53,6 +54,7 @@ class QueuedExecutionConfigurator(object):
         """
 
         self._input_files = input_files
+        self._cached_manifests = {}  # {Job type revision ID: SeedManifest}
         self._cached_workspace_names = {}  # {ID: Name}
 
     def configure_queued_job(self, job):
@@ -103,20 +105,18 @@ class QueuedExecutionConfigurator(object):
                 # Set output workspaces from job configuration
                 output_workspaces = {}
                 job_config = job.get_job_configuration()
-                interface = SeedManifest(job.job_type_rev.manifest, do_validate=False)
-                for output_name in interface.get_file_output_names():
+                for output_name in self._get_manifest(job).get_file_output_names():
                     output_workspace = job_config.get_output_workspace(output_name)
                     if output_workspace:
                         output_workspaces[output_name] = output_workspace
                 config.set_output_workspaces(output_workspaces)
 
         # Create main task with fields populated from input data
-        args = job.get_job_interface().get_injected_command_args(input_values, env_vars)
+        args = self._get_manifest(job).get_injected_command_args(input_values, env_vars)
         config.create_tasks(['main'])
         config.add_to_task('main', args=args, env_vars=env_vars, workspaces=task_workspaces)
         return config
 
-
     def _cache_workspace_names(self, workspace_ids):
         """Queries and caches the workspace names for the given IDs
 
@@ -162,6 +162,21 @@ class QueuedExecutionConfigurator(object):
 
         return files_dict
 
+    def _get_manifest(self, job):
+        """Returns the Seed manifest for the given job's job type revision. Revisions are immutable and their manifests
+        were validated when they were created, so each manifest is only parsed once per configurator.
+
+        :param job: The queued job model
+        :type job: :class:`job.models.Job`
+        :returns: The Seed manifest
+        :rtype: :class:`job.seed.manifest.SeedManifest`
+        """
+
+        job_type_rev = job.job_type_rev
+        if job_type_rev.id not in self._cached_manifests:
+            self._cached_manifests[job_type_rev.id] = SeedManifest(job_type_rev.manifest, do_validate=False)
+        return self._cached_manifests[job_type_rev.id]
+
     @staticmethod
     def _system_job_workspaces(job):
         """Returns any workspaces needed for the main task if this job is a system job. The given job model should have
@@ -339,8 +354,9 @@ class ScheduledExecutionConfigurator(object):
         # Labels for metric grouping
         job_id_label = DockerParameter('label', 'scale-job-id={}'.format(job_exe.job_id))
         job_execution_id_label = DockerParameter('label', 'scale-job-execution-id={}'.format(job_exe.exe_num))
-        job_type_name_label = DockerParameter('label', 'scale-job-type-name={}'.format(job_type.name))
-        job_type_version_label = DockerParameter('label', 'scale-job-type-version={}'.format(job_type.version))
+        template = job_type_template_cache.get_template(job_type)
+        job_type_name_label = template.name_label
+        job_type_version_label = template.version_label
         main_label = DockerParameter('label', 'scale-task-type=main')
         if nvidia_docker_label:
             nvidia_runtime_param = DockerParameter('runtime', 'nvidia')
@@ -402,11 +418,9 @@ class ScheduledExecutionConfigurator(object):
         :type interface: :class:`job.configuration.interface.job_interface.JobInterface`
         """
         # Set shared memory if required by this job type
-        resources = job_type.get_resources().get_json().get_dict()['resources']
-        shared_mem = resources['sharedmem'] if 'sharedmem' in resources else 0
+        shared_mem = job_type_template_cache.get_template(job_type).shared_mem
 
         if shared_mem > 0:
-            shared_mem = int(math.ceil(shared_mem))
             env_vars = {'ALLOCATED_SHAREDMEM': '%.1f' % float(shared_mem)}
 
             config.add_to_task('main', docker_params=[DockerParameter('shm-size', '%dm' % shared_mem)],
@@ -529,7 +543,8 @@ class ScheduledExecutionConfigurator(object):
             config_with_secrets.add_to_task('post', settings=self._system_settings)
             job_config = job_exe.job.get_job_configuration()
 
-            secret_settings = secrets_mgr.retrieve_job_type_secrets(job_type.get_secrets_key())
+            secrets_key = job_type_template_cache.get_template(job_type).secrets_key
+            secret_settings = secrets_mgr.retrieve_job_type_secrets(secrets_key)
             for _config, secrets_hidden in [(config, True), (config_with_secrets, False)]:
                 task_settings = {}
                 for setting in interface.get_settings():
@@ -586,3 +601,65 @@ class ScheduledExecutionConfigurator(object):
         """
         logging_env_vars = {'SYSTEM_LOGGING_LEVEL': system_logging_level}
         config.add_to_task('main', env_vars=logging_env_vars, resources=job_exe.get_resources())
+
+
+class JobTypeTemplate(object):
+    """The parts of a scheduled execution configuration that are identical for every execution of a job type revision
+    """
+
+    def __init__(self, job_type):
+        """Constructor
+
+        :param job_type: The job type model
+        :type job_type: :class:`job.models.JobType`
+        """
+
+        # Parsing the job type resources validates the manifest, so it is only done once per revision
+        resources = job_type.get_resources().get_json().get_dict()['resources']
+        shared_mem = resources['sharedmem'] if 'sharedmem' in resources else 0
+
+        self.name_label = DockerParameter('label', 'scale-job-type-name={}'.format(job_type.name))
+        self.secrets_key = job_type.get_secrets_key()
+        self.shared_mem = int(math.ceil(shared_mem)) if shared_mem > 0 else 0
+        self.version_label = DockerParameter('label', 'scale-job-type-version={}'.format(job_type.version))
+
+
+class JobTypeTemplateCache(object):
+    """Caches the scheduled execution configuration template for each job type revision. This class is thread-safe.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._lock = threading.Lock()
+        self._templates = {}  # {(Job type ID, revision number): JobTypeTemplate}
+
+    def clear(self):
+        """Clears all cached templates so that they are rebuilt from the current job type models
+        """
+
+        with self._lock:
+            self._templates = {}
+
+    def get_template(self, job_type):
+        """Returns the template for the given job type's current revision, creating it if needed
+
+        :param job_type: The job type model
+        :type job_type: :class:`job.models.JobType`
+        :returns: The template for the job type revision
+        :rtype: :class:`job.execution.configuration.configurators.JobTypeTemplate`
+        """
+
+        key = (job_type.id, job_type.revision_num)
+        with self._lock:
+            if key in self._templates:
+                return self._templates[key]
+
+        template = JobTypeTemplate(job_type)
+        with self._lock:
+            self._templates[key] = template
+        return template
+
+
+job_type_template_cache = JobTypeTemplateCache()
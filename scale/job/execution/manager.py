@@ -34,6 +34,8 @@ class JobExecutionManager(object):
         self._lock = threading.Lock()
         self._metrics = TotalJobExeMetrics(now())
 
+        self.new_messages_event = threading.Event()  # Set when there is new information to send in messages
+
     def add_canceled_job_exes(self, job_exe_ends):
         """Adds the given job_exe_end models for job executions canceled off of the queue
 
@@ -43,6 +45,8 @@ class JobExecutionManager(object):
 
         with self._lock:
             self._job_exe_end_models.extend(job_exe_ends)
+        if job_exe_ends:
+            self.new_messages_event.set()
 
     def check_for_starvation(self, when):
         """Checks all of the currently running job executions for resource starvation. If any starved executions are
@@ -247,6 +251,8 @@ class JobExecutionManager(object):
                 self._running_job_exes[job_exe.cluster_id] = job_exe
             self._running_job_messages.extend(messages)
             self._metrics.add_running_job_exes(job_exes)
+        if messages:
+            self.new_messages_event.set()
 
     def sync_with_database(self):
         """Syncs with the database to handle any canceled executions. Any job executions that are now finished are
@@ -319,6 +325,8 @@ class JobExecutionManager(object):
         # Collect finished job execution to send a future job update message
         self._finished_job_exes.append(running_job_exe)
 
+        self.new_messages_event.set()
+
         # Remove the finished job execution and update the metrics
         del self._running_job_exes[running_job_exe.cluster_id]
         self._metrics.job_exe_finished(running_job_exe)
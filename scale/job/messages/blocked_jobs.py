@@ -79,6 +79,19 @@ class BlockedJobs(CommandMessage):
 
         return self._count < MAX_NUM
 
+    def can_fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.can_fuse`
+        """
+
+        return self.status_change == message.status_change and self._count + message._count <= MAX_NUM
+
+    def fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.fuse`
+        """
+
+        for job_id in message._blocked_job_ids:
+            self.add_job(job_id)
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
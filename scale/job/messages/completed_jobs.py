@@ -119,6 +119,19 @@ class CompletedJobs(CommandMessage):
 
         return len(self._completed_jobs) < MAX_NUM
 
+    def can_fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.can_fuse`
+        """
+
+        return self.ended == message.ended and len(self._completed_jobs) + len(message._completed_jobs) <= MAX_NUM
+
+    def fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.fuse`
+        """
+
+        for completed_job in message._completed_jobs:
+            self.add_completed_job(completed_job)
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -1,4 +1,4 @@
-"""Defines a command message that processes the input for a job"""
+"""Defines a command message that processes the input for jobs"""
 from __future__ import unicode_literals
 
 import logging
@@ -11,6 +11,10 @@ from job.messages.cancel_jobs import create_cancel_jobs_messages
 from job.models import Job
 from messaging.messages.message import CommandMessage
 
+# This is the maximum number of jobs that can be processed in one message. This maximum ensures that each message can
+# be processed quickly.
+MAX_NUM = 100
+
 
 logger = logging.getLogger(__name__)
 
@@ -25,16 +29,23 @@ def create_process_job_input_messages(job_ids):
 
     messages = []
 
+    message = None
     for job_id in job_ids:
-        message = ProcessJobInput()
-        message.job_id = job_id
+        if not message:
+            message = ProcessJobInput()
+        elif not message.can_fit_more():
+            messages.append(message)
+            message = ProcessJobInput()
+        message.add_job(job_id)
+    if message:
         messages.append(message)
 
     return messages
 
 
 class ProcessJobInput(CommandMessage):
-    """Command message that processes the input for a job
+    """Command message that processes the input for jobs. The recipe lookups are shared by the jobs of the same recipe
+    and the input file models and input meta-data fields are populated for all of the jobs together.
     """
 
     def __init__(self):
@@ -43,14 +54,68 @@ class ProcessJobInput(CommandMessage):
 
         super(ProcessJobInput, self).__init__('process_job_input')
 
-        self.job_id = None
+        self.job_ids = []
         # self.tries = 0
 
+    @property
+    def job_id(self):
+        """Returns the ID of the (first) job to process
+
+        :returns: The job ID
+        :rtype: int
+        """
+
+        return self.job_ids[0] if self.job_ids else None
+
+    @job_id.setter
+    def job_id(self, value):
+        """Sets the ID of the single job to process
+
+        :param value: The job ID
+        :type value: int
+        """
+
+        self.job_ids = [value]
+
+    def add_job(self, job_id):
+        """Adds the given job ID to this message
+
+        :param job_id: The job ID
+        :type job_id: int
+        """
+
+        if job_id not in self.job_ids:
+            self.job_ids.append(job_id)
+
+    def can_fit_more(self):
+        """Indicates whether more jobs can fit in this message
+
+        :return: True if more jobs can fit, False otherwise
+        :rtype: bool
+        """
+
+        return len(self.job_ids) < MAX_NUM
+
+    def can_fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.can_fuse`
+        """
+
+        return len(set(self.job_ids) | set(message.job_ids)) <= MAX_NUM
+
+    def fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.fuse`
+        """
+
+        for job_id in message.job_ids:
+            self.add_job(job_id)
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
 
-        return {'job_id': self.job_id} #, 'tries': self.tries}
+        if len(self.job_ids) == 1:
+            return {'job_id': self.job_id} #, 'tries': self.tries}
+        return {'job_ids': self.job_ids}
 
     @staticmethod
     def from_json(json_dict):
@@ -58,7 +123,10 @@ class ProcessJobInput(CommandMessage):
         """
 
         message = ProcessJobInput()
-        message.job_id = json_dict['job_id']
+        if 'job_ids' in json_dict:
+            message.job_ids = json_dict['job_ids']
+        else:
+            message.job_id = json_dict['job_id']
         # message.tries = json_dict['tries']
         return message
 
@@ -68,62 +136,82 @@ class ProcessJobInput(CommandMessage):
 
         from queue.messages.queued_jobs import create_queued_jobs_messages, QueuedJob
 
-        try:
-            job = Job.objects.get_job_with_interfaces(self.job_id)
-        except Job.DoesNotExist:
-            logger.exception('Failed to get job %d - job does not exist. Message will not re-run.', self.job_id)
+        jobs = Job.objects.get_jobs_with_interfaces(self.job_ids)
+        for job_id in set(self.job_ids) - {job.id for job in jobs}:
+            logger.error('Failed to get job %d - job does not exist. Message will not re-run.', job_id)
+
+        process_jobs = []
+        recipe_jobs = {}  # {Recipe ID: [job]}
+        for job in jobs:
+            if job.status not in ['PENDING', 'BLOCKED']:
+                logger.warning('Job %d input has already been processed. Message will not re-run', job.id)
+            elif job.has_input():
+                process_jobs.append(job)
+            elif not job.recipe:
+                logger.error('Job %d has no input and is not in a recipe. Message will not re-run.', job.id)
+            else:
+                recipe_jobs.setdefault(job.recipe_id, []).append(job)
+
+        cancel_job_ids = []
+        for recipe_id in sorted(recipe_jobs):
+            for job, is_valid in self._generate_input_data_from_recipe(recipe_jobs[recipe_id]):
+                if is_valid:
+                    process_jobs.append(job)
+                else:
+                    cancel_job_ids.append(job.id)
+        if cancel_job_ids:
+            self.new_messages.extend(create_cancel_jobs_messages(cancel_job_ids, now()))
+
+        if not process_jobs:
             return True
-        
-        if job.status not in ['PENDING', 'BLOCKED']:
-            logger.warning('Job %d input has already been processed. Message will not re-run', self.job_id)
-            return True
-
-        if not job.has_input():
-            if not job.recipe:
-                logger.error('Job %d has no input and is not in a recipe. Message will not re-run.', self.job_id)
-                return True
-
-            try:
-                self._generate_input_data_from_recipe(job)
-            except InvalidData:
-                logger.exception('Recipe created invalid input data for job %d. Message will not re-run. Cancelling job that cannot be queued.', self.job_id)
-                self.new_messages.extend(create_cancel_jobs_messages([self.job_id], now()))
-                return True
 
-        # Lock job model and process job's input data
+        # Lock job models and process jobs' input data
         with transaction.atomic():
-            job = Job.objects.get_locked_job(self.job_id)
-            Job.objects.process_job_input(job)
+            jobs = Job.objects.get_locked_jobs([job.id for job in process_jobs])
+            Job.objects.process_jobs_input(jobs)
 
-        # Create message to queue the job
-        if job.num_exes == 0:
-            logger.info('Processed input for job %d, sending message to queue job', self.job_id)
-            self.new_messages.extend(create_queued_jobs_messages([QueuedJob(job.id, 0)], requeue=False))
+        # Create message to queue the jobs
+        queued_jobs = [QueuedJob(job.id, 0) for job in jobs if job.num_exes == 0]
+        if queued_jobs:
+            logger.info('Processed input for %d job(s), sending message to queue them', len(queued_jobs))
+            self.new_messages.extend(create_queued_jobs_messages(queued_jobs, requeue=False))
 
         return True
 
-    def _generate_input_data_from_recipe(self, job):
-        """Generates the job's input data from its recipe dependencies and validates and sets the input data on the job
-
-        :param job: The job with related job_type_rev and recipe__recipe_type_rev models
-        :type job: :class:`job.models.Job`
+    def _generate_input_data_from_recipe(self, jobs):
+        """Generates the input data for the given jobs of the same recipe from their recipe dependencies and validates
+        and sets the input data on each job. The recipe nodes and node outputs are only retrieved once for all of the
+        jobs.
 
-        :raises :class:`data.data.exceptions.InvalidData`: If the data is invalid
+        :param jobs: The jobs of one recipe with related job_type_rev and recipe__recipe_type_rev models
+        :type jobs: :func:`list`
+        :returns: Generator of tuples of each job and whether its generated input data was valid
+        :rtype: Generator
         """
 
         from recipe.models import RecipeNode
         # Get job input from dependencies in the recipe
-        recipe_input_data = job.recipe.get_input_data()
-        nodes = RecipeNode.objects.get_recipe_jobs(job.recipe_id)
-        node_outputs = RecipeNode.objects.get_recipe_node_outputs(job.recipe_id)
+        recipe = jobs[0].recipe
+        recipe_input_data = recipe.get_input_data()
+        nodes = RecipeNode.objects.get_recipe_jobs(recipe.id)
+        node_outputs = RecipeNode.objects.get_recipe_node_outputs(recipe.id)
+        node_names = {}  # {Job ID: node name}
         for node_output in node_outputs.values():
-            if node_output.node_type == 'job' and node_output.id == job.id:
-                node_name = node_output.node_name
-                break
+            if node_output.node_type == 'job':
+                node_names[node_output.id] = node_output.node_name
 
-        definition = job.recipe.recipe_type_rev.get_definition()
-        input_data = definition.generate_node_input_data(node_name, recipe_input_data, node_outputs, self._get_optional_outputs(nodes))
-        Job.objects.set_job_input_data_v6(job, input_data)
+        definition = recipe.recipe_type_rev.get_definition()
+        optional_outputs = self._get_optional_outputs(nodes)
+        for job in jobs:
+            try:
+                input_data = definition.generate_node_input_data(node_names[job.id], recipe_input_data, node_outputs,
+                                                                 optional_outputs)
+                Job.objects.set_job_input_data_v6(job, input_data)
+            except InvalidData:
+                logger.exception('Recipe created invalid input data for job %d. Message will not re-run. Cancelling job that cannot be queued.', job.id)
+                yield job, False
+                continue
+            yield job, True
 
     def _get_optional_outputs(self, nodes):
         """get list of optional outputs within the recipe
@@ -141,4 +229,4 @@ class ProcessJobInput(CommandMessage):
                 if current_output.required == False:
                     optional_output_names.append(current_output.name)
 
-        return optional_output_names
\ No newline at end of file
+        return optional_output_names
@@ -93,6 +93,20 @@ class RunningJobs(CommandMessage):
 
         return self._count < MAX_NUM
 
+    def can_fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.can_fuse`
+        """
+
+        return self._started == message._started and self._count + message._count <= MAX_NUM
+
+    def fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.fuse`
+        """
+
+        for node_id, job_list in message._running_jobs.items():
+            for job_id, exe_num in job_list:
+                self.add_running_job(job_id, exe_num, node_id)
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job', '0057_auto_20190603_1846'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskupdate',
+            name='job_exe',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='job.JobExecution'),
+        ),
+    ]
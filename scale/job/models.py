@@ -4,6 +4,8 @@ from __future__ import unicode_literals
 
 import copy
 import datetime
+import itertools
+import json
 import logging
 import math
 import operator
@@ -65,6 +67,10 @@ MIN_RESOURCE = {
 
 INPUT_FILE_BATCH_SIZE = 500  # Maximum batch size for creating JobInputFile models
 
+LOG_INDICES = 'logstash-*,scalelogs-*'  # Elasticsearch indices that contain job execution logs
+LOG_PAGE_SIZE = 1000  # Maximum number of log messages retrieved from Elasticsearch in each request
+LOG_SCROLL_TIMEOUT = '1m'  # How long Elasticsearch keeps a log scroll open between requests
+
 # IMPORTANT NOTE: Locking order
 # Always adhere to the following model order for obtaining row locks via select_for_update() in order to prevent
 # deadlocks and ensure query efficiency
@@ -426,6 +432,17 @@ class JobManager(models.Manager):
 
         return self.select_related('job_type_rev', 'recipe__recipe_type_rev').get(id=job_id)
 
+    def get_jobs_with_interfaces(self, job_ids):
+        """Gets the job models for the given IDs with related job_type_rev and recipe__recipe_type_rev models
+
+        :param job_ids: The job IDs
+        :type job_ids: :func:`list`
+        :returns: The job models with related job_type_rev and recipe__recipe_type_rev models
+        :rtype: :func:`list`
+        """
+
+        return list(self.select_related('job_type_rev', 'recipe__recipe_type_rev').filter(id__in=job_ids))
+
     def get_jobs_with_related(self, job_ids):
         """Gets the job models for the given IDs with related job_type, job_type_rev, and batch models
 
@@ -518,40 +535,63 @@ class JobManager(models.Manager):
         :type job: :class:`job.models.Job`
         """
 
-        if job.input_file_size is not None:
-            return  # Job has already had its input processed
+        self.process_jobs_input([job])
+
+    def process_jobs_input(self, jobs):
+        """Processes the input data for the given jobs to populate their input file models and input meta-data fields.
+        The input file models for all of the jobs are created together and the input meta-data fields are set with a
+        single query. The caller must have obtained model locks on the given job models.
+
+        :param jobs: The locked job models
+        :type jobs: :func:`list`
+        """
+
+        from product.models import FileAncestryLink
+
+        jobs = [job for job in jobs if job.input_file_size is None]  # Skip jobs that already had input processed
+        if not jobs:
+            return
 
         # Create JobInputFile models in batches
-        all_file_ids = set()
+        jobs_with_files = []
+        jobs_without_files = []
         input_file_models = []
-        for file_value in job.get_input_data().values.values():
-            if file_value.param_type != FileParameter.PARAM_TYPE:
-                continue
-            for file_id in file_value.file_ids:
-                all_file_ids.add(file_id)
-                job_input_file = JobInputFile()
-                job_input_file.job_id = job.id
-                job_input_file.input_file_id = file_id
-                job_input_file.job_input = file_value.name
-                input_file_models.append(job_input_file)
-                if len(input_file_models) >= INPUT_FILE_BATCH_SIZE:
-                    JobInputFile.objects.bulk_create(input_file_models)
-                    input_file_models = []
+        for job in jobs:
+            all_file_ids = set()
+            for file_value in job.get_input_data().values.values():
+                if file_value.param_type != FileParameter.PARAM_TYPE:
+                    continue
+                for file_id in file_value.file_ids:
+                    all_file_ids.add(file_id)
+                    job_input_file = JobInputFile()
+                    job_input_file.job_id = job.id
+                    job_input_file.input_file_id = file_id
+                    job_input_file.job_input = file_value.name
+                    input_file_models.append(job_input_file)
+                    if len(input_file_models) >= INPUT_FILE_BATCH_SIZE:
+                        JobInputFile.objects.bulk_create(input_file_models)
+                        input_file_models = []
+
+            # Create file ancestry links for job
+            FileAncestryLink.objects.create_file_ancestry_links(list(all_file_ids), None, job, None)
+
+            if all_file_ids:
+                jobs_with_files.append(job.id)
+            else:
+                jobs_without_files.append(job.id)
 
         # Finish creating any remaining JobInputFile models
         if input_file_models:
             JobInputFile.objects.bulk_create(input_file_models)
 
-        # Create file ancestry links for job
-        from product.models import FileAncestryLink
-        FileAncestryLink.objects.create_file_ancestry_links(list(all_file_ids), None, job, None)
-
-        if len(all_file_ids) == 0:
+        if jobs_without_files:
             # If there are no input files, just zero out the file size and skip input meta-data fields
-            self.filter(id=job.id).update(input_file_size=0.0)
+            self.filter(id__in=jobs_without_files).update(input_file_size=0.0)
+
+        if not jobs_with_files:
             return
 
-        # Set input meta-data fields on the job
+        # Set input meta-data fields on the jobs
         # Total input file size is in MiB rounded up to the nearest whole MiB
         qry = 'UPDATE job j SET input_file_size = CEILING(s.total_file_size / (1024.0 * 1024.0)), '
         qry += 'source_started = s.source_started, source_ended = s.source_ended, last_modified = %s, '
@@ -564,10 +604,10 @@ class JobManager(models.Manager):
         qry += 'MAX(f.source_collection) AS source_collection, '
         qry += 'MAX(f.source_task) AS source_task '
         qry += 'FROM scale_file f JOIN job_input_file jif ON f.id = jif.input_file_id '
-        qry += 'WHERE jif.job_id = %s GROUP BY jif.job_id) s '
+        qry += 'WHERE jif.job_id IN %s GROUP BY jif.job_id) s '
         qry += 'WHERE j.id = s.job_id'
         with connection.cursor() as cursor:
-            cursor.execute(qry, [timezone.now(), job.id])
+            cursor.execute(qry, [timezone.now(), tuple(jobs_with_files)])
 
     def process_job_output(self, job_ids, when):
         """Processes the job output for the given job IDs. The caller must have obtained model locks on the job models
@@ -1522,7 +1562,8 @@ class JobExecution(models.Model):
         return ExecutionConfiguration(self.configuration, do_validate=False)
 
     def get_log_json(self, include_stdout=True, include_stderr=True, since=None):
-        """Get log data from elasticsearch as a dict (from the raw JSON).
+        """Get log data from elasticsearch as a dict (from the raw JSON). All of the log messages are retrieved, one
+        page at a time, and held in memory, so :meth:`get_log_stream` should be preferred for large logs.
 
         :param include_stdout: If True, include stdout in the result
         :type include_stdout: bool
@@ -1533,17 +1574,44 @@ class JobExecution(models.Model):
         :rtype: tuple of (dict, :class:`datetime.datetime`) with the results or None and the last modified timestamp
         """
 
-        # If job_exe has not started
-        if not self.started:
+        hits = None
+        for page in self.get_log_pages(include_stdout, include_stderr, since):
+            if hits is None:
+                hits = page
+            else:
+                hits['hits']['hits'].extend(page['hits']['hits'])
+
+        if hits is None:
             return None, timezone.now()
+        # Hits are sorted by timestamp, so the last hit is the most recent
+        last_modified = util.parse.parse_datetime(hits['hits']['hits'][-1]['_source']['@timestamp'])
+        return hits, last_modified
 
-        if settings.ELASTICSEARCH_VERSION and settings.ELASTICSEARCH_VERSION.startswith('2.'):
-            extension = ".raw"
-        else:
-            extension = ".keyword"
+    def get_log_pages(self, include_stdout=True, include_stderr=True, since=None):
+        """Generator that retrieves the log data from elasticsearch one page of at most LOG_PAGE_SIZE messages at a
+        time, so that only one page is held in memory. Each page is the raw JSON dict of an elasticsearch response and
+        the messages are in timestamp order across all of the pages. Pages are retrieved with search_after, or with a
+        scroll for elasticsearch 2.x which does not support search_after.
+
+        :param include_stdout: If True, include stdout in the result
+        :type include_stdout: bool
+        :param include_stderr: If True include stderr in the result
+        :type include_stderr: bool
+        :param since: If present, only retrieve logs since this timestamp (non-inclusive).
+        :type since: :class:`datetime.datetime` or None
+        :returns: Generator of the pages of log data, each with at least one hit
+        :rtype: Generator
+        """
+
+        # If job_exe has not started
+        if not self.started or (not include_stdout and not include_stderr):
+            return
+
+        is_version_2 = settings.ELASTICSEARCH_VERSION and settings.ELASTICSEARCH_VERSION.startswith('2.')
+        extension = '.raw' if is_version_2 else '.keyword'
 
         q = {
-                'size': 10000,
+                'size': LOG_PAGE_SIZE,
                 'query': {
                     'bool': {
                         'must': [
@@ -1551,24 +1619,59 @@ class JobExecution(models.Model):
                         ]
                     }
                 },
-                'sort': [{'@timestamp': 'asc'}, {'scale_order_num': 'asc'}],
+                # Stream breaks ties between messages with the same timestamp and order number across pages
+                'sort': [{'@timestamp': 'asc'}, {'scale_order_num': 'asc'}, {'stream'+extension: 'asc'}],
                 '_source': ['@timestamp', 'scale_order_num', 'message', 'stream', 'scale_job_exe']
             }
-        if not include_stdout and not include_stderr:
-            return None, timezone.now()
-        elif include_stdout and not include_stderr:
+        if include_stdout and not include_stderr:
             q['query']['bool']['must'].append({'term': {'stream'+extension: 'stdout'}})
         elif include_stderr and not include_stdout:
             q['query']['bool']['must'].append({'term': {'stream'+extension: 'stderr'}})
         if since is not None:
             q['query']['bool']['must'].append({'range': {'@timestamp': {'gte': since.isoformat()}}})
 
-        hits = settings.ELASTICSEARCH.search(index='logstash-*,scalelogs-*', body=q)
+        if is_version_2:
+            for page in self._scroll_log_pages(q):
+                yield page
+            return
 
-        if hits['hits']['total'] == 0:
-            return None, timezone.now()
-        last_modified = max([util.parse.parse_datetime(h['_source']['@timestamp']) for h in hits['hits']['hits']])
-        return hits, last_modified
+        while True:
+            page = settings.ELASTICSEARCH.search(index=LOG_INDICES, body=q)
+            hits = page['hits']['hits']
+            if not hits:
+                return
+            yield page
+            if len(hits) < LOG_PAGE_SIZE:
+                return
+            q['search_after'] = hits[-1]['sort']
+
+    def get_log_stream(self, include_stdout=True, include_stderr=True, since=None, log_format='txt'):
+        """Gets a generator of log data from elasticsearch, suitable for a streaming response. The first page of log
+        data is retrieved immediately so that an empty log can be detected, and each further page is only retrieved
+        once the previous chunks have been consumed. Clients can follow a running job execution by requesting the log
+        again with since set to the timestamp of the last message they received.
+
+        :param include_stdout: If True, include stdout in the result
+        :type include_stdout: bool
+        :param include_stderr: If True include stderr in the result
+        :type include_stderr: bool
+        :param since: If present, only retrieve logs since this timestamp (non-inclusive).
+        :type since: :class:`datetime.datetime` or None
+        :param log_format: The format of the log data, one of 'json', 'txt' or 'html'
+        :type log_format: string
+        :returns: Generator of the chunks of log data, or None if there is no log data
+        :rtype: Generator
+        """
+
+        pages = self.get_log_pages(include_stdout, include_stderr, since)
+        first_page = next(pages, None)
+        if first_page is None:
+            return None
+        pages = itertools.chain([first_page], pages)
+
+        if log_format == 'json':
+            return self._generate_log_json_chunks(first_page['hits']['total'], pages)
+        return self._generate_log_text_chunks(pages, log_format == 'html')
 
     def get_log_text(self, include_stdout=True, include_stderr=True, since=None, html=False):
         """Get log data from elasticsearch.
@@ -1584,20 +1687,17 @@ class JobExecution(models.Model):
         :rtype: tuple of (str, :class:`datetime.datetime`) with the log or None and last modified timestamp
         """
 
-        hits, last_modified = self.get_log_json(include_stdout, include_stderr, since)
-        if hits is None:
-            return None, last_modified
-        valid_hits = []  # Make sure hits have the required message field
-        for h in hits['hits']['hits']:
-            if 'message' in h['_source']:
-                valid_hits.append(h)
-        if html:
-            d = ''
-            for h in valid_hits:
-                cls = h['_source']['stream']
-                d += '<div class="%s">%s</div>\n' % (cls, django.utils.html.escape(h['_source']['message']))
-            return d, last_modified
-        return '\n'.join(h['_source']['message'] for h in valid_hits), last_modified
+        pages = []
+        last_modified = None
+        for page in self.get_log_pages(include_stdout, include_stderr, since):
+            pages.append(page)
+            last_modified = page['hits']['hits'][-1]['_source']['@timestamp']
+
+        if last_modified is None:
+            return None, timezone.now()
+        # Hits are sorted by timestamp, so the last hit is the most recent
+        last_modified = util.parse.parse_datetime(last_modified)
+        return ''.join(self._generate_log_text_chunks(pages, html)), last_modified
 
     def get_resources(self):
         """Returns the resources allocated to this job execution
@@ -1662,6 +1762,73 @@ class JobExecution(models.Model):
 
         self.cluster_id = '%s_%s_%dx%d' % (JOB_TASK_ID_PREFIX, framework_id, job_id, exe_num)
 
+    def _generate_log_json_chunks(self, total, pages):
+        """Generator that converts the given pages of log data into chunks of a JSON document with the same hits
+        structure as an elasticsearch response
+
+        :param total: The total number of hits reported by elasticsearch
+        :type total: int or dict
+        :param pages: The pages of log data
+        :type pages: Generator
+        :returns: Generator of the chunks of the JSON document
+        :rtype: Generator
+        """
+
+        yield '{"hits": {"total": %s, "hits": [' % json.dumps(total)
+        separator = ''
+        for page in pages:
+            yield separator + ', '.join(json.dumps(h) for h in page['hits']['hits'])
+            separator = ', '
+        yield ']}}'
+
+    def _generate_log_text_chunks(self, pages, html):
+        """Generator that converts the given pages of log data into chunks of log text, one chunk per page
+
+        :param pages: The pages of log data
+        :type pages: Generator
+        :param html: If True, wrap the lines in div elements with stdout/stderr css classes, otherwise use plain text
+        :type html: bool
+        :returns: Generator of the chunks of log text
+        :rtype: Generator
+        """
+
+        separator = ''
+        for page in pages:
+            # Make sure hits have the required message field
+            sources = [h['_source'] for h in page['hits']['hits'] if 'message' in h['_source']]
+            if not sources:
+                continue
+            if html:
+                yield ''.join('<div class="%s">%s</div>\n' % (source['stream'],
+                                                               django.utils.html.escape(source['message']))
+                              for source in sources)
+            else:
+                yield separator + '\n'.join(source['message'] for source in sources)
+                separator = '\n'
+
+    def _scroll_log_pages(self, query):
+        """Generator that retrieves the pages of log data for the given query with an elasticsearch scroll. The scroll
+        is cleared once the generator is finished or closed.
+
+        :param query: The elasticsearch query
+        :type query: dict
+        :returns: Generator of the pages of log data, each with at least one hit
+        :rtype: Generator
+        """
+
+        page = settings.ELASTICSEARCH.search(index=LOG_INDICES, body=query, scroll=LOG_SCROLL_TIMEOUT)
+        scroll_id = page.get('_scroll_id')
+        try:
+            while page['hits']['hits']:
+                yield page
+                if not scroll_id:
+                    return
+                page = settings.ELASTICSEARCH.scroll(scroll_id=scroll_id, scroll=LOG_SCROLL_TIMEOUT)
+                scroll_id = page.get('_scroll_id', scroll_id)
+        finally:
+            if scroll_id:
+                settings.ELASTICSEARCH.clear_scroll(scroll_id=scroll_id)
+
     class Meta(object):
         """Meta information for the database"""
         db_table = 'job_exe'
@@ -3130,7 +3297,7 @@ class JobTypeRevision(models.Model):
 class TaskUpdate(models.Model):
     """Represents a status update received for a task
 
-    :keyword job_exe: The job execution that the task belongs to
+    :keyword job_exe: The job execution that the task belongs to, None for system tasks
     :type job_exe: :class:`django.db.models.ForeignKey`
     :keyword task_id: The task ID
     :type task_id: :class:`django.db.models.CharField`
@@ -3150,7 +3317,7 @@ class TaskUpdate(models.Model):
     :type created: :class:`django.db.models.DateTimeField`
     """
 
-    job_exe = models.ForeignKey('job.JobExecution', on_delete=models.PROTECT)
+    job_exe = models.ForeignKey('job.JobExecution', blank=True, null=True, on_delete=models.PROTECT)
     task_id = models.CharField(max_length=250)
     status = models.CharField(max_length=250)
 
@@ -13,7 +13,8 @@ from batch.test import utils as batch_test_utils
 from data.data.data import Data
 from data.data.json.data_v6 import DataV6
 from ingest.messages.create_ingest_jobs import create_scan_ingest_job_message
-from job.execution.configuration.configurators import QueuedExecutionConfigurator, ScheduledExecutionConfigurator
+from job.execution.configuration.configurators import JobTypeTemplateCache, QueuedExecutionConfigurator, \
+    ScheduledExecutionConfigurator
 from job.configuration.data.job_data import JobData
 from job.execution.configuration.json.exe_config import ExecutionConfiguration
 from job.execution.container import get_job_exe_input_vol_name, get_job_exe_output_vol_name, get_mount_volume_name, \
@@ -1145,3 +1146,28 @@ class TestScheduledExecutionConfigurator(TestCase):
         env_vars = exe_config_with_secrets.get_env_vars('main')
         self.assertTrue('ALLOCATED_SHAREDMEM' in env_vars)
         self.assertEqual(env_vars['ALLOCATED_SHAREDMEM'], '1024.0')
+
+
+class TestJobTypeTemplateCache(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_get_template(self):
+        """Tests that get_template() reuses templates until the job type revision changes or the cache is cleared"""
+
+        job_type = job_test_utils.create_seed_job_type()
+        cache = JobTypeTemplateCache()
+
+        template = cache.get_template(job_type)
+        self.assertEqual(template.shared_mem, 0)
+        self.assertEqual(template.secrets_key, job_type.get_secrets_key())
+        self.assertEqual(template.name_label.value, 'scale-job-type-name=%s' % job_type.name)
+        self.assertIs(cache.get_template(job_type), template)
+
+        job_type.revision_num += 1
+        new_template = cache.get_template(job_type)
+        self.assertIsNot(new_template, template)
+
+        cache.clear()
+        self.assertIsNot(cache.get_template(job_type), new_template)
@@ -109,3 +109,23 @@ class TestPendingJobs(TransactionTestCase):
         # Job 5 should not have been updated since it has previously been queued
         self.assertEqual(jobs[4].status, 'QUEUED')
         self.assertEqual(jobs[4].last_status_change, original_status_change)
+
+    def test_fuse(self):
+        """Tests fusing PendingJobs messages together"""
+
+        status_change = now()
+        message_1 = PendingJobs()
+        message_1.status_change = status_change
+        message_1.add_job(1)
+        message_2 = PendingJobs()
+        message_2.status_change = status_change
+        message_2.add_job(2)
+        message_3 = PendingJobs()
+        message_3.status_change = status_change + datetime.timedelta(minutes=1)
+        message_3.add_job(3)
+
+        self.assertTrue(message_1.can_fuse(message_2))
+        self.assertFalse(message_1.can_fuse(message_3))
+
+        message_1.fuse(message_2)
+        self.assertListEqual(message_1.to_json()['job_ids'], [1, 2])
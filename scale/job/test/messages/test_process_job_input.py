@@ -3,10 +3,11 @@ from __future__ import absolute_import
 
 import django
 from django.test import TransactionTestCase
+from mock import patch
 
 from data.data.json.data_v6 import DataV6
 from data.interface.interface import Interface
-from job.messages.process_job_input import ProcessJobInput
+from job.messages.process_job_input import create_process_job_input_messages, ProcessJobInput
 from job.models import Job, JobInputFile
 from job.test import utils as job_test_utils
 from storage.test import utils as storage_test_utils
@@ -39,6 +40,70 @@ class TestProcessJobInput(TransactionTestCase):
         # Job should have input_file_size set to 0 (no input files)
         self.assertEqual(job.input_file_size, 0.0)
 
+    def test_fuse(self):
+        """Tests creating and fusing ProcessJobInput messages for many jobs"""
+
+        with patch('job.messages.process_job_input.MAX_NUM', 2):
+            messages = create_process_job_input_messages([1, 2, 2, 3])
+            self.assertListEqual([msg.job_ids for msg in messages], [[1, 2], [3]])
+
+            message = ProcessJobInput()
+            message.job_id = 1
+            message_2 = ProcessJobInput()
+            message_2.job_ids = [1, 2]
+            message_3 = ProcessJobInput()
+            message_3.job_id = 3
+
+            self.assertTrue(message.can_fuse(message_2))
+            message.fuse(message_2)
+            self.assertFalse(message.can_fuse(message_3))
+            self.assertListEqual(message.job_ids, [1, 2])
+
+        # Convert fused message to JSON and back
+        new_message = ProcessJobInput.from_json(message.to_json())
+        self.assertListEqual(new_message.job_ids, [1, 2])
+
+    def test_execute_multiple_jobs(self):
+        """Tests calling ProcessJobInput.execute() successfully for a message with many jobs"""
+
+        workspace = storage_test_utils.create_workspace()
+        file_1 = storage_test_utils.create_file(workspace=workspace, file_size=104857600.0)
+        file_2 = storage_test_utils.create_file(workspace=workspace, file_size=987654321.0)
+        manifest = job_test_utils.create_seed_manifest(command='my_command',
+                                                       inputs_files=[{'name': 'Input 1', 'mediaTypes': ['text/plain']}])
+        job_type = job_test_utils.create_seed_job_type(manifest=manifest)
+
+        input_dict_1 = {'version': '1.0', 'input_data': [{'name': 'Input 1', 'file_id': file_1.id}]}
+        input_dict_2 = {'version': '1.0', 'input_data': [{'name': 'Input 1', 'file_id': file_2.id}]}
+        job_1 = job_test_utils.create_job(job_type=job_type, num_exes=0, status='PENDING', input_file_size=None,
+                                          input=input_dict_1)
+        job_2 = job_test_utils.create_job(job_type=job_type, num_exes=0, status='PENDING', input_file_size=None,
+                                          input=input_dict_2)
+        job_3 = job_test_utils.create_job(num_exes=0, status='PENDING', input_file_size=None, input=DataV6().get_dict())
+        job_4 = job_test_utils.create_job(num_exes=1, status='RUNNING', input_file_size=None,
+                                          input=DataV6().get_dict())
+
+        # Create and execute message
+        message = create_process_job_input_messages([job_1.id, job_2.id, job_3.id, job_4.id])[0]
+        result = message.execute()
+        self.assertTrue(result)
+
+        # Check for one queued jobs message for all processed jobs
+        self.assertEqual(len(message.new_messages), 1)
+        self.assertEqual(message.new_messages[0].type, 'queued_jobs')
+        self.assertSetEqual({queued_job.job_id for queued_job in message.new_messages[0]._queued_jobs},
+                            {job_1.id, job_2.id, job_3.id})
+
+        # Check jobs for expected input_file_size and input file models
+        jobs = {job.id: job for job in Job.objects.filter(id__in=[job_1.id, job_2.id, job_3.id, job_4.id])}
+        self.assertEqual(jobs[job_1.id].input_file_size, 100.0)
+        self.assertEqual(jobs[job_2.id].input_file_size, 942.0)
+        self.assertEqual(jobs[job_3.id].input_file_size, 0.0)
+        self.assertIsNone(jobs[job_4.id].input_file_size)
+        job_input_files = JobInputFile.objects.filter(job_id__in=[job_1.id, job_2.id])
+        self.assertSetEqual({(jif.job_id, jif.input_file_id) for jif in job_input_files},
+                            {(job_1.id, file_1.id), (job_2.id, file_2.id)})
+
     def test_execute_with_data(self):
         """Tests calling ProcessJobInput.execute() successfully when the job already has data populated"""
 
@@ -9,6 +9,7 @@ import time
 import django
 import django.utils.timezone as timezone
 from django.test import TestCase, TransactionTestCase
+from mock import patch
 
 import error.test.utils as error_test_utils
 import job.test.utils as job_test_utils
@@ -273,6 +274,109 @@ class TestJob(TestCase):
         self.assertIsInstance(job.get_job_results(), SeedJobResults)
 
 
+class FakeElasticsearch(object):
+    """Fake Elasticsearch client that pages through a list of log messages with search_after or a scroll"""
+
+    def __init__(self, messages):
+        self.hits = []
+        for i, (stream, message) in enumerate(messages):
+            timestamp = '2016-01-01T00:00:%02d.000Z' % i
+            source = {'@timestamp': timestamp, 'scale_order_num': i, 'stream': stream, 'message': message}
+            self.hits.append({'_source': source, 'sort': [timestamp, i, stream]})
+        self.cleared_scroll_ids = []
+        self.queries = []
+        self._scrolls = {}
+
+    def clear_scroll(self, scroll_id):
+        self.cleared_scroll_ids.append(scroll_id)
+
+    def scroll(self, scroll_id, scroll):
+        hits, position, size = self._scrolls[scroll_id]
+        self._scrolls[scroll_id] = (hits, position + size, size)
+        return {'_scroll_id': scroll_id, 'hits': {'total': len(hits), 'hits': hits[position + size:position + size * 2]}}
+
+    def search(self, index, body, scroll=None):
+        self.queries.append(copy.deepcopy(body))
+        hits = self.hits
+        for condition in body['query']['bool']['must']:
+            for field, value in condition.get('term', {}).items():
+                if field.startswith('stream'):
+                    hits = [h for h in hits if h['_source']['stream'] == value]
+        response = {'hits': {'total': len(hits), 'hits': []}}
+        if scroll:
+            scroll_id = 'scroll_%d' % len(self._scrolls)
+            self._scrolls[scroll_id] = (hits, 0, body['size'])
+            response['_scroll_id'] = scroll_id
+        if 'search_after' in body:
+            hits = [h for h in hits if h['sort'] > body['search_after']]
+        response['hits']['hits'] = hits[:body['size']]
+        return response
+
+
+class TestJobExecution(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.job_exe = job_test_utils.create_job_exe(started=timezone.now())
+        self.es = FakeElasticsearch([('stdout', 'line 1'), ('stderr', 'line <2>'), ('stdout', 'line 3'),
+                                     ('stdout', 'line 4'), ('stderr', 'line 5')])
+
+    @patch('job.models.LOG_PAGE_SIZE', 2)
+    def test_get_log_pages(self):
+        """Tests retrieving the log in pages with search_after"""
+
+        with self.settings(ELASTICSEARCH=self.es, ELASTICSEARCH_VERSION='6.8.0'):
+            pages = list(self.job_exe.get_log_pages())
+
+        self.assertListEqual([len(page['hits']['hits']) for page in pages], [2, 2, 1])
+        messages = [h['_source']['message'] for page in pages for h in page['hits']['hits']]
+        self.assertListEqual(messages, ['line 1', 'line <2>', 'line 3', 'line 4', 'line 5'])
+        self.assertNotIn('search_after', self.es.queries[0])
+        self.assertListEqual(self.es.queries[2]['search_after'], self.es.hits[3]['sort'])
+
+    @patch('job.models.LOG_PAGE_SIZE', 2)
+    def test_get_log_pages_scroll(self):
+        """Tests retrieving the log in pages with a scroll for Elasticsearch 2.x"""
+
+        since = timezone.now()
+        with self.settings(ELASTICSEARCH=self.es, ELASTICSEARCH_VERSION='2.4.0'):
+            pages = list(self.job_exe.get_log_pages(since=since))
+
+        messages = [h['_source']['message'] for page in pages for h in page['hits']['hits']]
+        self.assertListEqual(messages, ['line 1', 'line <2>', 'line 3', 'line 4', 'line 5'])
+        self.assertListEqual(self.es.queries[0]['query']['bool']['must'],
+                             [{'term': {'scale_job_exe.raw': self.job_exe.get_cluster_id()}},
+                              {'range': {'@timestamp': {'gte': since.isoformat()}}}])
+        self.assertListEqual(self.es.cleared_scroll_ids, ['scroll_0'])
+
+    @patch('job.models.LOG_PAGE_SIZE', 2)
+    def test_get_log_stream(self):
+        """Tests streaming the log one page at a time"""
+
+        with self.settings(ELASTICSEARCH=self.es, ELASTICSEARCH_VERSION='6.8.0'):
+            chunks = self.job_exe.get_log_stream(log_format='txt')
+            self.assertEqual(len(self.es.queries), 1)  # Only the first page is retrieved before streaming
+            self.assertListEqual(list(chunks), ['line 1\nline <2>', '\nline 3\nline 4', '\nline 5'])
+
+            html = ''.join(self.job_exe.get_log_stream(include_stdout=False, log_format='html'))
+            json_dict = json.loads(''.join(self.job_exe.get_log_stream(log_format='json')))
+            text, _last_modified = self.job_exe.get_log_text()
+
+        self.assertIn({'term': {'stream.keyword': 'stderr'}}, self.es.queries[4]['query']['bool']['must'])
+        self.assertTrue(html.startswith('<div class="stderr">line &lt;2&gt;</div>\n'))
+        self.assertEqual(len(json_dict['hits']['hits']), 5)
+        self.assertEqual(json_dict['hits']['total'], 5)
+        self.assertEqual(text, 'line 1\nline <2>\nline 3\nline 4\nline 5')
+
+    def test_get_log_stream_empty(self):
+        """Tests streaming a log with no messages"""
+
+        with self.settings(ELASTICSEARCH=FakeElasticsearch([]), ELASTICSEARCH_VERSION='6.8.0'):
+            self.assertIsNone(self.job_exe.get_log_stream(log_format='txt'))
+            self.assertIsNone(self.job_exe.get_log_json()[0])
+
+
 class TestJobType(TransactionTestCase):
 
     def setUp(self):
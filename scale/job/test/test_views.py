@@ -2363,63 +2363,74 @@ class TestJobExecutionSpecificLogViewV6(APITestCase):
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_json_no_time(self, mock_get_logs):
-        def new_get_log_json(include_stdout, include_stderr, since):
+        def new_get_log_stream(include_stdout, include_stderr, since, log_format):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
-            return {}, now()
+            self.assertEqual(log_format, 'json')
+            return iter(['{"hits": ', '{}}'])
 
-        mock_get_logs.return_value.get_log_json.side_effect = new_get_log_json
+        mock_get_logs.return_value.get_log_stream.side_effect = new_get_log_stream
 
         url = '/%s/job-executions/999999/logs/combined/?format=json' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('application/json'))
+        self.assertEqual(b''.join(response.streaming_content), b'{"hits": {}}')
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_text_no_time(self, mock_get_logs):
-        def new_get_log_text(include_stdout, include_stderr, since, html):
+        def new_get_log_stream(include_stdout, include_stderr, since, log_format):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
-            self.assertFalse(html)
-            return 'hello', now()
+            self.assertEqual(log_format, 'txt')
+            return iter(['hello', '\nworld'])
 
-        mock_get_logs.return_value.get_log_text.side_effect = new_get_log_text
+        mock_get_logs.return_value.get_log_stream.side_effect = new_get_log_stream
 
         url = '/%s/job-executions/999999/logs/combined/?format=txt' % self.api
-        response = self.client.get(url)
+        response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'text/plain')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertEqual(b''.join(response.streaming_content), b'hello\nworld')
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_html_no_time(self, mock_get_logs):
-        def new_get_log_text(include_stdout, include_stderr, since, html):
+        def new_get_log_stream(include_stdout, include_stderr, since, log_format):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
-            self.assertTrue(html)
-            return '<html>hello</html>', now()
+            self.assertEqual(log_format, 'html')
+            return iter(['<div class="stdout">hello</div>'])
 
-        mock_get_logs.return_value.get_log_text.side_effect = new_get_log_text
+        mock_get_logs.return_value.get_log_stream.side_effect = new_get_log_stream
 
         url = '/%s/job-executions/999999/logs/combined/?format=html' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.startswith(b'<html>'))
+        self.assertIn(b'<div class="stdout">hello</div>', content)
+        self.assertTrue(content.endswith(b'</html>'))
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_json_no_content(self, mock_get_logs):
-        def new_get_log_json(include_stdout, include_stderr, since):
+        def new_get_log_stream(include_stdout, include_stderr, since, log_format):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
-            return None, now()
+            self.assertEqual(log_format, 'json')
+            return None
 
-        mock_get_logs.return_value.get_log_json.side_effect = new_get_log_json
+        mock_get_logs.return_value.get_log_stream.side_effect = new_get_log_stream
 
         url = '/%s/job-executions/999999/logs/combined/?format=json' % self.api
         response = self.client.generic('GET', url)
@@ -2428,55 +2439,68 @@ class TestJobExecutionSpecificLogViewV6(APITestCase):
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_stdout_log_html_no_time(self, mock_get_logs):
-        def new_get_log_text(include_stdout, include_stderr, since, html):
+        def new_get_log_stream(include_stdout, include_stderr, since, log_format):
             self.assertTrue(include_stdout)
             self.assertFalse(include_stderr)
             self.assertIsNone(since)
-            self.assertTrue(html)
-            return '<html>hello</html>', now()
+            self.assertEqual(log_format, 'html')
+            return iter(['<div class="stdout">hello</div>'])
 
-        mock_get_logs.return_value.get_log_text.side_effect = new_get_log_text
+        mock_get_logs.return_value.get_log_stream.side_effect = new_get_log_stream
 
         url = '/%s/job-executions/999999/logs/stdout/?format=html' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.startswith(b'<html>'))
+        self.assertIn(b'<div class="stdout">hello</div>', content)
+        self.assertTrue(content.endswith(b'</html>'))
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_stderr_log_html_no_time(self, mock_get_logs):
-        def new_get_log_text(include_stdout, include_stderr, since, html):
+        def new_get_log_stream(include_stdout, include_stderr, since, log_format):
             self.assertFalse(include_stdout)
             self.assertTrue(include_stderr)
             self.assertIsNone(since)
-            self.assertTrue(html)
-            return '<html>hello</html>', now()
+            self.assertEqual(log_format, 'html')
+            return iter(['<div class="stderr">hello</div>'])
 
-        mock_get_logs.return_value.get_log_text.side_effect = new_get_log_text
+        mock_get_logs.return_value.get_log_stream.side_effect = new_get_log_stream
 
         url = '/%s/job-executions/999999/logs/stderr/?format=html' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.startswith(b'<html>'))
+        self.assertIn(b'<div class="stderr">hello</div>', content)
+        self.assertTrue(content.endswith(b'</html>'))
 
     @patch('job.views.JobExecution.objects.get_logs')
     def test_combined_log_json_with_time(self, mock_get_logs):
         started = datetime.datetime(2016, 1, 1, tzinfo=utc)
 
-        def new_get_log_json(include_stdout, include_stderr, since):
+        def new_get_log_stream(include_stdout, include_stderr, since, log_format):
             self.assertTrue(include_stdout)
             self.assertTrue(include_stderr)
             self.assertEqual(since, started)
-            return {}, now()
+            self.assertEqual(log_format, 'json')
+            return iter(['{"hits": ', '{}}'])
 
-        mock_get_logs.return_value.get_log_json.side_effect = new_get_log_json
+        mock_get_logs.return_value.get_log_stream.side_effect = new_get_log_stream
 
         url = '/%s/job-executions/999999/logs/combined/?started=2016-01-01T00:00:00Z&format=json' % self.api
         response = self.client.generic('GET', url)
 
-        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
-        self.assertEqual(response.accepted_media_type, 'application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('application/json'))
+        self.assertEqual(b''.join(response.streaming_content), b'{"hits": {}}')
 
 
 class TestJobInputFilesViewV6(APITestCase):
@@ -1,11 +1,12 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import itertools
 import logging
 
 import rest_framework.status as status
 from django.db import transaction
-from django.http.response import Http404, HttpResponse
+from django.http.response import Http404, HttpResponse, StreamingHttpResponse
 from job.seed.exceptions import InvalidSeedManifestDefinition
 from job.seed.manifest import SeedManifest
 from rest_framework.generics import GenericAPIView, ListAPIView, ListCreateAPIView, RetrieveAPIView
@@ -947,7 +948,7 @@ class JobExecutionSpecificLogView(RetrieveAPIView):
         :type job_exe_id: int
         :param log_id: the log name to get (stdout, stderr, or combined)
         :type log_id: str
-        :rtype: :class:`rest_framework.response.Response`
+        :rtype: :class:`django.http.StreamingHttpResponse`
         :returns: the HTTP response to send back to the user
         """
 
@@ -964,20 +965,16 @@ class JobExecutionSpecificLogView(RetrieveAPIView):
 
         started = rest_util.parse_timestamp(request, 'started', required=False)
 
-        if request.accepted_renderer.format == 'json':
-            logs, last_modified = job_exe.get_log_json(include_stdout, include_stderr, started)
-        elif request.accepted_renderer.format == 'txt':
-            logs, last_modified = job_exe.get_log_text(include_stdout, include_stderr, started, False)
-        elif request.accepted_renderer.format == 'html':
-            logs, last_modified = job_exe.get_log_text(include_stdout, include_stderr, started, True)
-            if logs is not None:
-                logs = '<html><head><style>.stdout {} .stderr {color: red;}</style></head><body>' + logs + '</body></html>'
-        else:
+        log_format = request.accepted_renderer.format
+        if log_format not in ('json', 'txt', 'html'):
             return HttpResponse('%s is not a valid content type request.' % request.accepted_renderer.content_type,
                                 content_type='text/plain', status=406)
 
+        # Stream the log one page at a time so that large logs are neither truncated nor held in memory
+        logs = job_exe.get_log_stream(include_stdout, include_stderr, started, log_format)
         if logs is None:
-            rsp = HttpResponse(status=204)
-        else:
-            rsp = Response(data=logs)
-        return rsp
+            return HttpResponse(status=204)
+        if log_format == 'html':
+            logs = itertools.chain(['<html><head><style>.stdout {} .stderr {color: red;}</style></head><body>'], logs,
+                                   ['</body></html>'])
+        return StreamingHttpResponse(logs, content_type=request.accepted_renderer.media_type)
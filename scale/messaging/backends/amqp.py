@@ -6,7 +6,8 @@ from __future__ import unicode_literals
 
 import Queue
 import logging
-from contextlib import closing
+import threading
+from functools import partial
 
 from kombu import Connection
 
@@ -16,7 +17,13 @@ logger = logging.getLogger(__name__)
 
 
 class AMQPMessagingBackend(MessagingBackend):
-    """Backend supporting message passing via AMQP 0.9.1 broker, targeting RabbitMQ"""
+    """Backend supporting message passing via AMQP 0.9.1 broker, targeting RabbitMQ
+
+    A single broker connection is held open for the life of the process and shared by send_messages and get_queue_size
+    calls. Each thread that receives messages uses its own connection (see :class:`AMQPConsumer`), so that threads
+    waiting for messages never block each other or the sending of messages. Connections are re-established
+    automatically when the broker drops them or a heartbeat is missed.
+    """
 
     def __init__(self):
         super(AMQPMessagingBackend, self).__init__('amqp')
@@ -24,35 +31,360 @@ class AMQPMessagingBackend(MessagingBackend):
         # Message retrieval timeout
         self._timeout = 1
 
+        # Heartbeat interval (in seconds) negotiated with the broker for the persistent connections
+        self._heartbeat = 60
+
+        # Number of times to retry establishing a connection before giving up
+        self._max_retries = 3
+
+        self._connection = None
+        self._simple_queue = None  # Only used to send messages and check the queue size, never consumes
+        self._consumers = {}  # {Thread ID: AMQPConsumer}
+
+        # kombu connections are not thread-safe, so operations on the shared connection are serialized
+        self._lock = threading.RLock()
+
     def send_messages(self, messages):
         """See :meth:`messaging.backends.backend.MessagingBackend.send_messages`"""
-        with Connection(self._broker_url) as connection:
-            with closing(connection.SimpleQueue(self._queue_name)) as simple_queue:
+
+        with self._lock:
+            num_sent = 0
+            try:
                 for message in messages:
-                    logger.debug('Sending message of type: %s', message['type'])
-                    simple_queue.put(message)
+                    self._put_message(message)
+                    num_sent += 1
+            except self._get_recoverable_errors():
+                logger.exception('Lost connection to broker after sending %i of %i messages, reconnecting', num_sent,
+                                 len(messages))
+                self._reset_connection()
+                # Only the messages that were not sent are sent again
+                for message in messages[num_sent:]:
+                    self._put_message(message)
 
     def receive_messages(self, batch_size):
         """See :meth:`messaging.backends.backend.MessagingBackend.receive_messages`"""
-        with Connection(self._broker_url) as connection:
-            with closing(connection.SimpleQueue(self._queue_name)) as simple_queue:
-                for _ in range(batch_size):
-                    try:
-                        message = simple_queue.get(timeout=self._timeout)
-
-                        # Accept success back via generator send
-                        success = yield message.payload
-                        if success:
-                            message.ack()
-                    except Queue.Empty:
-                        # We've reached the end of the queue... exit loop
-                        break
+
+        return self._get_consumer().receive_messages(batch_size)
+
+    def receive_unacknowledged_messages(self, batch_size):
+        """See :meth:`messaging.backends.backend.MessagingBackend.receive_unacknowledged_messages`"""
+
+        return self._get_consumer().receive_unacknowledged_messages(batch_size)
 
     def get_queue_size(self):
         """See :meth:`messaging.backends.backend.MessagingBackend.get_queue_size`"""
 
-        queue_size = 0
-        with Connection(self._broker_url) as connection:
-            with closing(connection.SimpleQueue(self._queue_name)) as simple_queue:
-                queue_size = simple_queue.qsize()
-        return queue_size
+        with self._lock:
+            try:
+                return self._get_simple_queue().qsize()
+            except self._get_recoverable_errors():
+                logger.exception('Lost connection to broker while retrieving queue size, reconnecting')
+                self._reset_connection()
+                return self._get_simple_queue().qsize()
+
+    def close(self):
+        """See :meth:`messaging.backends.backend.MessagingBackend.close`
+
+        The threads that received messages must have stopped before the backend is closed.
+        """
+
+        with self._lock:
+            consumers = self._consumers.values()
+            self._consumers = {}
+            self._reset_connection()
+
+        for consumer in consumers:
+            consumer.close()
+
+    def _get_connection(self):
+        """Returns the shared broker connection, establishing it if it is not already open. The caller must hold the
+        backend lock.
+
+        :return: The broker connection
+        :rtype: :class:`kombu.Connection`
+        """
+
+        if self._connection is None:
+            self._connection = Connection(self._broker_url, heartbeat=self._heartbeat)
+
+        self._connection.ensure_connection(max_retries=self._max_retries)
+        self._connection.heartbeat_check()
+        return self._connection
+
+    def _get_consumer(self):
+        """Returns the consumer of the calling thread, creating it on first use
+
+        :return: The consumer of the calling thread
+        :rtype: :class:`messaging.backends.amqp.AMQPConsumer`
+        """
+
+        thread_id = threading.current_thread().ident
+        with self._lock:
+            if thread_id not in self._consumers:
+                self._consumers[thread_id] = AMQPConsumer(self._broker_url, self._queue_name, self._heartbeat,
+                                                          self._max_retries, self._timeout)
+            return self._consumers[thread_id]
+
+    def _get_recoverable_errors(self):
+        """Returns the tuple of exception types that indicate the shared connection must be re-established
+
+        :return: The connection and channel exception types of the broker transport
+        :rtype: tuple
+        """
+
+        if self._connection is None:
+            return ()
+        return self._connection.recoverable_connection_errors + self._connection.recoverable_channel_errors
+
+    def _get_simple_queue(self):
+        """Returns the persistent queue used for sending messages, establishing the shared broker connection if it is
+        not already open. The caller must hold the backend lock.
+
+        :return: The queue for the configured queue name
+        :rtype: :class:`kombu.simple.SimpleQueue`
+        """
+
+        connection = self._get_connection()
+        if self._simple_queue is None:
+            self._simple_queue = connection.SimpleQueue(self._queue_name)
+        return self._simple_queue
+
+    def _put_message(self, message):
+        """Places the given message on the persistent queue. The caller must hold the backend lock.
+
+        :param message: JSON payload of the message
+        :type message: dict
+        """
+
+        logger.debug('Sending message of type: %s', message['type'])
+        self._get_simple_queue().put(message)
+
+    def _reset_connection(self):
+        """Discards the shared connection so that it is re-established on next use"""
+
+        with self._lock:
+            connection = self._connection
+            self._connection = None
+            self._simple_queue = None
+
+            if connection is not None:
+                try:
+                    connection.release()
+                except Exception:
+                    logger.exception('Error releasing broker connection')
+
+
+class AMQPConsumer(object):
+    """Receives messages for a single thread over its own broker connection. Each batch of messages is received on its
+    own channel with a prefetch limit of the batch size, and the channel is closed once the batch is finished, so that
+    the broker only delivers a batch at a time and returns any message that was not acknowledged to the queue. An
+    instance must only be used by the thread that created it, so it needs no locking.
+    """
+
+    def __init__(self, broker_url, queue_name, heartbeat, max_retries, timeout):
+        """Constructor
+
+        :param broker_url: The URL of the broker
+        :type broker_url: string
+        :param queue_name: The name of the queue to receive messages from
+        :type queue_name: string
+        :param heartbeat: Heartbeat interval (in seconds) negotiated with the broker for the connection
+        :type heartbeat: int
+        :param max_retries: Number of times to retry establishing the connection before giving up
+        :type max_retries: int
+        :param timeout: Message retrieval timeout (in seconds)
+        :type timeout: int
+        """
+
+        self._broker_url = broker_url
+        self._queue_name = queue_name
+        self._heartbeat = heartbeat
+        self._max_retries = max_retries
+        self._timeout = timeout
+
+        self._connection = None
+        self._window = None  # The last unacknowledged window: [Receive queue, Number of open messages]
+
+    def close(self):
+        """Releases the connection, which returns any unacknowledged messages to the queue"""
+
+        self._reset_connection()
+
+    def receive_messages(self, batch_size):
+        """See :meth:`messaging.backends.backend.MessagingBackend.receive_messages`"""
+
+        receive_queue = self._open_receive_queue(batch_size)
+        if receive_queue is None:
+            return
+
+        try:
+            for _ in range(batch_size):
+                message = self._get_message(receive_queue)
+                if message is None:
+                    break
+
+                # Accept success back via generator send
+                success = yield message.payload
+                if success:
+                    message.ack()
+                else:
+                    message.requeue()
+        finally:
+            self._close_receive_queue(receive_queue)
+
+    def receive_unacknowledged_messages(self, batch_size):
+        """See :meth:`messaging.backends.backend.MessagingBackend.receive_unacknowledged_messages`"""
+
+        # Messages of the previous window that were never acknowledged are returned to the queue
+        if self._window:
+            self._close_window()
+        receive_queue = self._open_receive_queue(batch_size)
+        if receive_queue is None:
+            return []
+
+        messages = []
+        for _ in range(batch_size):
+            message = self._get_message(receive_queue)
+            if message is None:
+                break
+            messages.append(message)
+
+        if not messages:
+            self._close_receive_queue(receive_queue)
+            return []
+        try:
+            # No more messages are delivered to this window while it is processed
+            receive_queue.consumer.cancel()
+        except self._get_recoverable_errors():
+            logger.exception('Lost connection to broker while receiving messages')
+        window = [receive_queue, len(messages)]
+        self._window = window
+        return [(message.payload, partial(self._acknowledge, window, message),
+                 partial(self._acknowledge, window, message, requeue=True)) for message in messages]
+
+    def _acknowledge(self, window, message, requeue=False):
+        """Acknowledges or requeues the given message received in an unacknowledged window, closing the window's
+        channel once all of its messages are acknowledged or requeued. Messages of a window that was dropped with a
+        lost connection are skipped, since the broker has already returned them to the queue.
+
+        :param window: The receive queue of the window and its number of open messages
+        :type window: list
+        :param message: The received message
+        :type message: :class:`kombu.message.Message`
+        :param requeue: Whether to return the message to the queue instead of acknowledging it
+        :type requeue: bool
+        """
+
+        if window[0] is None:
+            logger.warning('Connection to broker was lost, message will be delivered again')
+            return
+
+        window[1] -= 1
+        try:
+            if requeue:
+                message.requeue()
+            else:
+                message.ack()
+        finally:
+            if not window[1]:
+                self._close_window()
+
+    def _close_receive_queue(self, receive_queue):
+        """Closes the given receive queue and its channel, which returns any of its unacknowledged messages to the queue
+
+        :param receive_queue: The receive queue
+        :type receive_queue: :class:`kombu.simple.SimpleQueue`
+        """
+
+        try:
+            receive_queue.close()
+            receive_queue.channel.close()
+        except Exception:
+            logger.exception('Error closing broker channel')
+
+    def _close_window(self):
+        """Closes the receive queue of the current unacknowledged window"""
+
+        self._close_receive_queue(self._window[0])
+        self._window = None
+
+    def _get_connection(self):
+        """Returns the connection of this consumer, establishing it if it is not already open
+
+        :return: The broker connection
+        :rtype: :class:`kombu.Connection`
+        """
+
+        if self._connection is None:
+            self._connection = Connection(self._broker_url, heartbeat=self._heartbeat)
+
+        self._connection.ensure_connection(max_retries=self._max_retries)
+        self._connection.heartbeat_check()
+        return self._connection
+
+    def _get_message(self, receive_queue):
+        """Gets the next message from the given receive queue
+
+        :param receive_queue: The receive queue
+        :type receive_queue: :class:`kombu.simple.SimpleQueue`
+        :return: The message, or None if the queue is empty or the connection was lost
+        :rtype: :class:`kombu.message.Message`
+        """
+
+        try:
+            return receive_queue.get(timeout=self._timeout)
+        except Queue.Empty:
+            # We've reached the end of the queue
+            return None
+        except self._get_recoverable_errors():
+            logger.exception('Lost connection to broker while receiving messages')
+            self._reset_connection()
+            return None
+
+    def _get_recoverable_errors(self):
+        """Returns the tuple of exception types that indicate the connection must be re-established
+
+        :return: The connection and channel exception types of the broker transport
+        :rtype: tuple
+        """
+
+        if self._connection is None:
+            return ()
+        return self._connection.recoverable_connection_errors + self._connection.recoverable_channel_errors
+
+    def _open_receive_queue(self, batch_size):
+        """Opens a queue on a new channel for receiving a batch of messages, limiting the broker to delivering the
+        given number of unacknowledged messages
+
+        :param batch_size: The maximum number of messages in the batch
+        :type batch_size: int
+        :return: The receive queue, or None if the connection was lost
+        :rtype: :class:`kombu.simple.SimpleQueue`
+        """
+
+        try:
+            connection = self._get_connection()
+            channel = connection.channel()
+            channel.basic_qos(0, batch_size, False)
+            return connection.SimpleQueue(self._queue_name, channel=channel)
+        except self._get_recoverable_errors():
+            logger.exception('Lost connection to broker while receiving messages')
+            self._reset_connection()
+            return None
+
+    def _reset_connection(self):
+        """Discards the connection so that it is re-established on next use. The messages of the current window are
+        returned to the queue by the broker, so the window is dropped and its messages are no longer acknowledged.
+        """
+
+        if self._window:
+            self._window[0] = None
+            self._window = None
+
+        connection = self._connection
+        self._connection = None
+        if connection is not None:
+            try:
+                connection.release()
+            except Exception:
+                logger.exception('Error releasing broker connection')
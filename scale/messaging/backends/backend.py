@@ -26,7 +26,7 @@ class MessagingBackend(object):
     def send_messages(self, messages):
         """Send a collection of messages to the backend
         
-        Connections are not persisted across send_messages calls. It is recommended that if a large
+        Backends may not persist connections across send_messages calls. It is recommended that if a large
         number of messages are to be sent it be done directly in a single function call.
 
         :param messages: JSON payload of messages
@@ -37,7 +37,7 @@ class MessagingBackend(object):
     def receive_messages(self, batch_size):
         """Receive a batch of messages from the backend
 
-        Connections are not persisted across receive_messages calls. It is recommended that if a large
+        Backends may not persist connections across receive_messages calls. It is recommended that if a large
         number of messages are to be retrieved it be done directly in a single function call.
 
         Implementing function must yield messages from backend. Messages must be
@@ -50,6 +50,28 @@ class MessagingBackend(object):
         :rtype: Generator[dict]
         """
 
+    @abstractmethod
+    def receive_unacknowledged_messages(self, batch_size):
+        """Receive a batch of messages from the backend without acknowledging them, so that the caller may decide
+        when each message is acknowledged / deleted. This allows a window of messages to be processed together.
+        Messages that fail should be requeued so they are delivered again, messages that are neither acknowledged nor
+        requeued remain unavailable until the backend returns them to the queue. Backends may receive fewer messages
+        than the batch size, for example to process them before they would be redelivered.
+
+        :param batch_size: Maximum number of messages to be received
+        :type batch_size: int
+        :return: List of tuples, each containing a message in dict form, a function (taking no arguments) that
+            acknowledges the message and a function (taking no arguments) that returns the message to the queue
+        :rtype: [(dict, func, func)]
+        """
+
+    def close(self):
+        """Releases any connection held by the backend, completing any pending acknowledgements first. The backend
+        reconnects if it is used again. The default implementation does nothing.
+        """
+
+        pass
+
     @abstractmethod
     def get_queue_size(self):
         """Gets the current length of the queue
@@ -6,7 +6,9 @@ from __future__ import unicode_literals
 
 import json
 import logging
+import threading
 import uuid
+from functools import partial
 
 from messaging.backends.backend import MessagingBackend
 from util.aws import AWSCredentials, SQSClient
@@ -15,7 +17,12 @@ logger = logging.getLogger(__name__)
 
 
 class SQSMessagingBackend(MessagingBackend):
-    """Backend supporting message passing via Amazon SQS"""
+    """Backend supporting message passing via Amazon SQS
+
+    A single SQS client is reused until the backend is closed. Successfully processed messages are deleted in batches
+    at the end of each batch of messages, before the next window of unacknowledged messages and when the backend is
+    closed.
+    """
 
     def __init__(self):
         super(SQSMessagingBackend, self).__init__('sqs')
@@ -25,27 +32,122 @@ class SQSMessagingBackend(MessagingBackend):
         self._credentials = AWSCredentials(self._broker.get_user_name(),
                                            self._broker.get_password())
 
+        self._client = None
+        self._client_lock = threading.RLock()
+
+        self._pending_deletes = []  # Receipt handles of processed messages that still need to be deleted
+        self._pending_deletes_lock = threading.Lock()
+
     def send_messages(self, messages):
         """See:meth:`messaging.backends.backend.MessagingBackend.send_messages`"""
-        with SQSClient(self._credentials, self._region_name) as client:
-            encoded_messages = []
-            for message in messages:
-                encoded_messages.append({'Id': str(uuid.uuid4()), 'MessageBody': json.dumps(message)})
 
-            client.send_messages(self._queue_name, encoded_messages)
+        encoded_messages = []
+        for message in messages:
+            encoded_messages.append({'Id': str(uuid.uuid4()), 'MessageBody': json.dumps(message)})
+
+        # SQS resources are not thread-safe, so sends are serialized
+        with self._client_lock:
+            self._get_client().send_messages(self._queue_name, encoded_messages)
 
     def receive_messages(self, batch_size):
         """See :meth:`messaging.backends.backend.MessagingBackend.receive_messages`"""
 
-        with SQSClient(self._credentials, self._region_name) as client:
-            for message in client.receive_messages(self._queue_name, batch_size=batch_size):
+        try:
+            for message in self._receive_batch(batch_size):
                 # Accept success back via generator send
-                success = yield json.loads(message.body)
+                success = yield json.loads(message['Body'])
                 if success:
-                    message.delete()
-                    
+                    self._acknowledge(message['ReceiptHandle'])
+        finally:
+            self._flush_deletes()
+
+    def receive_unacknowledged_messages(self, batch_size):
+        """See :meth:`messaging.backends.backend.MessagingBackend.receive_unacknowledged_messages`"""
+
+        # Messages acknowledged since the previous window are deleted before receiving more
+        self._flush_deletes()
+
+        # The visibility timeout of every message starts when it is received, so the window is limited to a single
+        # receive request, the same size as a batch processed by receive_messages()
+        batch_size = min(batch_size, 10)
+
+        return [(json.loads(message['Body']), partial(self._acknowledge, message['ReceiptHandle']),
+                 partial(self._requeue, message['ReceiptHandle'])) for message in self._receive_batch(batch_size)]
+
     def get_queue_size(self):
         """See :meth:`messaging.backends.backend.MessagingBackend.get_queue_size`"""
 
-        with SQSClient(self._credentials, self._region_name) as client:
-            return client.get_queue_size(queue_name=self._queue_name)
+        with self._client_lock:
+            return self._get_client().get_queue_size(queue_name=self._queue_name)
+
+    def close(self):
+        """See :meth:`messaging.backends.backend.MessagingBackend.close`"""
+
+        self._flush_deletes()
+
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def _acknowledge(self, receipt_handle):
+        """Marks the message with the given receipt handle for deletion, deleting pending messages once a full batch
+        has accumulated
+
+        :param receipt_handle: The receipt handle of the processed message
+        :type receipt_handle: string
+        """
+
+        with self._pending_deletes_lock:
+            self._pending_deletes.append(receipt_handle)
+            is_full_batch = len(self._pending_deletes) >= 10
+
+        if is_full_batch:
+            self._flush_deletes()
+
+    def _flush_deletes(self):
+        """Deletes all processed messages that are pending deletion"""
+
+        with self._pending_deletes_lock:
+            receipt_handles = self._pending_deletes
+            self._pending_deletes = []
+
+        if receipt_handles:
+            try:
+                self._get_client().delete_message_batch(self._queue_name, receipt_handles)
+            except Exception:
+                logger.exception('Failed to delete %i processed message(s), they will be delivered again',
+                                 len(receipt_handles))
+
+    def _get_client(self):
+        """Returns the SQS client, creating it on first use
+
+        :return: The SQS client
+        :rtype: :class:`util.aws.SQSClient`
+        """
+
+        with self._client_lock:
+            if self._client is None:
+                self._client = SQSClient(self._credentials, self._region_name).open()
+            return self._client
+
+    def _requeue(self, receipt_handle):
+        """Makes the message with the given receipt handle visible on the queue again so it is delivered again
+        immediately
+
+        :param receipt_handle: The receipt handle of the failed message
+        :type receipt_handle: string
+        """
+
+        self._get_client().change_message_visibility(self._queue_name, receipt_handle, 0)
+
+    def _receive_batch(self, batch_size):
+        """Receives the next batch of messages
+
+        :param batch_size: Maximum number of messages to receive
+        :type batch_size: int
+        :return: The received messages
+        :rtype: [dict]
+        """
+
+        return self._get_client().receive_message_batch(self._queue_name, batch_size=batch_size)
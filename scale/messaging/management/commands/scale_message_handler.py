@@ -6,21 +6,34 @@ from __future__ import unicode_literals
 
 import logging
 import signal
+import threading
+import time
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
 
 from error.models import Error
-from messaging.manager import CommandMessageManager
+from messaging.manager import CommandMessageManager, fusion_metrics
+from recipe.definition.cache import recipe_definition_cache
 
 logger = logging.getLogger(__name__)
 
 
+# How often (in seconds) the worker throughput, message fusion and recipe definition cache counters are logged
+THROUGHPUT_LOG_PERIOD = 60
+
+
 class Command(BaseCommand):
     """Command for retrieval and execution of CommandMessages from queue
     """
 
     help = 'Command for retrieval and execution of CommandMessages from queue'
 
+    def add_arguments(self, parser):
+        parser.add_argument('-w', '--workers', action='store', type=int,
+                            help='Number of workers executing messages concurrently.')
+
     def handle(self, *args, **options):
         """See :meth:`django.core.management.base.BaseCommand.handle`.
 
@@ -31,19 +44,34 @@ class Command(BaseCommand):
 
         self.running = True
 
+        num_workers = options.get('workers')
+        if not num_workers:
+            num_workers = settings.MESSAGE_HANDLER_WORKERS
+
         logger.info('Initializing message handler')
         logger.info('Caching builtin errors...')
         Error.objects.cache_builtin_errors()
         logger.info('Initialization complete, ready to process messages')
-        
+
         # Set the signal handler
         signal.signal(signal.SIGINT, self.interupt)
         signal.signal(signal.SIGTERM, self.interupt)
 
         manager = CommandMessageManager()
 
-        while self.running:
-            manager.receive_messages()
+        if num_workers > 1:
+            self._run_workers(manager, num_workers)
+        else:
+            last_log = time.time()
+            while self.running:
+                manager.receive_messages()
+
+                if time.time() - last_log >= THROUGHPUT_LOG_PERIOD:
+                    self._log_metrics()
+                    last_log = time.time()
+            self._log_metrics()
+
+        manager.close()
 
         logger.info('Command completed: scale_message_handler')
 
@@ -51,3 +79,129 @@ class Command(BaseCommand):
 
         logger.info('Halting queue processing as a result of signal: {}'.format(signum))
         self.running = False
+
+    def _run_workers(self, manager, num_workers):
+        """Runs the given number of workers that each receive and execute batches of messages concurrently until the
+        command is halted
+
+        :param manager: The command message manager
+        :type manager: :class:`messaging.manager.CommandMessageManager`
+        :param num_workers: The number of workers to run
+        :type num_workers: int
+        """
+
+        logger.info('Starting %i message handler workers', num_workers)
+
+        workers = [MessageWorker(worker_id, manager, self) for worker_id in range(1, num_workers + 1)]
+        for worker in workers:
+            worker.start()
+
+        last_log = time.time()
+        while any(worker.is_alive() for worker in workers):
+            # Join with a timeout so that the main thread remains responsive to signals
+            for worker in workers:
+                worker.join(1)
+
+            if time.time() - last_log >= THROUGHPUT_LOG_PERIOD:
+                self._log_throughput(workers)
+                self._log_metrics()
+                last_log = time.time()
+
+        self._log_throughput(workers)
+        self._log_metrics()
+
+    def _log_metrics(self):
+        """Logs how many received messages of each type were fused together before execution and the counters of the
+        recipe definition cache
+        """
+
+        for message_type, (num_messages, num_commands) in sorted(fusion_metrics.get_counts().items()):
+            logger.info('Message type %s: %i message(s) executed as %i command(s)', message_type, num_messages,
+                        num_commands)
+
+        counts = recipe_definition_cache.get_counts()
+        logger.info('Recipe definition cache: %i hit(s), %i miss(es), %i definition(s) cached', counts['hits'],
+                    counts['misses'], counts['size'])
+
+    def _log_throughput(self, workers):
+        """Logs the throughput counters of the given workers
+
+        :param workers: The message handler workers
+        :type workers: [:class:`messaging.management.commands.scale_message_handler.MessageWorker`]
+        """
+
+        for worker in workers:
+            num_succeeded, num_failed, messages_per_sec = worker.get_counters()
+            logger.info('Worker %i: %i messages succeeded, %i failed (%.2f messages/sec)', worker.worker_id,
+                        num_succeeded, num_failed, messages_per_sec)
+
+
+class MessageWorker(threading.Thread):
+    """Worker thread that receives and executes batches of messages using its own database connection. Messages are
+    acknowledged on success by the backend exactly as in the serial message handler.
+    """
+
+    def __init__(self, worker_id, manager, command):
+        """Constructor
+
+        :param worker_id: The ID of the worker
+        :type worker_id: int
+        :param manager: The command message manager
+        :type manager: :class:`messaging.manager.CommandMessageManager`
+        :param command: The running message handler command, used to check whether to keep running
+        :type command: :class:`messaging.management.commands.scale_message_handler.Command`
+        """
+
+        super(MessageWorker, self).__init__(name='Message worker %i' % worker_id)
+        self.daemon = True
+        self.worker_id = worker_id
+
+        self._command = command
+        self._manager = manager
+        self._lock = threading.Lock()
+        self._num_succeeded = 0
+        self._num_failed = 0
+        self._started = None
+
+    def get_counters(self):
+        """Returns the throughput counters for this worker
+
+        :returns: The number of messages that succeeded, the number that failed, and the overall messages per second
+        :rtype: (int, int, float)
+        """
+
+        with self._lock:
+            num_succeeded = self._num_succeeded
+            num_failed = self._num_failed
+            started = self._started
+
+        messages_per_sec = 0.0
+        if started:
+            duration = time.time() - started
+            if duration > 0:
+                messages_per_sec = (num_succeeded + num_failed) / duration
+        return num_succeeded, num_failed, messages_per_sec
+
+    def run(self):
+        """Receives and executes messages until the command is halted"""
+
+        with self._lock:
+            self._started = time.time()
+
+        try:
+            while self._command.running:
+                # Drop a connection that has been broken or open too long before using it for the next batch
+                close_old_connections()
+                try:
+                    num_succeeded, num_failed = self._manager.receive_messages()
+                except Exception:
+                    logger.exception('Message worker %i encountered an error receiving messages', self.worker_id)
+                    time.sleep(1)
+                    continue
+
+                with self._lock:
+                    self._num_succeeded += num_succeeded
+                    self._num_failed += num_failed
+        finally:
+            # Each worker thread has its own database connection, so close it on the way out
+            connection.close()
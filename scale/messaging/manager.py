@@ -4,6 +4,7 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import logging
+import threading
 
 from django.conf import settings
 from django.utils.timezone import now
@@ -17,6 +18,51 @@ from .exceptions import CommandMessageExecuteFailure, InvalidCommandMessage
 logger = logging.getLogger(__name__)
 
 
+class MessageFusionMetrics(object):
+    """Tracks how many received messages were fused together into fewer commands before execution. This class is
+    thread-safe.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._lock = threading.Lock()
+        self._counts = {}  # {Message type: [Number of messages received, Number of commands executed]}
+
+    def add_fused_commands(self, message_type, num_messages, num_commands):
+        """Records that the given number of received messages of the given type were executed as the given number of
+        commands
+
+        :param message_type: The message type
+        :type message_type: string
+        :param num_messages: The number of messages received
+        :type num_messages: int
+        :param num_commands: The number of commands executed for the received messages
+        :type num_commands: int
+        """
+
+        with self._lock:
+            if message_type not in self._counts:
+                self._counts[message_type] = [0, 0]
+            self._counts[message_type][0] += num_messages
+            self._counts[message_type][1] += num_commands
+
+    def get_counts(self):
+        """Returns the fusion counts for each message type
+
+        :returns: Dict where each message type maps to a tuple of the number of messages received and the number of
+            commands executed
+        :rtype: dict
+        """
+
+        with self._lock:
+            return {message_type: tuple(counts) for message_type, counts in self._counts.items()}
+
+
+fusion_metrics = MessageFusionMetrics()
+
+
 class CommandMessageManager(object):
     def __new__(cls):
         """Singleton support for manager"""
@@ -33,6 +79,13 @@ class CommandMessageManager(object):
 
         self._backend = get_message_backend(broker_type)
 
+    def close(self):
+        """Releases the connection to the message broker, deleting any acknowledged messages that are still pending.
+        This should be called when the message handler shuts down.
+        """
+
+        self._backend.close()
+
     def get_queue_size(self):
         """Gets the current length of the queue
 
@@ -64,10 +117,26 @@ class CommandMessageManager(object):
         up to 20 seconds or until 10 messages have been processed, process and
         then return.
 
+        If the MESSAGE_FUSION_WINDOW setting is greater than one, a window of up
+        to that many messages is received at once instead and compatible messages
+        of the same type are fused together before being executed.
+
         New messages will potentially be sent within this method, if CommandMessage populates
         the new_messages list.
+
+        This method is thread-safe, so multiple workers may each call it to process batches concurrently. Messages
+        of any type may execute concurrently, relying on the same row locking that allows multiple message handler
+        processes to run.
+
+        :return: The number of messages that were successfully processed and the number that failed
+        :rtype: (int, int)
         """
 
+        if settings.MESSAGE_FUSION_WINDOW > 1:
+            return self._receive_fused_messages(settings.MESSAGE_FUSION_WINDOW)
+
+        num_succeeded = 0
+        num_failed = 0
         message_generator = self._backend.receive_messages(10)
 
         # Manually control iteration, so we can pass back success/failure to co-routine
@@ -84,11 +153,18 @@ class CommandMessageManager(object):
                 except CommandMessageExecuteFailure:
                     logger.exception('CommandMessage failure during execute call. Message remains on queue.')
 
+                if success:
+                    num_succeeded += 1
+                else:
+                    num_failed += 1
+
                 # Feed boolean to backend generator and grab next message
                 message = message_generator.send(success)
         except StopIteration:
             pass
 
+        return num_succeeded, num_failed
+
     @staticmethod
     def _extract_command(message):
         """Reconstitute a CommandMessage from incoming raw message payload
@@ -126,6 +202,20 @@ class CommandMessageManager(object):
         """
 
         command = self._extract_command(message)
+        self._execute_command(command)
+
+    def _execute_command(self, command):
+        """Executes the given command
+
+        This function will potentially fire off new messages as required by
+        execution logic within CommandMessage extending class. These messages
+        will only be sent if command execution is successful.
+
+        :param command: The command to execute
+        :type command: `messaging.messages.message.CommandMessage`
+        :raises CommandMessageExecuteFailure: Failure during CommandMessage.execute
+        """
+
         start_time = now()
         logger.info('Processing message of type %s', command.type)
         try:
@@ -144,6 +234,110 @@ class CommandMessageManager(object):
 
         logger.info('Successfully completed message of type %s', command.type)
 
+    def _receive_fused_messages(self, window_size):
+        """Receives a window of messages, fuses compatible messages of the same type together and then executes the
+        fused commands. Each received message is acknowledged once the command it was fused into succeeds. If a fused
+        command fails, each of its original messages is executed separately so that one bad message does not keep the
+        others on the queue. Messages that fail are requeued.
+
+        :param window_size: The maximum number of messages to receive
+        :type window_size: int
+        :return: The number of messages that were successfully processed and the number that failed
+        :rtype: (int, int)
+        """
+
+        num_succeeded = 0
+        num_failed = 0
+
+        # Fused commands in the order they were received: [(command, [(message, acknowledge, requeue)])]
+        fused_commands = []
+        for message, acknowledge, requeue in self._backend.receive_unacknowledged_messages(window_size):
+            try:
+                command = self._extract_command(message)
+            except InvalidCommandMessage:
+                logger.exception('Exception encountered processing message payload. Message remains on queue.')
+                self._requeue(requeue)
+                num_failed += 1
+                continue
+
+            for fused_command, received in fused_commands:
+                if fused_command.type == command.type and fused_command.can_fuse(command):
+                    fused_command.fuse(command)
+                    received.append((message, acknowledge, requeue))
+                    break
+            else:
+                fused_commands.append((command, [(message, acknowledge, requeue)]))
+
+        num_commands_by_type = {}
+        num_messages_by_type = {}
+        for command, received in fused_commands:
+            num_commands_by_type[command.type] = num_commands_by_type.get(command.type, 0) + 1
+            num_messages_by_type[command.type] = num_messages_by_type.get(command.type, 0) + len(received)
+        for message_type, num_commands in num_commands_by_type.items():
+            fusion_metrics.add_fused_commands(message_type, num_messages_by_type[message_type], num_commands)
+        if len(fused_commands) < sum(num_messages_by_type.values()):
+            logger.info('Fused %i message(s) into %i command(s)', sum(num_messages_by_type.values()),
+                        len(fused_commands))
+
+        for command, received in fused_commands:
+            if self._execute_and_acknowledge(command, [acknowledge for _, acknowledge, _ in received]):
+                num_succeeded += len(received)
+                continue
+            if len(received) == 1:
+                self._requeue(received[0][2])
+                num_failed += 1
+                continue
+
+            logger.info('Executing the %i message(s) of the failed fused command separately', len(received))
+            for message, acknowledge, requeue in received:
+                # Original messages are extracted again since the fused command was built from the first of them
+                if self._execute_and_acknowledge(self._extract_command(message), [acknowledge]):
+                    num_succeeded += 1
+                else:
+                    self._requeue(requeue)
+                    num_failed += 1
+
+        return num_succeeded, num_failed
+
+    def _execute_and_acknowledge(self, command, acknowledgements):
+        """Executes the given command and acknowledges its received messages if execution succeeds. A message that
+        could not be acknowledged remains on the queue and will be delivered again.
+
+        :param command: The command to execute
+        :type command: `messaging.messages.message.CommandMessage`
+        :param acknowledgements: The functions that acknowledge the messages that make up the command
+        :type acknowledgements: [func]
+        :return: True if the command succeeded, False otherwise
+        :rtype: bool
+        """
+
+        try:
+            self._execute_command(command)
+        except CommandMessageExecuteFailure:
+            logger.exception('CommandMessage failure during execute call. Message remains on queue.')
+            return False
+
+        for acknowledge in acknowledgements:
+            try:
+                acknowledge()
+            except Exception:
+                logger.exception('Failed to acknowledge message. Message remains on queue.')
+        return True
+
+    @staticmethod
+    def _requeue(requeue):
+        """Returns a failed message to the queue using the given function. A message that could not be requeued is
+        delivered again once the backend returns it to the queue.
+
+        :param requeue: The function that requeues the message
+        :type requeue: func
+        """
+
+        try:
+            requeue()
+        except Exception:
+            logger.exception('Failed to requeue message. Message will be delivered again later.')
+
     def _send_downstream(self, messages):
         """Send any required downstream messages following a CommandMessage.execute
         :param messages: List of CommandMessage instances to send downstream
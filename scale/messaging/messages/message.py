@@ -17,6 +17,28 @@ class CommandMessage(object):
         # Unique type of CommandMessage, each type must be registered in apps.py
         self.type = message_type
 
+    def can_fuse(self, message):
+        """Indicates whether the given message can be fused into this message so that both are executed together as a
+        single message. Message types that support fusing should override this method and :meth:`fuse`.
+
+        :param message: The message to fuse, guaranteed to be of the same type as this message
+        :type message: :class:`messaging.messages.message.CommandMessage`
+        :return: True if the given message can be fused into this message, False otherwise
+        :rtype: bool
+        """
+
+        return False
+
+    def fuse(self, message):
+        """Fuses the given message into this message. This is only called when :meth:`can_fuse` returns True, so the
+        default implementation does nothing; message types that override :meth:`can_fuse` must override this method.
+
+        :param message: The message to fuse, guaranteed to be of the same type as this message
+        :type message: :class:`messaging.messages.message.CommandMessage`
+        """
+
+        pass
+
     @abstractmethod
     def to_json(self):
         """JSON Serializer for CommandMessage subclasses. Must be implemented in all subclasses.
@@ -0,0 +1,60 @@
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+from mock import MagicMock, patch
+
+from messaging.management.commands.scale_message_handler import MessageWorker
+
+
+class TestMessageWorker(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    @patch('messaging.management.commands.scale_message_handler.close_old_connections')
+    @patch('messaging.management.commands.scale_message_handler.connection')
+    def test_run(self, connection, close_old_connections):
+        """Tests that a worker accumulates throughput counters until the command is halted"""
+
+        command = MagicMock(running=True)
+        manager = MagicMock()
+
+        def receive_messages():
+            if manager.receive_messages.call_count == 2:
+                command.running = False
+            return 3, 1
+        manager.receive_messages.side_effect = receive_messages
+
+        worker = MessageWorker(1, manager, command)
+        worker.run()
+
+        num_succeeded, num_failed, messages_per_sec = worker.get_counters()
+        self.assertEqual(num_succeeded, 6)
+        self.assertEqual(num_failed, 2)
+        self.assertGreaterEqual(messages_per_sec, 0.0)
+        self.assertEqual(close_old_connections.call_count, 2)
+        connection.close.assert_called_once()
+
+    @patch('messaging.management.commands.scale_message_handler.time.sleep')
+    @patch('messaging.management.commands.scale_message_handler.close_old_connections')
+    @patch('messaging.management.commands.scale_message_handler.connection')
+    def test_run_error(self, connection, close_old_connections, sleep):
+        """Tests that a worker keeps running after an error receiving messages"""
+
+        command = MagicMock(running=True)
+        manager = MagicMock()
+
+        def receive_messages():
+            if manager.receive_messages.call_count == 1:
+                raise Exception('Broker unavailable')
+            command.running = False
+            return 1, 0
+        manager.receive_messages.side_effect = receive_messages
+
+        worker = MessageWorker(1, manager, command)
+        worker.run()
+
+        num_succeeded, num_failed, _ = worker.get_counters()
+        self.assertEqual(num_succeeded, 1)
+        self.assertEqual(num_failed, 0)
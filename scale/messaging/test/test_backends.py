@@ -5,6 +5,7 @@ from __future__ import unicode_literals
 
 import Queue
 import json
+import threading
 
 import django
 from django.conf import settings
@@ -28,6 +29,9 @@ class DummyBackend(MessagingBackend):
 
     def receive_messages(self, batch_size):  # pragma: no cover
         pass
+
+    def receive_unacknowledged_messages(self, batch_size):  # pragma: no cover
+        pass
     
     def get_queue_size(self):  # pragma: no cover
         pass
@@ -52,8 +56,7 @@ class TestAMQPBackend(TestCase):
         backend = AMQPMessagingBackend()
         backend.send_messages(messages)
 
-        # Deep diving through context managers to assert put call
-        put = connection.return_value.__enter__.return_value.SimpleQueue.return_value.put
+        put = connection.return_value.SimpleQueue.return_value.put
         put.assert_called_with(messages[0])
         self.assertEquals(put.call_count, 1)
 
@@ -69,8 +72,7 @@ class TestAMQPBackend(TestCase):
         backend = AMQPMessagingBackend()
         backend.send_messages(messages)
 
-        # Deep diving through context managers to assert put call
-        put = connection.return_value.__enter__.return_value.SimpleQueue.return_value.put
+        put = connection.return_value.SimpleQueue.return_value.put
         put.assert_has_calls([call(x) for x in messages])
         self.assertEquals(put.call_count, 2)
 
@@ -82,8 +84,7 @@ class TestAMQPBackend(TestCase):
         message2 = MagicMock(payload={'type': 'echo', 'body': '2'})
         get_func = MagicMock(side_effect=[message1, message2, Queue.Empty])
 
-        # Deep diving through context managers to patch get call
-        connection.return_value.__enter__.return_value.SimpleQueue.return_value.get = get_func
+        connection.return_value.SimpleQueue.return_value.get = get_func
 
         backend = AMQPMessagingBackend()
         generator = backend.receive_messages(5)
@@ -108,8 +109,7 @@ class TestAMQPBackend(TestCase):
         message3 = MagicMock(payload={'type': 'echo', 'body': '3'})
         get_func = MagicMock(side_effect=[message1, message2, Queue.Empty])
 
-        # Deep diving through context managers to patch get call
-        connection.return_value.__enter__.return_value.SimpleQueue.return_value.get = get_func
+        connection.return_value.SimpleQueue.return_value.get = get_func
 
         backend = AMQPMessagingBackend()
         generator = backend.receive_messages(2)
@@ -135,8 +135,7 @@ class TestAMQPBackend(TestCase):
         message.payload = 'test'
         get_func = MagicMock(return_value=message)
 
-        # Deep diving through context managers to patch get call
-        connection.return_value.__enter__.return_value.SimpleQueue.return_value.get = get_func
+        connection.return_value.SimpleQueue.return_value.get = get_func
 
         backend = AMQPMessagingBackend()
 
@@ -148,6 +147,183 @@ class TestAMQPBackend(TestCase):
             pass
 
         message.ack.assert_not_called()
+        message.requeue.assert_called()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_receive_messages_batch_channel(self, connection):
+        """Validate each batch is received on its own channel with a prefetch limit that is closed afterwards"""
+
+        message = MagicMock(payload={'type': 'echo', 'body': '1'})
+        connection.return_value.SimpleQueue.return_value.get = MagicMock(side_effect=[message, Queue.Empty])
+        channel = connection.return_value.channel.return_value
+        connection.return_value.SimpleQueue.return_value.channel = channel
+
+        backend = AMQPMessagingBackend()
+        generator = backend.receive_messages(5)
+        generator.next()
+        channel.basic_qos.assert_called_once_with(0, 5, False)
+        connection.return_value.SimpleQueue.assert_called_once_with(settings.QUEUE_NAME, channel=channel)
+        channel.close.assert_not_called()
+        try:
+            generator.send(False)
+        except StopIteration:
+            pass
+
+        message.requeue.assert_called_once()
+        channel.close.assert_called_once()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_receive_unacknowledged_messages(self, connection):
+        """Validate messages are received without acknowledgement via AMQP backend"""
+
+        message1 = MagicMock(payload={'type': 'echo', 'body': '1'})
+        message2 = MagicMock(payload={'type': 'echo', 'body': '2'})
+        get_func = MagicMock(side_effect=[message1, message2, Queue.Empty])
+        connection.return_value.SimpleQueue.return_value.get = get_func
+
+        backend = AMQPMessagingBackend()
+        results = backend.receive_unacknowledged_messages(5)
+
+        self.assertEqual([payload for payload, _, _ in results], [message1.payload, message2.payload])
+        message1.ack.assert_not_called()
+        message2.ack.assert_not_called()
+
+        results[1][1]()
+        message1.ack.assert_not_called()
+        message2.ack.assert_called_once()
+        connection.return_value.SimpleQueue.return_value.consumer.cancel.assert_called_once()
+
+        # The window's channel is closed once all of its messages are acknowledged
+        channel = connection.return_value.SimpleQueue.return_value.channel
+        channel.close.assert_not_called()
+        results[0][2]()
+        message1.requeue.assert_called_once()
+        message1.ack.assert_not_called()
+        channel.close.assert_called_once()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_receive_unacknowledged_messages_next_window(self, connection):
+        """Validate unacknowledged messages of a window are returned to the queue when the next window is received"""
+
+        message = MagicMock(payload={'type': 'echo', 'body': '1'})
+        get_func = MagicMock(side_effect=[message, Queue.Empty, Queue.Empty])
+        connection.return_value.SimpleQueue.return_value.get = get_func
+        channel = connection.return_value.SimpleQueue.return_value.channel
+
+        backend = AMQPMessagingBackend()
+        backend.receive_unacknowledged_messages(5)
+        channel.close.assert_not_called()
+        self.assertEqual(backend.receive_unacknowledged_messages(5), [])
+
+        # Both the first window's channel and the empty second window's channel are closed
+        self.assertEqual(channel.close.call_count, 2)
+        message.ack.assert_not_called()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_connection_reused(self, connection):
+        """Validate the sending connection and the receiving connection of a thread are reused across AMQP backend
+        calls
+        """
+
+        get_func = MagicMock(side_effect=Queue.Empty)
+        connection.return_value.SimpleQueue.return_value.get = get_func
+
+        backend = AMQPMessagingBackend()
+        backend.send_messages([{'type': 'echo', 'body': '1'}])
+        backend.send_messages([{'type': 'echo', 'body': '2'}])
+        list(backend.receive_messages(5))
+        list(backend.receive_messages(5))
+        backend.get_queue_size()
+
+        # One connection is shared for sending and the thread has its own connection for receiving
+        self.assertEqual(connection.call_count, 2)
+        # One queue is kept for sending and one queue was opened for each received batch
+        self.assertEqual(connection.return_value.SimpleQueue.call_count, 3)
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_consumer_per_thread(self, connection):
+        """Validate each thread receives messages over its own connection without holding the backend lock"""
+
+        backend = AMQPMessagingBackend()
+
+        def get(timeout):
+            # Another thread must be able to send while this thread waits for messages
+            sender = threading.Thread(target=backend.send_messages, args=([{'type': 'echo', 'body': '1'}],))
+            sender.start()
+            sender.join(5)
+            self.assertFalse(sender.is_alive())
+            raise Queue.Empty()
+        connection.return_value.SimpleQueue.return_value.get = get
+
+        receiver = threading.Thread(target=backend.receive_unacknowledged_messages, args=(5,))
+        receiver.start()
+        receiver.join(5)
+        backend.receive_unacknowledged_messages(5)
+
+        self.assertEqual(len(backend._consumers), 2)
+        # One connection for sending and one connection for each receiving thread
+        self.assertEqual(connection.call_count, 3)
+        self.assertEqual(connection.return_value.SimpleQueue.return_value.put.call_count, 2)
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_acknowledge_after_lost_connection(self, connection):
+        """Validate messages of a window are not acknowledged after the connection of the window was lost"""
+
+        message = MagicMock(payload={'type': 'echo', 'body': '1'})
+        get_func = MagicMock(side_effect=[message, Queue.Empty])
+        connection.return_value.SimpleQueue.return_value.get = get_func
+
+        backend = AMQPMessagingBackend()
+        results = backend.receive_unacknowledged_messages(5)
+
+        # Losing the connection drops the window, the broker returns its messages to the queue
+        backend._get_consumer()._reset_connection()
+        connection.return_value.release.assert_called_once()
+        results[0][1]()
+
+        message.ack.assert_not_called()
+        self.assertIsNone(backend._get_consumer()._window)
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_reconnect_on_send_failure(self, connection):
+        """Validate the AMQP backend re-establishes a dropped connection and resends"""
+
+        class DroppedConnection(Exception):
+            pass
+
+        connection.return_value.recoverable_connection_errors = (DroppedConnection,)
+        connection.return_value.recoverable_channel_errors = ()
+        put = connection.return_value.SimpleQueue.return_value.put
+        put.side_effect = [DroppedConnection, None]
+
+        messages = [{'type': 'echo', 'body': 'yes'}]
+
+        backend = AMQPMessagingBackend()
+        backend.send_messages(messages)
+
+        self.assertEqual(connection.call_count, 2)
+        connection.return_value.release.assert_called_once()
+        self.assertEqual(put.call_count, 2)
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_reconnect_on_send_failure_resends_rest(self, connection):
+        """Validate the AMQP backend only resends the messages that were not sent before the connection dropped"""
+
+        class DroppedConnection(Exception):
+            pass
+
+        connection.return_value.recoverable_connection_errors = (DroppedConnection,)
+        connection.return_value.recoverable_channel_errors = ()
+        put = connection.return_value.SimpleQueue.return_value.put
+        put.side_effect = [None, DroppedConnection, None, None]
+
+        messages = [{'type': 'echo', 'body': '1'}, {'type': 'echo', 'body': '2'}, {'type': 'echo', 'body': '3'}]
+
+        backend = AMQPMessagingBackend()
+        backend.send_messages(messages)
+
+        put.assert_has_calls([call(messages[0]), call(messages[1]), call(messages[1]), call(messages[2])])
+        self.assertEqual(put.call_count, 4)
 
 
 class TestBackendsFactory(TestCase):
@@ -233,7 +409,7 @@ class TestSQSBackend(TestCase):
         backend = SQSMessagingBackend()
         backend.send_messages(messages)
 
-        put = client.return_value.__enter__.return_value.send_messages
+        put = client.return_value.open.return_value.send_messages
         self.assertIn(json.dumps(messages[0]), str(put.mock_calls[0]))
         self.assertEquals(put.call_count, 1)
 
@@ -249,7 +425,7 @@ class TestSQSBackend(TestCase):
         backend = SQSMessagingBackend()
         backend.send_messages(messages)
 
-        put = client.return_value.__enter__.return_value.send_messages
+        put = client.return_value.open.return_value.send_messages
         for message in messages:
             self.assertIn(json.dumps(message), str(put.mock_calls[0]))
         self.assertEquals(put.call_count, 1)
@@ -258,11 +434,10 @@ class TestSQSBackend(TestCase):
     def test_valid_receive_messages(self, client):
         """Validate successful message retrieval via SQS backend"""
 
-        message1 = MagicMock(body=json.dumps({'type': 'echo', 'body': '1'}))
-        message2 = MagicMock(body=json.dumps({'type': 'echo', 'body': '2'}))
-        get_func = MagicMock(return_value=[message1, message2])
-
-        client.return_value.__enter__.return_value.receive_messages = get_func
+        message1 = {'Body': json.dumps({'type': 'echo', 'body': '1'}), 'ReceiptHandle': 'handle-1'}
+        message2 = {'Body': json.dumps({'type': 'echo', 'body': '2'}), 'ReceiptHandle': 'handle-2'}
+        sqs_client = client.return_value.open.return_value
+        sqs_client.receive_message_batch.return_value = [message1, message2]
 
         backend = SQSMessagingBackend()
         generator = backend.receive_messages(5)
@@ -274,21 +449,45 @@ class TestSQSBackend(TestCase):
         except StopIteration:
             pass
 
-        # wrap result in list to force generator iteration
         self.assertEqual(len(results), 2)
-        message1.delete.assert_called()
-        message2.delete.assert_called()
+        sqs_client.receive_message_batch.assert_called_once_with(settings.QUEUE_NAME, batch_size=5)
+        # Both messages are deleted with a single batch request
+        sqs_client.delete_message_batch.assert_called_once_with(settings.QUEUE_NAME, ['handle-1', 'handle-2'])
+
+    @patch('messaging.backends.sqs.SQSClient')
+    def test_receive_unacknowledged_messages(self, client):
+        """Validate messages are received without deletion via SQS backend"""
+
+        message1 = {'Body': json.dumps({'type': 'echo', 'body': '1'}), 'ReceiptHandle': 'handle-1'}
+        message2 = {'Body': json.dumps({'type': 'echo', 'body': '2'}), 'ReceiptHandle': 'handle-2'}
+        sqs_client = client.return_value.open.return_value
+        sqs_client.receive_message_batch.return_value = [message1, message2]
+
+        backend = SQSMessagingBackend()
+        results = backend.receive_unacknowledged_messages(5)
+
+        self.assertEqual([payload for payload, _, _ in results], [{'type': 'echo', 'body': '1'},
+                                                                  {'type': 'echo', 'body': '2'}])
+        results[0][1]()
+        sqs_client.delete_message_batch.assert_not_called()
+
+        # Failed messages are made visible on the queue again
+        results[1][2]()
+        sqs_client.change_message_visibility.assert_called_once_with(settings.QUEUE_NAME, 'handle-2', 0)
+
+        # Acknowledged messages are deleted before the next window is received
+        sqs_client.receive_message_batch.return_value = []
+        backend.receive_unacknowledged_messages(5)
+        sqs_client.delete_message_batch.assert_called_once_with(settings.QUEUE_NAME, ['handle-1'])
 
     @patch('messaging.backends.sqs.SQSClient')
     def test_exception_during_receive_messages(self, client):
         """Validate exception handling during message consumption from SQS backend"""
 
-        message = MagicMock()
         value = {'test': 'thing'}
-        message.body = json.dumps(value)
-        get_func = MagicMock(return_value=[message])
-
-        client.return_value.__enter__.return_value.receive_messages = get_func
+        message = {'Body': json.dumps(value), 'ReceiptHandle': 'handle'}
+        sqs_client = client.return_value.open.return_value
+        sqs_client.receive_message_batch.return_value = [message]
 
         backend = SQSMessagingBackend()
 
@@ -302,4 +501,23 @@ class TestSQSBackend(TestCase):
             pass
 
         self.assertEquals(results, [value])
-        message.delete.assert_not_called()
+        sqs_client.delete_message_batch.assert_not_called()
+
+    @patch('messaging.backends.sqs.SQSClient')
+    def test_close(self, client):
+        """Validate pending deletes are flushed and the client is closed when the SQS backend is closed"""
+
+        message = {'Body': json.dumps({'type': 'echo', 'body': '1'}), 'ReceiptHandle': 'handle-1'}
+        sqs_client = client.return_value.open.return_value
+        sqs_client.receive_message_batch.return_value = [message]
+
+        backend = SQSMessagingBackend()
+        results = backend.receive_unacknowledged_messages(5)
+        results[0][1]()
+        sqs_client.delete_message_batch.assert_not_called()
+
+        backend.close()
+
+        sqs_client.delete_message_batch.assert_called_once_with(settings.QUEUE_NAME, ['handle-1'])
+        sqs_client.close.assert_called_once()
+        self.assertIsNone(backend._client)
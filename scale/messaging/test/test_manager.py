@@ -4,12 +4,12 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import django
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from mock import MagicMock
 from mock import call, patch
 
 from messaging.exceptions import CommandMessageExecuteFailure, InvalidCommandMessage
-from messaging.manager import CommandMessageManager
+from messaging.manager import CommandMessageManager, MessageFusionMetrics
 from messaging.messages.message import CommandMessage
 
 
@@ -76,6 +76,7 @@ class TestCommandMessageManager(TestCase):
         with self.assertRaises(AttributeError):
             manager.send_messages([message])
 
+    @override_settings(MESSAGE_FUSION_WINDOW=0)
     def test_receive_message(self):
         """Validate the receive_message calls _process_message with each result"""
 
@@ -95,6 +96,86 @@ class TestCommandMessageManager(TestCase):
         process_message.assert_has_calls(calls)
         self.assertEquals(process_message.call_count, 10)
 
+    @override_settings(MESSAGE_FUSION_WINDOW=0)
+    def test_receive_message_counts(self):
+        """Validate the receive_message returns the number of succeeded and failed messages"""
+
+        mocks = [MagicMock() for _ in range(3)]
+
+        def gen():
+            for mock in mocks:
+                yield mock
+
+        manager = CommandMessageManager()
+        manager._backend = MagicMock()
+        manager._process_message = MagicMock(side_effect=[None, CommandMessageExecuteFailure, None])
+        manager._backend.receive_messages = MagicMock(return_value=gen())
+
+        self.assertEqual(manager.receive_messages(), (2, 1))
+
+    @override_settings(MESSAGE_FUSION_WINDOW=100)
+    @patch('messaging.manager.fusion_metrics', new_callable=MessageFusionMetrics)
+    @patch('messaging.manager.CommandMessageManager._extract_command')
+    def test_receive_fused_messages(self, extract_command, fusion_metrics):
+        """Validate that compatible messages are fused and each received message is acknowledged on success"""
+
+        command_1 = MagicMock(type='fusable')
+        command_1.can_fuse.return_value = True
+        command_2 = MagicMock(type='fusable')
+        command_3 = MagicMock(type='other')
+        extract_command.side_effect = [command_1, command_2, command_3]
+        acknowledgements = [MagicMock() for _ in range(3)]
+        requeues = [MagicMock() for _ in range(3)]
+
+        manager = CommandMessageManager()
+        manager._backend = MagicMock()
+        manager._backend.receive_unacknowledged_messages.return_value = [
+            ({'type': 'fusable'}, acknowledgements[0], requeues[0]),
+            ({'type': 'fusable'}, acknowledgements[1], requeues[1]),
+            ({'type': 'other'}, acknowledgements[2], requeues[2])]
+        execute_command = manager._execute_command = MagicMock()
+
+        self.assertEqual(manager.receive_messages(), (3, 0))
+
+        manager._backend.receive_unacknowledged_messages.assert_called_with(100)
+        command_1.fuse.assert_called_once_with(command_2)
+        execute_command.assert_has_calls([call(command_1), call(command_3)])
+        self.assertEqual(execute_command.call_count, 2)
+        for acknowledge in acknowledgements:
+            acknowledge.assert_called_once()
+        for requeue in requeues:
+            requeue.assert_not_called()
+        self.assertDictEqual(fusion_metrics.get_counts(), {'fusable': (2, 1), 'other': (1, 1)})
+
+    @override_settings(MESSAGE_FUSION_WINDOW=100)
+    @patch('messaging.manager.CommandMessageManager._extract_command')
+    def test_receive_fused_messages_failure(self, extract_command):
+        """Validate that the messages of a failed fused command are executed separately and failures are requeued"""
+
+        fused_command = MagicMock(type='fusable')
+        fused_command.can_fuse.return_value = True
+        command_1 = MagicMock(type='fusable')
+        command_2 = MagicMock(type='fusable')
+        extract_command.side_effect = [fused_command, MagicMock(type='fusable'), command_1, command_2]
+        acknowledgements = [MagicMock() for _ in range(2)]
+        requeues = [MagicMock() for _ in range(2)]
+
+        manager = CommandMessageManager()
+        manager._backend = MagicMock()
+        manager._backend.receive_unacknowledged_messages.return_value = [
+            ({'type': 'fusable'}, acknowledgements[0], requeues[0]),
+            ({'type': 'fusable'}, acknowledgements[1], requeues[1])]
+        manager._execute_command = MagicMock(side_effect=[CommandMessageExecuteFailure, None,
+                                                          CommandMessageExecuteFailure])
+
+        self.assertEqual(manager.receive_messages(), (1, 1))
+
+        manager._execute_command.assert_has_calls([call(fused_command), call(command_1), call(command_2)])
+        acknowledgements[0].assert_called_once()
+        acknowledgements[1].assert_not_called()
+        requeues[0].assert_not_called()
+        requeues[1].assert_called_once()
+
     @patch('messaging.manager.CommandMessageManager._extract_command')
     @patch('messaging.manager.CommandMessageManager._send_downstream')
     def test_successful_process_message(self, send_downstream, extract_command):
@@ -7,9 +7,12 @@ from node.resources.resource import Cpus, Disk, Mem, Gpus
 
 
 class NodeResources(object):
-    """This class encapsulates a set of node resources
+    """This class encapsulates a set of node resources. Node resources are created and combined many thousands of times
+    per scheduling generation, so the methods below work directly on the underlying dicts.
     """
 
+    __slots__ = ('_resources',)
+
     def __init__(self, resources=None):
         """Constructor
 
@@ -101,11 +104,12 @@ class NodeResources(object):
         :type node_resources: :class:`node.resources.NodeResources`
         """
 
-        for resource in node_resources.resources:
-            if resource.name in self._resources:
-                self._resources[resource.name].value += resource.value  # Assumes SCALAR type
+        resources = self._resources
+        for name, resource in node_resources._resources.items():
+            if name in resources:
+                resources[name].value += resource.value  # Assumes SCALAR type
             else:
-                self._resources[resource.name] = resource.copy()
+                resources[name] = resource.copy()
 
     def copy(self):
         """Returns a deep copy of these resources. Editing one of the resources objects will not affect the other.
@@ -114,8 +118,9 @@ class NodeResources(object):
         :rtype: :class:`node.resources.node_resources.NodeResources`
         """
 
-        resources_copy = NodeResources()
-        resources_copy.add(self)
+        # Standard resources are already defined, so skip the constructor
+        resources_copy = NodeResources.__new__(NodeResources)
+        resources_copy._resources = {name: resource.copy() for name, resource in self._resources.items()}
         return resources_copy
 
     def generate_status_json(self, resources_dict, key_name):
@@ -157,12 +162,13 @@ class NodeResources(object):
         :type node_resources: :class:`node.resources.NodeResources`
         """
 
-        for resource in node_resources.resources:
-            if resource.name in self._resources:
-                if self._resources[resource.name].value < resource.value:  # Assumes SCALAR type
-                    self._resources[resource.name].value = resource.value
+        resources = self._resources
+        for name, resource in node_resources._resources.items():
+            if name in resources:
+                if resources[name].value < resource.value:  # Assumes SCALAR type
+                    resources[name].value = resource.value
             else:
-                self._resources[resource.name] = resource.copy()
+                resources[name] = resource.copy()
 
     def is_equal(self, node_resources):
         """Indicates if these resources are equal. This should be used for testing only.
@@ -195,9 +201,10 @@ class NodeResources(object):
         :rtype: bool
         """
 
-        for resource in node_resources.resources:
-            if resource.name in self._resources:
-                if self._resources[resource.name].value < resource.value:  # Assumes SCALAR type
+        resources = self._resources
+        for name, resource in node_resources._resources.items():
+            if name in resources:
+                if resources[name].value < resource.value:  # Assumes SCALAR type
                     return False
             else:
                 # Do not have this resource, not a problem if requesting 0.0
@@ -247,6 +254,7 @@ class NodeResources(object):
         :type node_resources: :class:`node.resources.NodeResources`
         """
 
-        for resource in node_resources.resources:
-            if resource.name in self._resources:
-                self._resources[resource.name].value -= resource.value  # Assumes SCALAR type
+        resources = self._resources
+        for name, resource in node_resources._resources.items():
+            if name in resources:
+                resources[name].value -= resource.value  # Assumes SCALAR type
@@ -0,0 +1,52 @@
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+
+from node.resources.node_resources import NodeResources
+from node.resources.resource import Cpus, Disk, Mem, ScalarResource
+
+
+class TestNodeResources(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_add_and_subtract(self):
+        """Tests calling add() and subtract() with standard and custom resources"""
+
+        resources = NodeResources([Cpus(10.0), Mem(100.0)])
+        resources.add(NodeResources([Cpus(2.0), Disk(50.0), ScalarResource('foo', 3.0)]))
+        self.assertTrue(resources.is_equal(NodeResources([Cpus(12.0), Mem(100.0), Disk(50.0),
+                                                          ScalarResource('foo', 3.0)])))
+
+        resources.subtract(NodeResources([Cpus(4.0), ScalarResource('foo', 1.0), ScalarResource('bar', 1.0)]))
+        self.assertTrue(resources.is_equal(NodeResources([Cpus(8.0), Mem(100.0), Disk(50.0),
+                                                          ScalarResource('foo', 2.0)])))
+
+    def test_copy(self):
+        """Tests that calling copy() returns independent resources"""
+
+        resources = NodeResources([Cpus(10.0), Mem(100.0), ScalarResource('foo', 3.0)])
+        resources_copy = resources.copy()
+        resources_copy.add(NodeResources([Cpus(1.0), ScalarResource('foo', 1.0)]))
+
+        self.assertTrue(resources.is_equal(NodeResources([Cpus(10.0), Mem(100.0), ScalarResource('foo', 3.0)])))
+        self.assertTrue(resources_copy.is_equal(NodeResources([Cpus(11.0), Mem(100.0), ScalarResource('foo', 4.0)])))
+
+    def test_increase_up_to(self):
+        """Tests calling increase_up_to()"""
+
+        resources = NodeResources([Cpus(10.0), Mem(100.0)])
+        resources.increase_up_to(NodeResources([Cpus(5.0), Mem(200.0), ScalarResource('foo', 1.0)]))
+
+        self.assertTrue(resources.is_equal(NodeResources([Cpus(10.0), Mem(200.0), ScalarResource('foo', 1.0)])))
+
+    def test_is_sufficient_to_meet(self):
+        """Tests calling is_sufficient_to_meet()"""
+
+        resources = NodeResources([Cpus(10.0), Mem(100.0)])
+
+        self.assertTrue(resources.is_sufficient_to_meet(NodeResources([Cpus(10.0), ScalarResource('foo', 0.0)])))
+        self.assertFalse(resources.is_sufficient_to_meet(NodeResources([Cpus(10.1)])))
+        self.assertFalse(resources.is_sufficient_to_meet(NodeResources([ScalarResource('foo', 1.0)])))
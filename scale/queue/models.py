@@ -303,11 +303,18 @@ class QueueManager(models.Manager):
         queues = []
         job_ids = []
         configurator = QueuedExecutionConfigurator(input_files)
+        interfaces = {}  # {Job type revision ID: interface dict}
+        manifests = {}  # {Job type ID: SeedManifest}
         for job in queued_jobs:
             job_ids.append(job.id)
             config = configurator.configure_queued_job(job)
 
-            manifest = SeedManifest(job.job_type.manifest)
+            # Only parse each job type manifest and revision interface once
+            if job.job_type_id not in manifests:
+                manifests[job.job_type_id] = SeedManifest(job.job_type.manifest)
+            manifest = manifests[job.job_type_id]
+            if job.job_type_rev_id not in interfaces:
+                interfaces[job.job_type_rev_id] = job.get_job_interface().get_dict()
 
             if priority:
                 queued_priority = priority
@@ -328,7 +335,7 @@ class QueueManager(models.Manager):
             queue.is_canceled = False
             queue.priority = queued_priority
             queue.timeout = manifest.get_timeout() if manifest else job.timeout
-            queue.interface = job.get_job_interface().get_dict()
+            queue.interface = interfaces[job.job_type_rev_id]
             queue.configuration = config.get_dict()
             if job.get_resources():
                 queue.resources = job.get_resources().get_json().get_dict()
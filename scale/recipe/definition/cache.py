@@ -0,0 +1,78 @@
+"""Defines the cache of parsed recipe definitions for recipe type revisions"""
+from __future__ import unicode_literals
+
+import threading
+from collections import OrderedDict
+
+from recipe.definition.json.definition_v6 import RecipeDefinitionV6
+
+# Maximum number of recipe type revisions whose parsed definitions are cached
+MAX_CACHE_SIZE = 1000
+
+
+class RecipeDefinitionCache(object):
+    """Caches the parsed definition of each recipe type revision, keeping the most recently used definitions. Revisions
+    never change, so a cached definition is never stale. The cached definitions are shared by all callers and must not
+    be modified. This class is thread-safe.
+    """
+
+    def __init__(self, max_size=MAX_CACHE_SIZE):
+        """Constructor
+
+        :param max_size: The maximum number of definitions to cache
+        :type max_size: int
+        """
+
+        self._definitions = OrderedDict()  # {Revision ID: RecipeDefinition}, in least recently used order
+        self._hits = 0
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._misses = 0
+
+    def clear(self):
+        """Clears all cached definitions and resets the counters
+        """
+
+        with self._lock:
+            self._definitions = OrderedDict()
+            self._hits = 0
+            self._misses = 0
+
+    def get_counts(self):
+        """Returns the number of cache hits, cache misses and cached definitions
+
+        :returns: A dict with the hits, misses and size of the cache
+        :rtype: dict
+        """
+
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses, 'size': len(self._definitions)}
+
+    def get_definition(self, revision):
+        """Returns the parsed definition for the given recipe type revision, parsing it if it is not cached. The
+        topological order of the definition is calculated before it is cached.
+
+        :param revision: The recipe type revision model
+        :type revision: :class:`recipe.models.RecipeTypeRevision`
+        :returns: The definition for the revision
+        :rtype: :class:`recipe.definition.definition.RecipeDefinition`
+        """
+
+        with self._lock:
+            definition = self._definitions.pop(revision.id, None)
+            if definition is not None:
+                self._definitions[revision.id] = definition
+                self._hits += 1
+                return definition
+            self._misses += 1
+
+        definition = RecipeDefinitionV6(definition=revision.definition, do_validate=False).get_definition()
+        definition.get_topological_order()
+        with self._lock:
+            self._definitions[revision.id] = definition
+            if len(self._definitions) > self._max_size:
+                self._definitions.popitem(last=False)
+        return definition
+
+
+recipe_definition_cache = RecipeDefinitionCache()
@@ -90,6 +90,21 @@ class CreateConditions(CommandMessage):
 
         return len(self.conditions) < MAX_NUM
 
+    def can_fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.can_fuse`
+        """
+
+        same_recipe = self.recipe_id == message.recipe_id and self.root_recipe_id == message.root_recipe_id
+        same_recipe = same_recipe and self.batch_id == message.batch_id
+        return same_recipe and len(self.conditions) + len(message.conditions) <= MAX_NUM
+
+    def fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.fuse`
+        """
+
+        for condition in message.conditions:
+            self.add_recipe_condition(condition)
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -132,8 +147,11 @@ class CreateConditions(CommandMessage):
         with transaction.atomic():
             self._perform_locking()
             condition_models = self._find_existing_conditions()
-            if not condition_models:
-                condition_models = self._create_conditions()
+            if len(condition_models) < len(set(condition.node_name for condition in self.conditions)):
+                # Fused messages may have already run in part, so only create the missing conditions
+                existing_node_names = set(condition_models.keys())
+                condition_models.update(self._create_conditions(existing_node_names))
+            condition_models = condition_models.values()
 
         process_input_condition_ids = []
         for condition_model in condition_models:
@@ -146,11 +164,13 @@ class CreateConditions(CommandMessage):
 
         return True
 
-    def _create_conditions(self):
+    def _create_conditions(self, existing_node_names):
         """Creates the condition models for the message
 
-        :returns: The list of condition models created
-        :rtype: :func:`list`
+        :param existing_node_names: The names of the nodes whose conditions already exist and should not be created
+        :type existing_node_names: :func:`set`
+        :returns: The condition models created, stored by node name
+        :rtype: dict
         """
 
         condition_models = {}  # {Node name: condition model}
@@ -159,6 +179,8 @@ class CreateConditions(CommandMessage):
         process_input_by_node = {}
         for condition in self.conditions:
             node_name = condition.node_name
+            if node_name in existing_node_names:
+                continue
             process_input_by_node[node_name] = condition.process_input
             condition = RecipeCondition.objects.create_condition(self.recipe_id, root_recipe_id=self.root_recipe_id,
                                                                  batch_id=self.batch_id)
@@ -173,31 +195,31 @@ class CreateConditions(CommandMessage):
 
         # Set up process input dict
         for condition in self.conditions:
-            condition_model = condition_models[condition.node_name]
-            self._process_input[condition_model.id] = condition.process_input
+            if condition.node_name in condition_models:
+                condition_model = condition_models[condition.node_name]
+                self._process_input[condition_model.id] = condition.process_input
 
-        return condition_models.values()
+        return condition_models
 
     def _find_existing_conditions(self):
         """Searches to determine if this message already ran and the conditions already exist
 
-        :returns: The list of condition models found
-        :rtype: :func:`list`
+        :returns: The condition models found, stored by node name
+        :rtype: dict
         """
 
         node_names = [condition.node_name for condition in self.conditions]
         qry = RecipeNode.objects.select_related('condition')
         qry = qry.filter(recipe_id=self.recipe_id, node_name__in=node_names)
         condition_models_by_node = {recipe_node.node_name: recipe_node.condition for recipe_node in qry}
-        condition_models = condition_models_by_node.values()
 
-        if condition_models_by_node:
-            # Set up process input dict
-            for condition in self.conditions:
+        # Set up process input dict
+        for condition in self.conditions:
+            if condition.node_name in condition_models_by_node:
                 condition_model = condition_models_by_node[condition.node_name]
                 self._process_input[condition_model.id] = condition.process_input
 
-        return condition_models
+        return condition_models_by_node
 
     def _perform_locking(self):
         """Performs locking so that multiple messages don't interfere with each other. The caller must be within an
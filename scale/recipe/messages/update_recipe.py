@@ -20,6 +20,10 @@ from recipe.messages.process_recipe_input import create_process_recipe_input_mes
 from recipe.models import Recipe
 
 
+# This is the maximum number of recipes that can be fused into one message. This maximum ensures that each message can
+# be processed quickly.
+MAX_NUM = 100
+
 logger = logging.getLogger(__name__)
 
 
@@ -57,13 +61,18 @@ def create_update_recipe_messages_from_node(root_recipe_ids):
     force_all_nodes.set_all_nodes()
 
     messages = []
+    added_root_recipe_ids = set()
     for root_recipe_id in root_recipe_ids:
-        messages.append(create_update_recipe_message(root_recipe_id, forced_nodes=force_all_nodes))
+        if root_recipe_id not in added_root_recipe_ids:
+            added_root_recipe_ids.add(root_recipe_id)
+            messages.append(create_update_recipe_message(root_recipe_id, forced_nodes=force_all_nodes))
     return messages
 
 
 class UpdateRecipe(CommandMessage):
-    """Command message that evaluates and updates a recipe
+    """Command message that evaluates and updates a recipe. Messages for different recipes with the same forced nodes
+    are fused together, so that repeated updates of the same recipe are evaluated once and the recipes are loaded
+    together.
     """
 
     def __init__(self):
@@ -72,14 +81,56 @@ class UpdateRecipe(CommandMessage):
 
         super(UpdateRecipe, self).__init__('update_recipe')
 
-        self.root_recipe_id = None
+        self.root_recipe_ids = []
         self.forced_nodes = None
 
+    @property
+    def root_recipe_id(self):
+        """Returns the root ID of the (first) recipe to update
+
+        :returns: The root recipe ID
+        :rtype: int
+        """
+
+        return self.root_recipe_ids[0] if self.root_recipe_ids else None
+
+    @root_recipe_id.setter
+    def root_recipe_id(self, value):
+        """Sets the root ID of the single recipe to update
+
+        :param value: The root recipe ID
+        :type value: int
+        """
+
+        self.root_recipe_ids = [value]
+
+    def can_fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.can_fuse`
+        """
+
+        if len(set(self.root_recipe_ids) | set(message.root_recipe_ids)) > MAX_NUM:
+            return False
+        if self.forced_nodes is None or message.forced_nodes is None:
+            return self.forced_nodes is None and message.forced_nodes is None
+        # Forcing all nodes is the only forced nodes that are the same for every recipe
+        return self.forced_nodes.all_nodes and message.forced_nodes.all_nodes
+
+    def fuse(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.fuse`
+        """
+
+        for root_recipe_id in message.root_recipe_ids:
+            if root_recipe_id not in self.root_recipe_ids:
+                self.root_recipe_ids.append(root_recipe_id)
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
 
-        json_dict = {'root_recipe_id': self.root_recipe_id}
+        if len(self.root_recipe_ids) == 1:
+            json_dict = {'root_recipe_id': self.root_recipe_id}
+        else:
+            json_dict = {'root_recipe_ids': self.root_recipe_ids}
 
         if self.forced_nodes:
             json_dict['forced_nodes'] = convert_forced_nodes_to_v6(self.forced_nodes).get_dict()
@@ -92,7 +143,10 @@ class UpdateRecipe(CommandMessage):
         """
 
         message = UpdateRecipe()
-        message.root_recipe_id = json_dict['root_recipe_id']
+        if 'root_recipe_ids' in json_dict:
+            message.root_recipe_ids = list(json_dict['root_recipe_ids'])
+        else:
+            message.root_recipe_id = json_dict['root_recipe_id']
         if 'forced_nodes' in json_dict:
             message.forced_nodes = ForcedNodesV6(json_dict['forced_nodes']).get_forced_nodes()
 
@@ -102,19 +156,36 @@ class UpdateRecipe(CommandMessage):
         """See :meth:`messaging.messages.message.CommandMessage.execute`
         """
 
-        recipe = Recipe.objects.get_recipe_instance_from_root(self.root_recipe_id)
-        recipe_model = recipe.recipe_model
         when = now()
+        create_node_messages = []
+        blocked_job_ids = []
+        pending_job_ids = []
+        completed_recipe_ids = []
+        process_condition_ids = []
+        process_job_ids = []
+        process_recipe_ids = []
 
-        jobs_to_update = recipe.get_jobs_to_update()
-        blocked_job_ids = jobs_to_update['BLOCKED']
-        pending_job_ids = jobs_to_update['PENDING']
+        for recipe in Recipe.objects.get_recipe_instances_from_root(self.root_recipe_ids):
+            recipe_model = recipe.recipe_model
 
-        nodes_to_create = recipe.get_nodes_to_create()
-        nodes_to_process_input = recipe.get_nodes_to_process_input()
+            jobs_to_update = recipe.get_jobs_to_update()
+            blocked_job_ids.extend(jobs_to_update['BLOCKED'])
+            pending_job_ids.extend(jobs_to_update['PENDING'])
+
+            if not recipe_model.is_completed and recipe.has_completed():
+                completed_recipe_ids.append(recipe_model.id)
+
+            nodes_to_process_input = self._create_nodes(recipe, create_node_messages)
+            for node_name, node in nodes_to_process_input.items():
+                if node.node_type == ConditionNodeDefinition.NODE_TYPE:
+                    process_condition_ids.append(node.condition.id)
+                elif node.node_type == JobNodeDefinition.NODE_TYPE:
+                    process_job_ids.append(node.job.id)
+                elif node.node_type == RecipeNodeDefinition.NODE_TYPE:
+                    process_recipe_ids.append(node.recipe.id)
 
-        if not recipe_model.is_completed and recipe.has_completed():
-            Recipe.objects.complete_recipes([recipe_model.id], when)
+        if completed_recipe_ids:
+            Recipe.objects.complete_recipes(completed_recipe_ids, when)
 
         # Create new messages for changing job statuses
         if len(blocked_job_ids):
@@ -124,7 +195,38 @@ class UpdateRecipe(CommandMessage):
             logger.info('Found %d job(s) that should transition to PENDING', len(pending_job_ids))
             self.new_messages.extend(create_pending_jobs_messages(pending_job_ids, when))
 
-        # Create new messages to create recipe nodes
+        # Add the messages to create recipe nodes
+        self.new_messages.extend(create_node_messages)
+
+        # Create new messages for processing recipe node input
+        if len(process_condition_ids):
+            logger.info('Found %d condition(s) to process their input', len(process_condition_ids))
+            self.new_messages.extend(create_process_condition_messages(process_condition_ids))
+        if len(process_job_ids):
+            logger.info('Found %d job(s) to process their input and move to the queue', len(process_job_ids))
+            self.new_messages.extend(create_process_job_input_messages(process_job_ids))
+        if len(process_recipe_ids):
+            logger.info('Found %d sub-recipe(s) to process their input and begin processing', len(process_recipe_ids))
+            self.new_messages.extend(create_process_recipe_input_messages(process_recipe_ids))
+
+        return True
+
+    def _create_nodes(self, recipe, messages):
+        """Creates the messages to create the new nodes of the given recipe and returns the existing nodes that need
+        to process their input
+
+        :param recipe: The recipe instance
+        :type recipe: :class:`recipe.instance.recipe.RecipeInstance`
+        :param messages: The list to add the new messages to
+        :type messages: :func:`list`
+        :returns: The existing nodes that need to process their input, stored by node name
+        :rtype: dict
+        """
+
+        recipe_model = recipe.recipe_model
+        nodes_to_create = recipe.get_nodes_to_create()
+        nodes_to_process_input = recipe.get_nodes_to_process_input()
+
         conditions = []
         recipe_jobs = []
         subrecipes = []
@@ -144,35 +246,13 @@ class UpdateRecipe(CommandMessage):
                 subrecipe = SubRecipe(node_def.recipe_type_name, node_def.revision_num, node_name, process_input)
                 subrecipes.append(subrecipe)
         if len(conditions):
-            logger.info('Found %d condition(s) to create for this recipe', len(conditions))
-            self.new_messages.extend(create_conditions_messages(recipe_model, conditions))
+            logger.info('Found %d condition(s) to create for recipe %d', len(conditions), recipe_model.id)
+            messages.extend(create_conditions_messages(recipe_model, conditions))
         if len(recipe_jobs):
-            logger.info('Found %d job(s) to create for this recipe', len(recipe_jobs))
-            self.new_messages.extend(create_jobs_messages_for_recipe(recipe_model, recipe_jobs))
+            logger.info('Found %d job(s) to create for recipe %d', len(recipe_jobs), recipe_model.id)
+            messages.extend(create_jobs_messages_for_recipe(recipe_model, recipe_jobs))
         if len(subrecipes):
-            logger.info('Found %d sub-recipe(s) to create for this recipe', len(subrecipes))
-            self.new_messages.extend(create_subrecipes_messages(recipe_model, subrecipes,
-                                                                forced_nodes=self.forced_nodes))
+            logger.info('Found %d sub-recipe(s) to create for recipe %d', len(subrecipes), recipe_model.id)
+            messages.extend(create_subrecipes_messages(recipe_model, subrecipes, forced_nodes=self.forced_nodes))
 
-        # Create new messages for processing recipe node input
-        process_condition_ids = []
-        process_job_ids = []
-        process_recipe_ids = []
-        for node_name, node in nodes_to_process_input.items():
-            if node.node_type == ConditionNodeDefinition.NODE_TYPE:
-                process_condition_ids.append(node.condition.id)
-            elif node.node_type == JobNodeDefinition.NODE_TYPE:
-                process_job_ids.append(node.job.id)
-            elif node.node_type == RecipeNodeDefinition.NODE_TYPE:
-                process_recipe_ids.append(node.recipe.id)
-        if len(process_condition_ids):
-            logger.info('Found %d condition(s) to process their input', len(process_condition_ids))
-            self.new_messages.extend(create_process_condition_messages(process_condition_ids))
-        if len(process_job_ids):
-            logger.info('Found %d job(s) to process their input and move to the queue', len(process_job_ids))
-            self.new_messages.extend(create_process_job_input_messages(process_job_ids))
-        if len(process_recipe_ids):
-            logger.info('Found %d sub-recipe(s) to process their input and begin processing', len(process_recipe_ids))
-            self.new_messages.extend(create_process_recipe_input_messages(process_recipe_ids))
-
-        return True
+        return nodes_to_process_input
@@ -19,6 +19,7 @@ from data.interface.parameter import FileParameter
 from job.models import Job, JobType
 from messaging.manager import CommandMessageManager
 from recipe.configuration.json.recipe_config_v6 import convert_config_to_v6_json, RecipeConfigurationV6
+from recipe.definition.cache import recipe_definition_cache
 from recipe.definition.definition import RecipeDefinition
 from recipe.definition.json.definition_v6 import convert_recipe_definition_to_v6_json, RecipeDefinitionV6
 from recipe.definition.node import JobNodeDefinition, RecipeNodeDefinition
@@ -273,6 +274,35 @@ class RecipeManager(models.Manager):
         recipe_nodes = RecipeNode.objects.get_recipe_nodes(recipe.id)
         return RecipeInstance(recipe.recipe_type_rev.get_definition(), recipe, recipe_nodes)
 
+    def get_recipe_instances_from_root(self, root_recipe_ids):
+        """Returns the non-superseded recipe instance for each of the given root recipe IDs, loading the recipe models
+        in one query and the recipe_node models for all of the recipes in another query
+
+        :param root_recipe_ids: The root recipe IDs
+        :type root_recipe_ids: :func:`list`
+        :returns: The recipe instances ordered by root recipe ID, skipping any root recipe IDs that do not exist
+        :rtype: [:class:`recipe.instance.recipe.RecipeInstance`]
+        """
+
+        root_recipe_ids = set(root_recipe_ids)  # Ensure no duplicates
+        qry = self.select_related('recipe_type_rev')
+        qry = qry.filter(models.Q(id__in=root_recipe_ids) | models.Q(root_superseded_recipe_id__in=root_recipe_ids))
+        recipes_by_root = {}  # {Root recipe ID: newest recipe}
+        for recipe in qry.filter(is_superseded=False).order_by('-created'):
+            root_recipe_id = recipe.root_superseded_recipe_id if recipe.root_superseded_recipe_id else recipe.id
+            recipes_by_root.setdefault(root_recipe_id, recipe)
+
+        recipe_nodes = {recipe.id: [] for recipe in recipes_by_root.values()}  # {Recipe ID: [recipe_node]}
+        for recipe_node in RecipeNode.objects.get_recipe_nodes_for_recipes(list(recipe_nodes.keys())):
+            recipe_nodes[recipe_node.recipe_id].append(recipe_node)
+
+        recipe_instances = []
+        for root_recipe_id in sorted(recipes_by_root):
+            recipe = recipes_by_root[root_recipe_id]
+            recipe_instances.append(RecipeInstance(recipe.recipe_type_rev.get_definition(), recipe,
+                                                   recipe_nodes[recipe.id]))
+        return recipe_instances
+
     def get_recipe_with_interfaces(self, recipe_id):
         """Gets the recipe model for the given ID with related recipe_type_rev and recipe__recipe_type_rev models
 
@@ -1052,6 +1082,17 @@ class RecipeNodeManager(models.Manager):
 
         return self.filter(recipe_id=recipe_id).select_related('sub_recipe', 'job', 'condition')
 
+    def get_recipe_nodes_for_recipes(self, recipe_ids):
+        """Returns the recipe_node models with related condition, job, and sub_recipe models for the given recipe IDs
+
+        :param recipe_ids: The recipe IDs
+        :type recipe_ids: :func:`list`
+        :returns: The recipe_node models for the recipes
+        :rtype: :func:`list`
+        """
+
+        return self.filter(recipe_id__in=recipe_ids).select_related('sub_recipe', 'job', 'condition')
+
     def get_recipe_node_outputs(self, recipe_id):
         """Returns the output data for each recipe node for the given recipe ID
 
@@ -1811,13 +1852,16 @@ class RecipeTypeRevision(models.Model):
     objects = RecipeTypeRevisionManager()
 
     def get_definition(self):
-        """Returns the definition for this recipe type revision
+        """Returns the definition for this recipe type revision. The definition of a saved revision is cached and
+        shared, so it must not be modified.
 
         :returns: The definition for this revision
         :rtype: :class:`recipe.definition.definition.RecipeDefinition`
         """
 
-        return RecipeDefinitionV6(definition=self.definition, do_validate=False).get_definition()
+        if self.id is None:
+            return RecipeDefinitionV6(definition=self.definition, do_validate=False).get_definition()
+        return recipe_definition_cache.get_definition(self)
 
     def get_input_interface(self):
         """Returns the input interface for this revision
@@ -0,0 +1,52 @@
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+from mock import MagicMock
+
+import recipe.test.utils as recipe_test_utils
+from recipe.definition.cache import RecipeDefinitionCache
+
+
+class TestRecipeDefinitionCache(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def _create_revision(self, revision_id):
+        revision = MagicMock()
+        revision.id = revision_id
+        revision.definition = recipe_test_utils.RECIPE_DEFINITION
+        return revision
+
+    def test_get_definition(self):
+        """Tests that a revision's definition is parsed once and then returned from the cache"""
+
+        cache = RecipeDefinitionCache()
+        revision = self._create_revision(1)
+
+        definition = cache.get_definition(revision)
+        self.assertListEqual(definition.get_topological_order(), ['node_a', 'node_b', 'node_c', 'node_d'])
+        self.assertIs(cache.get_definition(revision), definition)
+        self.assertIsNot(cache.get_definition(self._create_revision(2)), definition)
+        self.assertDictEqual(cache.get_counts(), {'hits': 1, 'misses': 2, 'size': 2})
+
+        cache.clear()
+        self.assertIsNot(cache.get_definition(revision), definition)
+        self.assertDictEqual(cache.get_counts(), {'hits': 0, 'misses': 1, 'size': 1})
+
+    def test_evict_least_recently_used(self):
+        """Tests that the least recently used definition is evicted when the cache is full"""
+
+        cache = RecipeDefinitionCache(max_size=2)
+        revision_1 = self._create_revision(1)
+        revision_2 = self._create_revision(2)
+        definition_1 = cache.get_definition(revision_1)
+        definition_2 = cache.get_definition(revision_2)
+        cache.get_definition(revision_1)
+
+        cache.get_definition(self._create_revision(3))
+
+        self.assertIs(cache.get_definition(revision_1), definition_1)
+        self.assertIsNot(cache.get_definition(revision_2), definition_2)
+        self.assertEqual(cache.get_counts()['size'], 2)
@@ -86,3 +86,33 @@ class TestCreateConditions(TransactionTestCase):
         process_condition_msg = message.new_messages[0]
         self.assertEqual(process_condition_msg.type, 'process_condition')
         self.assertEqual(process_condition_msg.condition_id, condition_2.id)
+
+    def test_execute_fused(self):
+        """Tests calling CreateConditions.execute() on fused messages where one of the messages already ran"""
+
+        batch = batch_test_utils.create_batch()
+        recipe = recipe_test_utils.create_recipe(batch=batch)
+
+        # Execute the first message
+        message_1 = create_conditions_messages(recipe, [Condition('node_1', False)])[0]
+        self.assertTrue(message_1.execute())
+
+        # Fuse a copy of the first message with a new second message and execute
+        message_1 = create_conditions_messages(recipe, [Condition('node_1', False)])[0]
+        message_2 = create_conditions_messages(recipe, [Condition('node_2', True)])[0]
+        self.assertTrue(message_1.can_fuse(message_2))
+        message_1.fuse(message_2)
+        result = message_1.execute()
+        self.assertTrue(result)
+
+        self.assertEqual(RecipeCondition.objects.filter(recipe_id=recipe.id).count(), 2)
+        recipe_nodes = RecipeNode.objects.select_related('condition').filter(recipe_id=recipe.id).order_by('node_name')
+        self.assertEqual(len(recipe_nodes), 2)
+        self.assertEqual(recipe_nodes[0].node_name, 'node_1')
+        self.assertEqual(recipe_nodes[1].node_name, 'node_2')
+
+        # Should be one message for processing condition for node 2
+        self.assertEqual(len(message_1.new_messages), 1)
+        process_condition_msg = message_1.new_messages[0]
+        self.assertEqual(process_condition_msg.type, 'process_condition')
+        self.assertEqual(process_condition_msg.condition_id, recipe_nodes[1].condition_id)
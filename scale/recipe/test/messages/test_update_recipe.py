@@ -15,7 +15,8 @@ from recipe.diff.forced_nodes import ForcedNodes
 from recipe.diff.json.forced_nodes_v6 import convert_forced_nodes_to_v6
 from recipe.messages.create_conditions import Condition
 from recipe.messages.create_recipes import SUB_RECIPE_TYPE, SubRecipe
-from recipe.messages.update_recipe import create_update_recipe_message, UpdateRecipe
+from recipe.messages.update_recipe import (create_update_recipe_message, create_update_recipe_messages_from_node,
+                                          UpdateRecipe)
 from recipe.models import RecipeNode
 from recipe.test import utils as recipe_test_utils
 
@@ -306,3 +307,64 @@ class TestUpdateRecipe(TestCase):
         self.assertEqual(process_job_input_msg.job_id, job_c.id)
         # Check message to process recipe input
         self.assertEqual(process_recipe_input_msg.recipe_id, recipe_b.id)
+
+    def test_fuse(self):
+        """Tests fusing UpdateRecipe messages together"""
+
+        messages = create_update_recipe_messages_from_node([1, 2, 1])
+        self.assertListEqual([msg.root_recipe_id for msg in messages], [1, 2])
+        message = messages[0]
+        message_2 = messages[1]
+        message_3 = create_update_recipe_messages_from_node([1])[0]
+        forced_nodes = ForcedNodes()
+        forced_nodes.add_node('node_a')
+        message_4 = create_update_recipe_message(3, forced_nodes=forced_nodes)
+        message_5 = create_update_recipe_message(4)
+
+        self.assertTrue(message.can_fuse(message_2))
+        message.fuse(message_2)
+        self.assertTrue(message.can_fuse(message_3))
+        message.fuse(message_3)
+        self.assertFalse(message.can_fuse(message_4))
+        self.assertFalse(message.can_fuse(message_5))
+        self.assertListEqual(message.root_recipe_ids, [1, 2])
+
+        # Convert fused message to JSON and back
+        new_message = UpdateRecipe.from_json(message.to_json())
+        self.assertListEqual(new_message.root_recipe_ids, [1, 2])
+        self.assertTrue(new_message.forced_nodes.all_nodes)
+
+    def test_execute_fused(self):
+        """Tests calling UpdateRecipe.execute() successfully for a message fused from several recipes"""
+
+        data_dict = convert_data_to_v6_json(Data()).get_dict()
+        blocked_job_ids = []
+        messages = []
+        for _ in range(2):
+            job_failed = job_test_utils.create_job(status='FAILED', input=data_dict)
+            job_pending = job_test_utils.create_job(status='PENDING')
+            definition = RecipeDefinition(Interface())
+            definition.add_job_node('job_failed', job_failed.job_type.name, job_failed.job_type.version,
+                                    job_failed.job_type_rev.revision_num)
+            definition.add_job_node('job_pending', job_pending.job_type.name, job_pending.job_type.version,
+                                    job_pending.job_type_rev.revision_num)
+            definition.add_dependency('job_failed', 'job_pending')
+            definition_dict = convert_recipe_definition_to_v6_json(definition).get_dict()
+            recipe_type = recipe_test_utils.create_recipe_type_v6(definition=definition_dict)
+            recipe = recipe_test_utils.create_recipe(recipe_type=recipe_type)
+            recipe_test_utils.create_recipe_job(recipe=recipe, job_name='job_failed', job=job_failed)
+            recipe_test_utils.create_recipe_job(recipe=recipe, job_name='job_pending', job=job_pending)
+            blocked_job_ids.append(job_pending.id)
+            messages.extend(create_update_recipe_messages_from_node([recipe.id]))
+
+        message = messages[0]
+        self.assertTrue(message.can_fuse(messages[1]))
+        message.fuse(messages[1])
+        result = message.execute()
+        self.assertTrue(result)
+
+        # Check for one message to set both job_pending jobs to BLOCKED
+        self.assertEqual(len(message.new_messages), 1)
+        msg = message.new_messages[0]
+        self.assertEqual(msg.type, 'blocked_jobs')
+        self.assertSetEqual(set(msg._blocked_job_ids), set(blocked_job_ids))
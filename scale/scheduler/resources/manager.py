@@ -31,6 +31,7 @@ class ResourceManager(object):
         self._last_watermark_reset = None
         self._new_offers = {}  # {Offer ID: ResourceOffer}
         self._new_offers_lock = threading.Lock()  # Protects self._new_offers
+        self.new_offers_event = threading.Event()  # Set when new offers are added
         self._mesos_error = None
         self._mesos_error_started = None
 
@@ -44,6 +45,8 @@ class ResourceManager(object):
         with self._new_offers_lock:
             for offer in offers:
                 self._new_offers[offer.id] = offer
+        if offers:
+            self.new_offers_event.set()
 
     def allocate_offers(self, resources, when):
         """Directs all agents to allocate offers sufficient to match the given resources. Any offers that have been held
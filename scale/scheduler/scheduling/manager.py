@@ -2,8 +2,10 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+import cProfile
 import datetime
 import logging
+import os
 
 from django.db import transaction
 from django.db.utils import DatabaseError
@@ -26,6 +28,8 @@ from scheduler.manager import scheduler_mgr, SchedulerWarning
 from scheduler.node.manager import node_mgr
 from scheduler.resources.agent import ResourceSet
 from scheduler.resources.manager import resource_mgr
+from scheduler.scheduling.metrics import generation_metrics
+from scheduler.scheduling.queue_index import QueueIndex
 from scheduler.scheduling.scheduling_node import SchedulingNode
 from scheduler.sync.job_type_manager import job_type_mgr
 from scheduler.sync.workspace_manager import workspace_mgr
@@ -66,10 +70,15 @@ class SchedulingManager(object):
         """Constructor
         """
 
+        self._generation_count = 0
+        self._phase_timings = {}  # {Phase: seconds} for the current generation
+        self._queue_index = QueueIndex()
         self._waiting_tasks = {}  # {Task ID: int}
 
     def perform_scheduling(self, client, when):
-        """Organizes and analyzes the cluster resources, schedules new job executions, and launches tasks
+        """Organizes and analyzes the cluster resources, schedules new job executions, and launches tasks. The time spent
+        in each phase of the generation is recorded, and one in every SCHEDULER_PROFILE_PERIOD generations is profiled.
+        No generation is run or recorded until the scheduler has connected to Mesos.
 
         :param client: The Mesos scheduler client
         :type client: :class:`mesoshttp.client.MesosClient`
@@ -78,44 +87,41 @@ class SchedulingManager(object):
         :returns: The number of tasks that were scheduled
         :rtype: int
         """
-        # Get framework ID first to make sure it doesn't change throughout scheduling process
-        framework_id = scheduler_mgr.framework_id
-        if not framework_id or not client or not client.get_driver():
+
+        if not scheduler_mgr.framework_id or not client or not client.get_driver():
             # Don't schedule anything until the scheduler has connected to Mesos
             logger.warning('Scheduler not connected to Mesos. Scheduling delayed until connection established.')
             return 0
 
-        job_types = job_type_mgr.get_job_types()
-        job_type_resources = job_type_mgr.get_job_type_resources()
-        tasks = task_mgr.get_all_tasks()
-        running_job_exes = job_exe_mgr.get_running_job_exes()
-        workspaces = workspace_mgr.get_workspaces()
-        nodes = self._prepare_nodes(tasks, running_job_exes, when)
-        fulfilled_nodes = self._schedule_waiting_tasks(nodes, running_job_exes, when)
-
-        sys_tasks_scheduled = self._schedule_system_tasks(fulfilled_nodes, job_type_resources, when)
+        started = now()
+        self._generation_count += 1
+        self._phase_timings = {}
 
-        job_exe_count = 0
-        if sys_tasks_scheduled:
-            # Only schedule new job executions if all needed system tasks have been scheduled
-            job_type_limits = self._calculate_job_type_limits(job_types, running_job_exes)
-            job_exe_count = self._schedule_new_job_exes(framework_id, fulfilled_nodes, job_types, job_type_limits,
-                                                        job_type_resources, workspaces)
+        profile_period = scale_settings.SCHEDULER_PROFILE_PERIOD
+        if profile_period and self._generation_count % profile_period == 0:
+            task_count = self._profile_scheduling(client, when)
         else:
-            logger.warning('No new jobs scheduled due to waiting system tasks')
-            scheduler_mgr.warning_active(WAITING_SYSTEM_TASKS)
-
-        if framework_id != scheduler_mgr.framework_id:
-            logger.warning('Scheduler framework ID changed, skipping task launch')
-            return 0
+            task_count = self._perform_scheduling(client, when)
 
-        self._allocate_offers(nodes)
-        declined = resource_mgr.decline_offers()
-        self._decline_offers(declined)
-        task_count, offer_count = self._launch_tasks(client, nodes)
-        scheduler_mgr.add_scheduling_counts(job_exe_count, task_count, offer_count)
+        self._add_phase_timing('total', started)
+        generation_metrics.add_generation(self._phase_timings)
         return task_count
 
+    def _add_phase_timing(self, phase, started):
+        """Adds the time elapsed since the given start time to the given phase of the current generation
+
+        :param phase: The name of the scheduling phase
+        :type phase: string
+        :param started: When the phase started
+        :type started: :class:`datetime.datetime`
+        :returns: The current time
+        :rtype: :class:`datetime.datetime`
+        """
+
+        ended = now()
+        self._phase_timings[phase] = self._phase_timings.get(phase, 0.0) + (ended - started).total_seconds()
+        return ended
+
     def _allocate_offers(self, nodes):
         """Allocates resource offers to the node
 
@@ -263,6 +269,59 @@ class SchedulingManager(object):
                         declined_resources)
         return total_task_count, total_offer_count
 
+    def _perform_scheduling(self, client, when):
+        """Performs a scheduling generation, see
+        :meth:`scheduler.scheduling.manager.SchedulingManager.perform_scheduling`
+
+        :param client: The Mesos scheduler client
+        :type client: :class:`mesoshttp.client.MesosClient`
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        :returns: The number of tasks that were scheduled
+        :rtype: int
+        """
+
+        # Get framework ID first to make sure it doesn't change throughout scheduling process
+        framework_id = scheduler_mgr.framework_id
+
+        phase_started = now()
+        job_types = job_type_mgr.get_job_types()
+        job_type_resources = job_type_mgr.get_job_type_resources()
+        tasks = task_mgr.get_all_tasks()
+        running_job_exes = job_exe_mgr.get_running_job_exes()
+        workspaces = workspace_mgr.get_workspaces()
+        nodes = self._prepare_nodes(tasks, running_job_exes, when)
+        phase_started = self._add_phase_timing('prepare_nodes', phase_started)
+        fulfilled_nodes = self._schedule_waiting_tasks(nodes, running_job_exes, when)
+        phase_started = self._add_phase_timing('waiting_tasks', phase_started)
+
+        sys_tasks_scheduled = self._schedule_system_tasks(fulfilled_nodes, job_type_resources, when)
+        self._add_phase_timing('system_tasks', phase_started)
+
+        job_exe_count = 0
+        if sys_tasks_scheduled:
+            # Only schedule new job executions if all needed system tasks have been scheduled
+            job_type_limits = self._calculate_job_type_limits(job_types, running_job_exes)
+            job_exe_count = self._schedule_new_job_exes(framework_id, fulfilled_nodes, job_types, job_type_limits,
+                                                        job_type_resources, workspaces)
+        else:
+            logger.warning('No new jobs scheduled due to waiting system tasks')
+            scheduler_mgr.warning_active(WAITING_SYSTEM_TASKS)
+
+        if framework_id != scheduler_mgr.framework_id:
+            logger.warning('Scheduler framework ID changed, skipping task launch')
+            return 0
+
+        phase_started = now()
+        self._allocate_offers(nodes)
+        declined = resource_mgr.decline_offers()
+        self._decline_offers(declined)
+        phase_started = self._add_phase_timing('allocate_offers', phase_started)
+        task_count, offer_count = self._launch_tasks(client, nodes)
+        self._add_phase_timing('launch', phase_started)
+        scheduler_mgr.add_scheduling_counts(job_exe_count, task_count, offer_count)
+        return task_count
+
     def _prepare_nodes(self, tasks, running_job_exes, when):
         """Prepares the nodes to use for scheduling
 
@@ -346,7 +405,9 @@ class SchedulingManager(object):
           
         ignore_job_type_ids = self._calculate_job_types_to_ignore(job_types, job_type_limits)
         max_cluster_resources = resource_mgr.get_max_available_resources()
-        for queue in Queue.objects.get_queue(scheduler_mgr.config.queue_mode, ignore_job_type_ids)[:QUEUE_LIMIT]:
+        queues = self._queue_index.get_queue(scheduler_mgr.config.queue_mode, ignore_job_type_ids, QUEUE_LIMIT)
+        scoring_started = self._add_phase_timing('queue_query', started)
+        for queue in queues:
             job_exe = QueuedJobExecution(queue)
 
             # Canceled job executions get processed as scheduled executions
@@ -354,7 +415,7 @@ class SchedulingManager(object):
                 scheduled_job_executions.append(job_exe)
                 continue
 
-            jt = job_type_mgr.get_job_type(queue.job_type.id)
+            jt = job_type_mgr.get_job_type(queue.job_type_id)
             name = INVALID_RESOURCES.name + jt.name
             title = INVALID_RESOURCES.title % jt.name
             warning = SchedulerWarning(name=name, title=title, description=None)
@@ -443,6 +504,7 @@ class SchedulingManager(object):
                 if job_type_id in job_type_limits:
                     job_type_limits[job_type_id] -= 1
 
+        self._add_phase_timing('scoring', scoring_started)
         duration = now() - started
         if type_warnings:
             for warn in type_warnings:
@@ -459,7 +521,8 @@ class SchedulingManager(object):
     @retry_database_query(max_tries=5, base_ms_delay=1000, max_ms_delay=5000)
     def _process_scheduled_job_executions(self, framework_id, queued_job_executions, job_types, workspaces):
         """Processes the given queued job executions that have been scheduled and returns the new running job
-        executions. All database updates occur in an atomic transaction.
+        executions. The job executions are configured up front so that the atomic transaction only covers the database
+        writes.
 
         :param framework_id: The scheduling framework ID
         :type framework_id: string
@@ -473,55 +536,74 @@ class SchedulingManager(object):
         :rtype: dict
         """
 
-        started = now()
         running_job_exes = {}
+        if not queued_job_executions:
+            return running_job_exes
+
+        started = now()
         configurator = ScheduledExecutionConfigurator(workspaces)
+        system_logging_level = scheduler_mgr.config.system_logging_level
+
+        # Retrieve the job configurations needed to configure the executions in a single query
+        job_ids = [queued_job_exe.job_id for queued_job_exe in queued_job_executions if not queued_job_exe.is_canceled]
+        jobs = {}
+        for job in Job.objects.filter(id__in=job_ids).only('id', 'job_type_id', 'configuration'):
+            if job.job_type_id in job_types:
+                job.job_type = job_types[job.job_type_id]
+            jobs[job.id] = job
+
+        # Create and configure the job execution models
+        job_exe_models = []
+        queue_ids = []
+        scheduled_models = {}  # {queue ID: (job_exe model, config)}
+        canceled_models = {}  # {queue ID: job_exe model}
+        for queued_job_exe in queued_job_executions:
+            job_exe_model = queued_job_exe.create_job_exe_model(framework_id, started)
+            job_exe_models.append(job_exe_model)
+            queue_ids.append(queued_job_exe.id)
+            if queued_job_exe.is_canceled:
+                canceled_models[queued_job_exe.id] = job_exe_model
+            else:
+                if job_exe_model.job_id in jobs:
+                    job_exe_model.job = jobs[job_exe_model.job_id]
+                job_type = job_types[job_exe_model.job_type_id]
+                # The configuration stored in the job_exe model has been censored so it is safe to save in database
+                # The returned configuration may contain secrets and should be passed to running job_exe for use
+                config = configurator.configure_scheduled_job(job_exe_model, job_type, queued_job_exe.interface,
+                                                              system_logging_level)
+                scheduled_models[queued_job_exe.id] = (job_exe_model, config)
+        phase_started = self._add_phase_timing('configuration', started)
 
         with transaction.atomic():
-            # Bulk create the job execution models
-            job_exe_models = []
-            scheduled_models = {}  # {queue ID: (job_exe model, config)}
-            canceled_models = {}  # {queue ID: job_exe model}
-            for queued_job_exe in queued_job_executions:
-                job_exe_model = queued_job_exe.create_job_exe_model(framework_id, started)
-                job_exe_models.append(job_exe_model)
-                if queued_job_exe.is_canceled:
-                    canceled_models[queued_job_exe.id] = job_exe_model
-                else:
-                    job_type = job_types[job_exe_model.job_type_id]
-                    # The configuration stored in the job_exe model has been censored so it is safe to save in database
-                    # The returned configuration may contain secrets and should be passed to running job_exe for use
-                    config = configurator.configure_scheduled_job(job_exe_model, job_type, queued_job_exe.interface, scheduler_mgr.config.system_logging_level)
-                    scheduled_models[queued_job_exe.id] = (job_exe_model, config)
+            # Bulk create the job execution models and delete the queue models
             JobExecution.objects.bulk_create(job_exe_models)
+            Queue.objects.filter(id__in=queue_ids).delete()
 
-            # Create running and canceled job executions
-            queue_ids = []
-            canceled_job_exe_end_models = []
-            for queued_job_exe in queued_job_executions:
-                queue_ids.append(queued_job_exe.id)
-                if queued_job_exe.is_canceled:
-                    job_exe_model = canceled_models[queued_job_exe.id]
-                    canceled_job_exe_end_models.append(job_exe_model.create_canceled_job_exe_end_model(started))
+        # Create running and canceled job executions
+        canceled_job_exe_end_models = []
+        for queued_job_exe in queued_job_executions:
+            if queued_job_exe.is_canceled:
+                job_exe_model = canceled_models[queued_job_exe.id]
+                canceled_job_exe_end_models.append(job_exe_model.create_canceled_job_exe_end_model(started))
+            else:
+                agent_id = queued_job_exe.scheduled_agent_id
+                job_exe_model = scheduled_models[queued_job_exe.id][0]
+                job_type = job_types[job_exe_model.job_type_id]
+                config = scheduled_models[queued_job_exe.id][1]  # May contain secrets!
+                priority = queued_job_exe.priority
+                running_job_exe = RunningJobExecution(agent_id, job_exe_model, job_type, config, priority)
+                if running_job_exe.node_id in running_job_exes:
+                    running_job_exes[running_job_exe.node_id].append(running_job_exe)
                 else:
-                    agent_id = queued_job_exe.scheduled_agent_id
-                    job_exe_model = scheduled_models[queued_job_exe.id][0]
-                    job_type = job_types[job_exe_model.job_type_id]
-                    config = scheduled_models[queued_job_exe.id][1]  # May contain secrets!
-                    priority = queued_job_exe.priority
-                    running_job_exe = RunningJobExecution(agent_id, job_exe_model, job_type, config, priority)
-                    if running_job_exe.node_id in running_job_exes:
-                        running_job_exes[running_job_exe.node_id].append(running_job_exe)
-                    else:
-                        running_job_exes[running_job_exe.node_id] = [running_job_exe]
+                    running_job_exes[running_job_exe.node_id] = [running_job_exe]
 
-            # Add canceled job execution end models to manager to be sent to messaging backend
-            if canceled_job_exe_end_models:
-                job_exe_mgr.add_canceled_job_exes(canceled_job_exe_end_models)
+        # Add canceled job execution end models to manager to be sent to messaging backend
+        if canceled_job_exe_end_models:
+            job_exe_mgr.add_canceled_job_exes(canceled_job_exe_end_models)
 
-            # Delete queue models
-            Queue.objects.filter(id__in=queue_ids).delete()
+        self._queue_index.remove(queue_ids)
 
+        self._add_phase_timing('database', phase_started)
         duration = now() - started
         msg = 'Queries to process scheduled jobs took %.3f seconds'
         if duration > SCHEDULE_QUERY_WARN_THRESHOLD:
@@ -531,6 +613,33 @@ class SchedulingManager(object):
 
         return running_job_exes
 
+    def _profile_scheduling(self, client, when):
+        """Performs a scheduling generation under cProfile and dumps the profile statistics to a file in
+        SCHEDULER_PROFILE_DIR. The file name includes the process ID and start time so that profiles are not
+        overwritten after the scheduler restarts.
+
+        :param client: The Mesos scheduler client
+        :type client: :class:`mesoshttp.client.MesosClient`
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        :returns: The number of tasks that were scheduled
+        :rtype: int
+        """
+
+        started = now()
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(self._perform_scheduling, client, when)
+        finally:
+            file_name = 'scheduling_generation_%d_%s_%d.prof' % (os.getpid(), started.strftime('%Y%m%dT%H%M%S'),
+                                                                  self._generation_count)
+            path = os.path.join(scale_settings.SCHEDULER_PROFILE_DIR, file_name)
+            try:
+                profile.dump_stats(path)
+                logger.info('Scheduling generation profile written to %s', path)
+            except (IOError, OSError):
+                logger.exception('Failed to write scheduling generation profile to %s', path)
+
     def _schedule_new_job_exe(self, job_exe, nodes, job_type_resources):
         """Schedules the given job execution on the queue on one of the available nodes, if possible
 
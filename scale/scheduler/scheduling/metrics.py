@@ -0,0 +1,92 @@
+"""Defines the class that collects per-phase timings of scheduling generations"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import threading
+from collections import deque
+
+# The phases of a scheduling generation in the order they occur
+PHASES = ['prepare_nodes', 'waiting_tasks', 'system_tasks', 'queue_query', 'scoring', 'configuration', 'database',
+          'allocate_offers', 'launch', 'total']
+
+# Number of recent generations kept for the rolling timing statistics
+GENERATION_WINDOW = 300
+
+
+class GenerationMetrics(object):
+    """This class keeps a rolling window of the time spent in each phase of recent scheduling generations. This class
+    is thread-safe."""
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._generation_count = 0
+        self._lock = threading.Lock()
+        self._timings = {phase: deque(maxlen=GENERATION_WINDOW) for phase in PHASES}  # {Phase: [seconds]}
+
+    def add_generation(self, phase_timings):
+        """Adds the phase timings of a completed scheduling generation
+
+        :param phase_timings: The duration in seconds of each phase that ran, stored by phase name
+        :type phase_timings: dict
+        """
+
+        with self._lock:
+            self._generation_count += 1
+            for phase, duration in phase_timings.items():
+                if phase in self._timings:
+                    self._timings[phase].append(duration)
+
+    def generate_status_json(self, scheduler_dict):
+        """Generates the portion of the status JSON that describes the scheduling generation timings
+
+        :param scheduler_dict: The scheduler portion of the status JSON dict
+        :type scheduler_dict: dict
+        """
+
+        with self._lock:
+            generation_count = self._generation_count
+            timings = {phase: list(durations) for phase, durations in self._timings.items()}
+
+        phases_dict = {}
+        for phase in PHASES:
+            durations = sorted(timings[phase])
+            if not durations:
+                continue
+            phases_dict[phase] = {'count': len(durations), 'avg_ms': self._to_ms(sum(durations) / len(durations)),
+                                  'p50_ms': self._to_ms(self._percentile(durations, 50)),
+                                  'p90_ms': self._to_ms(self._percentile(durations, 90)),
+                                  'p99_ms': self._to_ms(self._percentile(durations, 99)),
+                                  'max_ms': self._to_ms(durations[-1])}
+
+        scheduler_dict['generations'] = {'count': generation_count, 'phases': phases_dict}
+
+    def _percentile(self, sorted_durations, percent):
+        """Returns the given percentile of the sorted durations using the nearest-rank method
+
+        :param sorted_durations: The sorted list of durations, must not be empty
+        :type sorted_durations: :func:`list`
+        :param percent: The percentile to return
+        :type percent: int
+        :returns: The duration at the percentile
+        :rtype: float
+        """
+
+        index = int(round(percent / 100 * len(sorted_durations))) - 1
+        return sorted_durations[min(max(index, 0), len(sorted_durations) - 1)]
+
+    def _to_ms(self, seconds):
+        """Converts the given duration to milliseconds, rounded for the status JSON
+
+        :param seconds: The duration in seconds
+        :type seconds: float
+        :returns: The duration in milliseconds
+        :rtype: float
+        """
+
+        return round(seconds * 1000.0, 1)
+
+
+generation_metrics = GenerationMetrics()
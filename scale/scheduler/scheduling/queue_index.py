@@ -0,0 +1,202 @@
+"""Defines the class that maintains an in-memory index of the queue for scheduling"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import bisect
+import datetime
+import logging
+
+from django.utils.timezone import now, utc
+
+from queue.models import Queue, QUEUE_ORDER_FIFO, QUEUE_ORDER_LIFO
+
+# How often the entire index is reconciled against the queue table. Reconciling picks up queue models that were
+# deleted outside of the scheduler and queue models that were committed out of ID order.
+RECONCILE_PERIOD = datetime.timedelta(seconds=30)
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=utc)
+
+logger = logging.getLogger(__name__)
+
+
+class QueueIndex(object):
+    """This class maintains a priority-ordered index of the queue so that the top of the queue can be retrieved each
+    scheduling generation without sorting the entire queue table in the database. The index is loaded once and then
+    updated incrementally: new queue models are found using a high-water mark on the queue ID, scheduled queue models
+    are removed as they are deleted, and the full index is periodically reconciled against the queue table. Only the
+    queue models at the top of the index are held in memory. This class is NOT thread-safe and should only be used
+    within the scheduling thread.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._entries = {}  # {Queue ID: (priority, queued seconds, job type ID)}
+        self._high_water_id = 0
+        self._last_reconcile = None
+        self._order_mode = None
+        self._queue_models = {}  # {Queue ID: Queue model}, only for the top of the queue
+        self._sorted_keys = []  # [(priority, queued order, Queue ID)]
+
+    def get_queue(self, order_mode, ignore_job_type_ids=None, limit=None):
+        """Returns the queue models at the top of the queue sorted according to their priority first, and then
+        according to the provided mode. This is equivalent to :meth:`queue.models.QueueManager.get_queue`.
+
+        :param order_mode: The mode determining how to order the queue (FIFO or LIFO)
+        :type order_mode: string
+        :param ignore_job_type_ids: The list of job type IDs to ignore
+        :type ignore_job_type_ids: :func:`list`
+        :param limit: The maximum number of queue models to return, None for no limit
+        :type limit: int
+        :returns: The list of queue models
+        :rtype: list[:class:`queue.models.Queue`]
+        """
+
+        self._sync(order_mode)
+
+        ignore_job_type_ids = set(ignore_job_type_ids) if ignore_job_type_ids else set()
+        queue_ids = []
+        for sort_key in self._sorted_keys:
+            if limit is not None and len(queue_ids) >= limit:
+                break
+            queue_id = sort_key[2]
+            if self._entries[queue_id][2] not in ignore_job_type_ids:
+                queue_ids.append(queue_id)
+
+        return self._get_queue_models(queue_ids)
+
+    def remove(self, queue_ids):
+        """Removes the given queue models from the index, typically because they have been scheduled and deleted
+
+        :param queue_ids: The list of queue IDs to remove
+        :type queue_ids: :func:`list`
+        """
+
+        for queue_id in queue_ids:
+            self._queue_models.pop(queue_id, None)
+            entry = self._entries.pop(queue_id, None)
+            if entry is None:
+                continue
+            sort_key = self._get_sort_key(queue_id, entry)
+            index = bisect.bisect_left(self._sorted_keys, sort_key)
+            if index < len(self._sorted_keys) and self._sorted_keys[index] == sort_key:
+                del self._sorted_keys[index]
+
+    def _add_new_queue_models(self):
+        """Adds the queue models that have been created since the last update to the index
+        """
+
+        query = Queue.objects.filter(id__gt=self._high_water_id)
+        for queue_id, job_type_id, priority, queued in query.values_list('id', 'job_type_id', 'priority', 'queued'):
+            if queue_id in self._entries:
+                continue
+            entry = (priority, (queued - EPOCH).total_seconds(), job_type_id)
+            self._entries[queue_id] = entry
+            bisect.insort(self._sorted_keys, self._get_sort_key(queue_id, entry))
+            self._high_water_id = max(self._high_water_id, queue_id)
+
+    def _get_queue_models(self, queue_ids):
+        """Returns the queue models for the given IDs in the same order. Queue models that are already cached have
+        their canceled flag refreshed and any queue models that no longer exist are removed from the index.
+
+        :param queue_ids: The ordered list of queue IDs
+        :type queue_ids: :func:`list`
+        :returns: The list of queue models
+        :rtype: list[:class:`queue.models.Queue`]
+        """
+
+        if not queue_ids:
+            self._queue_models = {}
+            return []
+
+        # Queue models may be canceled or deleted at any time outside of the scheduler
+        query = Queue.objects.filter(id__in=queue_ids).values_list('id', 'is_canceled')
+        canceled_flags = {queue_id: is_canceled for queue_id, is_canceled in query}
+
+        missing_ids = [queue_id for queue_id in queue_ids
+                       if queue_id in canceled_flags and queue_id not in self._queue_models]
+        if missing_ids:
+            for queue in Queue.objects.filter(id__in=missing_ids).iterator():
+                self._queue_models[queue.id] = queue
+
+        queue_models = {}
+        deleted_ids = []
+        for queue_id in queue_ids:
+            queue = self._queue_models.get(queue_id)
+            if queue_id not in canceled_flags or queue is None:
+                deleted_ids.append(queue_id)
+                continue
+            queue.is_canceled = canceled_flags[queue_id]
+            queue_models[queue_id] = queue
+
+        # Only keep the current top of the queue cached
+        self._queue_models = queue_models
+        if deleted_ids:
+            self.remove(deleted_ids)
+
+        return [queue_models[queue_id] for queue_id in queue_ids if queue_id in queue_models]
+
+    def _get_sort_key(self, queue_id, entry):
+        """Returns the sort key for the given index entry according to the current order mode
+
+        :param queue_id: The queue ID
+        :type queue_id: int
+        :param entry: The index entry
+        :type entry: tuple
+        :returns: The sort key
+        :rtype: tuple
+        """
+
+        priority, queued, _ = entry
+        if self._order_mode == QUEUE_ORDER_FIFO:
+            return priority, queued, queue_id
+        elif self._order_mode == QUEUE_ORDER_LIFO:
+            return priority, -queued, queue_id
+        return priority, 0, queue_id
+
+    def _reconcile(self):
+        """Reloads the entire index from the queue table
+        """
+
+        started = now()
+
+        entries = {}
+        high_water_id = 0
+        for queue_id, job_type_id, priority, queued in Queue.objects.values_list('id', 'job_type_id', 'priority',
+                                                                                 'queued'):
+            entries[queue_id] = (priority, (queued - EPOCH).total_seconds(), job_type_id)
+            high_water_id = max(high_water_id, queue_id)
+
+        self._entries = entries
+        self._high_water_id = high_water_id
+        self._sort()
+
+        duration = now() - started
+        logger.debug('Reconciling queue index with %d queued job(s) took %.3f seconds', len(entries),
+                     duration.total_seconds())
+
+    def _sort(self):
+        """Sorts the entire index according to the current order mode
+        """
+
+        self._sorted_keys = sorted(self._get_sort_key(queue_id, entry) for queue_id, entry in self._entries.items())
+
+    def _sync(self, order_mode):
+        """Brings the index up to date with the queue table
+
+        :param order_mode: The mode determining how to order the queue (FIFO or LIFO)
+        :type order_mode: string
+        """
+
+        when = now()
+        if self._last_reconcile is None or when - self._last_reconcile >= RECONCILE_PERIOD:
+            self._order_mode = order_mode
+            self._reconcile()
+            self._last_reconcile = when
+            return
+
+        if order_mode != self._order_mode:
+            self._order_mode = order_mode
+            self._sort()
+        self._add_new_queue_models()
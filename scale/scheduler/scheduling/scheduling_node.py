@@ -54,6 +54,11 @@ class SchedulingNode(object):
         self._remaining_resources.add(self._offered_resources)
         self._task_resources = resource_set.task_resources
         self._watermark_resources = resource_set.watermark_resources
+
+        # Scores only change when this node's allocations change, so they are cached for each distinct set of required
+        # resources (many queued job executions share the same resources) and cleared on every allocation
+        self._scores = {}  # {(Score type, priority, resources key): score}
+        self._scores_job_type_resources = None  # The job type resources that the cached scores were calculated with
         if int(resource_set.offered_resources.gpus) > 0:
             GPUManager.define_node_gpus(self.node_id, int(resource_set.offered_resources.gpus))
 
@@ -82,6 +87,7 @@ class SchedulingNode(object):
             self._allocated_running_job_exes.append(job_exe)
             self.allocated_resources.add(task_resources)
             self._remaining_resources.subtract(task_resources)
+            self._scores = {}
             return False
 
         # Not enough resources, so add task to waiting list
@@ -110,6 +116,7 @@ class SchedulingNode(object):
             self._allocated_queued_job_exes.append(job_exe)
             self.allocated_resources.add(resources)
             self._remaining_resources.subtract(resources)
+            self._scores = {}
             job_exe.scheduled(self.agent_id, self.node_id, resources)
 
             return True
@@ -135,6 +142,7 @@ class SchedulingNode(object):
                 self.allocated_tasks.append(task)
                 self.allocated_resources.add(task_resources)
                 self._remaining_resources.subtract(task_resources)
+                self._scores = {}
             else:
                 waiting_tasks.append(task)
                 result = True
@@ -158,6 +166,7 @@ class SchedulingNode(object):
             self.allocated_tasks.append(system_task)
             self.allocated_resources.add(task_resources)
             self._remaining_resources.subtract(task_resources)
+            self._scores = {}
             return True
 
         return False
@@ -175,6 +184,7 @@ class SchedulingNode(object):
             offer_resources.add(offer.resources)
 
         self.allocated_offers = offers
+        self._scores = {}
 
         # If the offers are not enough to cover what we allocated, drop all job execution tasks
         if not offer_resources.is_sufficient_to_meet(self.allocated_resources):
@@ -203,6 +213,7 @@ class SchedulingNode(object):
 
         self._allocated_queued_job_exes = []
         self._allocated_running_job_exes.extend(job_exes)
+        self._scores = {}
 
     def reset_new_job_exes(self):
         """Resets the allocated new job executions and deallocates any resources associated with them
@@ -218,6 +229,7 @@ class SchedulingNode(object):
         self._allocated_queued_job_exes = []
         self.allocated_resources.subtract(resources)
         self._remaining_resources.add(resources)
+        self._scores = {}
 
     def score_job_exe_for_reservation(self, job_exe, job_type_resources):
         """Returns an integer score (lower is better) indicating how well this node is a fit for reserving (temporarily
@@ -233,6 +245,24 @@ class SchedulingNode(object):
         :rtype: int
         """
 
+        score_key = ('reservation', job_exe.priority, self._get_resources_key(job_exe.required_resources))
+        scores = self._get_scores(job_type_resources)
+        if score_key not in scores:
+            scores[score_key] = self._score_job_exe_for_reservation(job_exe, job_type_resources)
+        return scores[score_key]
+
+    def _score_job_exe_for_reservation(self, job_exe, job_type_resources):
+        """Calculates the score for reserving this node for the given job execution, see
+        :meth:`scheduler.scheduling.scheduling_node.SchedulingNode.score_job_exe_for_reservation`
+
+        :param job_exe: The job execution to score
+        :type job_exe: :class:`queue.job_exe.QueuedJobExecution`
+        :param job_type_resources: The list of all of the job type resource requirements
+        :type job_type_resources: :func:`list`
+        :returns: The integer score, possibly None
+        :rtype: int
+        """
+
         # Calculate available resources for lower priority jobs
         available_resources = NodeResources()
         available_resources.add(self._watermark_resources)
@@ -277,7 +307,12 @@ class SchedulingNode(object):
         :rtype: int
         """
 
-        return self._score_resources_for_scheduling(job_exe.required_resources, job_type_resources)
+        resources = job_exe.required_resources
+        score_key = ('scheduling', None, self._get_resources_key(resources))
+        scores = self._get_scores(job_type_resources)
+        if score_key not in scores:
+            scores[score_key] = self._score_resources_for_scheduling(resources, job_type_resources)
+        return scores[score_key]
 
     def score_system_task_for_scheduling(self, system_task, job_type_resources):
         """Returns an integer score (lower is better) indicating how well the given system task fits on this node for
@@ -303,6 +338,31 @@ class SchedulingNode(object):
                 self.allocated_tasks.append(task)
         self._allocated_running_job_exes = []
 
+    def _get_resources_key(self, resources):
+        """Returns a hashable key identifying the given resources
+
+        :param resources: The resources
+        :type resources: :class:`node.resources.node_resources.NodeResources`
+        :returns: The key for the resources
+        :rtype: tuple
+        """
+
+        return tuple(sorted((resource.name, resource.value) for resource in resources.resources))
+
+    def _get_scores(self, job_type_resources):
+        """Returns the dict of cached scores for the given job type resources
+
+        :param job_type_resources: The list of all of the job type resource requirements
+        :type job_type_resources: :func:`list`
+        :returns: The cached scores
+        :rtype: dict
+        """
+
+        if job_type_resources is not self._scores_job_type_resources:
+            self._scores = {}
+            self._scores_job_type_resources = job_type_resources
+        return self._scores
+
     def _score_resources_for_scheduling(self, resources, job_type_resources):
         """Returns an integer score (lower is better) indicating how well the given resources fit on this node for
         scheduling. If the resources cannot be scheduled on this node, None is returned.
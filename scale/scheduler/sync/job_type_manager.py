@@ -4,6 +4,7 @@ from __future__ import unicode_literals
 import logging
 import threading
 
+from job.execution.configuration.configurators import job_type_template_cache
 from job.models import JobType
 from job.seed.exceptions import InvalidSeedMetadataDefinition
 
@@ -18,9 +19,11 @@ class JobTypeManager(object):
         """Constructor
         """
 
-        self._job_type_resources = []
+        self._job_type_resources = {}  # {Job Type ID: NodeResources}
+        self._job_type_versions = {}  # {Job Type ID: (revision_num, last_modified)}, includes invalid job types
         self._job_types = {}  # {Job Type ID: Job Type}
         self._lock = threading.Lock()
+        self._parsed_manifests = {}  # {(Job Type ID, revision_num): (title, description, resources) or None}
 
     def generate_status_json(self, status_dict):
         """Generates the portion of the status JSON that describes the job types
@@ -60,7 +63,7 @@ class JobTypeManager(object):
         """
 
         with self._lock:
-            return list(self._job_type_resources)
+            return list(self._job_type_resources.values())
 
     def get_job_types(self):
         """Returns a dict of all job types, stored by ID
@@ -73,24 +76,75 @@ class JobTypeManager(object):
             return dict(self._job_types)
 
     def sync_with_database(self):
-        """Syncs with the database to retrieve updated job type models
+        """Syncs with the database to retrieve updated job type models. Only the job types that were added or modified
+        since the last sync are retrieved, and the Seed manifest of each job type revision is only parsed once.
         """
 
-        update_job_type_resources = []
-        updated_job_types = {}
-        for job_type in JobType.objects.all().iterator():
-            try:
-                job_type.title = job_type.get_title()
-                job_type.description = job_type.get_description()
-                updated_job_types[job_type.id] = job_type
-                update_job_type_resources.append(job_type.get_resources())
-            except InvalidSeedMetadataDefinition as ex:
-                logger.exception('Invalid Seed manifest for job type %s-%s, id=%d' % (job_type.name, job_type.version, job_type.id))
-                pass
+        db_versions = {}  # {Job Type ID: (revision_num, last_modified)}
+        for job_type_id, revision_num, last_modified in JobType.objects.values_list('id', 'revision_num',
+                                                                                    'last_modified'):
+            db_versions[job_type_id] = (revision_num, last_modified)
 
         with self._lock:
-            self._job_type_resources = update_job_type_resources
-            self._job_types = updated_job_types
+            job_type_resources = dict(self._job_type_resources)
+            job_type_versions = dict(self._job_type_versions)
+            job_types = dict(self._job_types)
+        old_revisions = {(job_type.id, job_type.revision_num) for job_type in job_types.values()}
+
+        # Forget job types that have been removed
+        for job_type_id in set(job_type_versions) - set(db_versions):
+            del job_type_versions[job_type_id]
+            job_types.pop(job_type_id, None)
+            job_type_resources.pop(job_type_id, None)
+
+        changed_ids = [job_type_id for job_type_id, version in db_versions.items()
+                       if job_type_versions.get(job_type_id) != version]
+        if changed_ids:
+            for job_type in JobType.objects.filter(id__in=changed_ids).iterator():
+                job_type_versions[job_type.id] = (job_type.revision_num, job_type.last_modified)
+                parsed_manifest = self._parse_manifest(job_type)
+                if parsed_manifest:
+                    job_type.title, job_type.description, job_type_resources[job_type.id] = parsed_manifest
+                    job_types[job_type.id] = job_type
+                else:
+                    job_types.pop(job_type.id, None)
+                    job_type_resources.pop(job_type.id, None)
+            logger.debug('Synced %d added or modified job type(s)', len(changed_ids))
+
+        # Only keep parsed manifests for the current revision of each job type
+        current_revisions = {(job_type_id, version[0]) for job_type_id, version in job_type_versions.items()}
+        for revision in set(self._parsed_manifests) - current_revisions:
+            del self._parsed_manifests[revision]
 
+        with self._lock:
+            self._job_type_resources = job_type_resources
+            self._job_type_versions = job_type_versions
+            self._job_types = job_types
+
+        # Drop cached configuration templates when job types have been added, removed, or given new revisions
+        new_revisions = {(job_type.id, job_type.revision_num) for job_type in job_types.values()}
+        if new_revisions != old_revisions:
+            job_type_template_cache.clear()
+
+    def _parse_manifest(self, job_type):
+        """Returns the title, description and resources from the Seed manifest of the given job type, parsing the
+        manifest only if this revision of the job type has not been parsed before
+
+        :param job_type: The job type model
+        :type job_type: :class:`job.models.JobType`
+        :returns: The tuple of title, description and resources, or None if the manifest is invalid
+        :rtype: tuple
+        """
+
+        revision = (job_type.id, job_type.revision_num)
+        if revision not in self._parsed_manifests:
+            try:
+                self._parsed_manifests[revision] = (job_type.get_title(), job_type.get_description(),
+                                                    job_type.get_resources())
+            except InvalidSeedMetadataDefinition:
+                logger.exception('Invalid Seed manifest for job type %s-%s, id=%d', job_type.name, job_type.version,
+                                 job_type.id)
+                self._parsed_manifests[revision] = None
+        return self._parsed_manifests[revision]
 
 job_type_mgr = JobTypeManager()
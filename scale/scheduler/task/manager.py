@@ -3,26 +3,54 @@ from __future__ import unicode_literals
 
 import logging
 import threading
+import time
+from collections import OrderedDict
 
-from job.models import TaskUpdate
+from django.db import connection
+from django.db.utils import InterfaceError, OperationalError
+from django.utils.timezone import now
+from psycopg2.extras import execute_values
+
+from scale import settings as scale_settings
 from util.retry import retry_database_query
 
 
 logger = logging.getLogger(__name__)
 
+# The task update columns inserted into the database, in order
+INSERT_COLUMNS = ['job_exe_id', 'task_id', 'status', 'timestamp', 'source', 'reason', 'message', 'created']
+
 
 class TaskUpdateManager(object):
-    """This class pushes task status updates to the database. This class is thread-safe."""
+    """This class pushes task status updates to the database. Updates are queued in memory by the scheduler and saved
+    in large multi-row inserts by the task update thread. Updates that cannot be saved because the database is
+    unavailable are kept and retried on the next push, up to a limit. This class is thread-safe."""
 
-    COUNT_WARNING_THRESHOLD = 1000  # If the total list count hits this threshold, log a warning
-    MAX_BATCH_SIZE = 500  # The maximum number of status update models to save to the database in a single batch
+    COUNT_WARNING_THRESHOLD = 20000  # If the pending count hits this threshold, log a warning
+    MAX_BATCH_SIZE = 5000  # The maximum number of status update models to save to the database in a single batch
+    MAX_KEPT_COUNT = 100000  # The maximum number of updates kept after a failed push, the oldest are dropped
 
-    def __init__(self):
+    def __init__(self, coalesce=None):
         """Constructor
+
+        :param coalesce: Whether to only save the most recent of the pending updates for each task, defaults to the
+            TASK_UPDATE_COALESCE setting
+        :type coalesce: bool
         """
 
-        self._task_updates = []
+        self._coalesce = scale_settings.TASK_UPDATE_COALESCE if coalesce is None else coalesce
         self._lock = threading.Lock()
+        self._task_updates = []
+        self.new_updates_event = threading.Event()  # Set when task updates are added
+
+        # Metrics
+        self._coalesced_count = 0
+        self._dropped_count = 0
+        self._failed_push_count = 0
+        self._last_push_count = 0
+        self._last_push_secs = 0.0
+        self._max_pending_count = 0
+        self._pushed_count = 0
 
     def add_task_update(self, task_update):
         """Adds the given task update to the manager so it can be pushed to the database
@@ -34,9 +62,31 @@ class TaskUpdateManager(object):
         if task_update:
             with self._lock:
                 self._task_updates.append(task_update)
+                self._max_pending_count = max(self._max_pending_count, len(self._task_updates))
+            self.new_updates_event.set()
+
+    def generate_status_json(self, scheduler_dict):
+        """Generates the portion of the status JSON that describes the task update persistence. The maximum pending
+        count is reset each time the status is generated.
+
+        :param scheduler_dict: The scheduler portion of the status JSON dict
+        :type scheduler_dict: dict
+        """
+
+        with self._lock:
+            scheduler_dict['task_updates'] = {'pending': len(self._task_updates),
+                                              'max_pending': self._max_pending_count,
+                                              'pushed': self._pushed_count, 'coalesced': self._coalesced_count,
+                                              'failed_pushes': self._failed_push_count,
+                                              'dropped': self._dropped_count,
+                                              'last_push_count': self._last_push_count,
+                                              'last_push_ms': int(self._last_push_secs * 1000)}
+            self._max_pending_count = len(self._task_updates)
 
     def push_to_database(self):
-        """Pushes the recent status updates to the database
+        """Pushes the recent status updates to the database. If the database connection fails, it is closed so that
+        the next push reconnects, the unsaved updates are put back in front of any newer updates (dropping the oldest
+        beyond MAX_KEPT_COUNT) and the error is raised.
 
         :returns: The total number of status updates pushed
         :rtype: int
@@ -50,30 +100,80 @@ class TaskUpdateManager(object):
         if total_count >= TaskUpdateManager.COUNT_WARNING_THRESHOLD:
             logger.warning('%i task updates waiting to be pushed to database', total_count)
 
-        models = []
-        count = 0
-        for task_update in task_updates:
-            # TODO: currently only save job task updates, once job_exe_id field in TaskUpdate model allows nulls then
-            # save all models to database
-            if task_update.job_exe_id:
-                models.append(task_update)
-                count += 1
-            if count >= TaskUpdateManager.MAX_BATCH_SIZE:
-                self._bulk_save(models)
-                models = []
-                count = 0
-        if models:
-            self._bulk_save(models)
+        coalesced_count = 0
+        if self._coalesce:
+            task_updates = self._coalesce_updates(task_updates)
+            coalesced_count = total_count - len(task_updates)
+
+        started = time.time()
+        pushed_count = 0
+        try:
+            while pushed_count < len(task_updates):
+                batch = task_updates[pushed_count:pushed_count + TaskUpdateManager.MAX_BATCH_SIZE]
+                self._bulk_save(batch)
+                pushed_count += len(batch)
+        except Exception as ex:
+            # Only keep the updates if the database was unavailable, other errors would just repeat
+            is_unavailable = isinstance(ex, (InterfaceError, OperationalError))
+            if is_unavailable:
+                connection.close()
+            with self._lock:
+                if is_unavailable:
+                    self._task_updates = task_updates[pushed_count:] + self._task_updates
+                    dropped_count = len(self._task_updates) - TaskUpdateManager.MAX_KEPT_COUNT
+                    if dropped_count > 0:
+                        logger.warning('Dropping the %i oldest task updates that could not be pushed to database',
+                                       dropped_count)
+                        self._task_updates = self._task_updates[dropped_count:]
+                        self._dropped_count += dropped_count
+                self._failed_push_count += 1
+                self._pushed_count += pushed_count
+                self._coalesced_count += coalesced_count
+            raise
+        duration = time.time() - started
+
+        with self._lock:
+            self._coalesced_count += coalesced_count
+            self._last_push_count = pushed_count
+            self._last_push_secs = duration
+            self._pushed_count += pushed_count
+
+        if pushed_count:
+            logger.debug('Pushed %i task updates to database in %.3f seconds', pushed_count, duration)
+        return pushed_count
 
     @retry_database_query
     def _bulk_save(self, models):
-        """Performs a bulk save of the given task update models
+        """Performs a bulk save of the given task update models using a multi-row insert
 
         :param models: The list of task update models
         :type models: [:class:`job.models.TaskUpdate`]
         """
 
-        TaskUpdate.objects.bulk_create(models)
+        when = now()
+        rows = []
+        for model in models:
+            model.created = when
+            rows.append(tuple(getattr(model, column) for column in INSERT_COLUMNS))
+
+        qry = 'INSERT INTO task_update (%s) VALUES %%s' % ', '.join(INSERT_COLUMNS)
+        with connection.cursor() as cursor:
+            execute_values(cursor, qry, rows, page_size=len(rows))
+
+    def _coalesce_updates(self, task_updates):
+        """Returns the most recent of the given task updates for each task, in the order of those most recent updates
+
+        :param task_updates: The task update models in the order they were received
+        :type task_updates: [:class:`job.models.TaskUpdate`]
+        :returns: The coalesced task update models
+        :rtype: [:class:`job.models.TaskUpdate`]
+        """
+
+        latest_updates = OrderedDict()  # {Task ID: task update}
+        for task_update in task_updates:
+            latest_updates.pop(task_update.task_id, None)
+            latest_updates[task_update.task_id] = task_update
+        return list(latest_updates.values())
 
 
 task_update_mgr = TaskUpdateManager()
@@ -1,6 +1,9 @@
 """Defines the class for a message handler task"""
 from __future__ import unicode_literals
 
+from django.conf import settings
+
+from job.execution.configuration.docker_param import DockerParameter
 from job.tasks.base_task import AtomicCounter
 from node.resources.node_resources import NodeResources
 from node.resources.resource import Cpus, Mem
@@ -28,6 +31,10 @@ class MessageHandlerTask(SystemTask):
 
         self._add_database_docker_params()
         self._add_messaging_docker_params()
+        self._docker_params.append(DockerParameter('env', 'MESSAGE_HANDLER_WORKERS=%d' %
+                                                   settings.MESSAGE_HANDLER_WORKERS))
+        self._docker_params.append(DockerParameter('env', 'MESSAGE_FUSION_WINDOW=%d' %
+                                                   settings.MESSAGE_FUSION_WINDOW))
         self._command_arguments = 'scale_message_handler'
 
         # System task properties
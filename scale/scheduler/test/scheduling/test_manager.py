@@ -88,6 +88,21 @@ class TestSchedulingManager(TestCase):
         self.assertEqual(JobExecution.objects.filter(job_id=self.queue_2.job_id).count(), 1)
         self.assertEqual(JobExecution.objects.filter(job_id=self.queue_large.job_id).count(), 0)
         self.assertEqual(Queue.objects.filter(id__in=[self.queue_1.id, self.queue_2.id]).count(), 0)
+        # Configuring the job executions is timed separately from saving them
+        self.assertIn('configuration', scheduling_manager._phase_timings)
+        self.assertIn('database', scheduling_manager._phase_timings)
+
+    @patch('scheduler.scheduling.manager.generation_metrics')
+    def test_not_connected(self, generation_metrics):
+        """Tests calling perform_scheduling() before the scheduler has connected to Mesos"""
+
+        self._client.get_driver.return_value = None
+        scheduling_manager = SchedulingManager()
+        num_tasks = scheduling_manager.perform_scheduling(self._client, now())
+
+        self.assertEqual(num_tasks, 0)
+        # Generations that do not run are not recorded
+        generation_metrics.add_generation.assert_not_called()
 
     def test_increased_resources(self):
         """Tests calling perform_scheduling() with more resources"""
@@ -277,6 +292,15 @@ class TestSchedulingManager(TestCase):
                 found_job_exe_end_message = True
         self.assertTrue(found_job_exe_end_message)
 
+    def test_process_scheduled_job_executions_none(self):
+        """Tests that processing no scheduled job executions does not query the database"""
+
+        scheduling_manager = SchedulingManager()
+
+        with self.assertNumQueries(0):
+            running_job_exes = scheduling_manager._process_scheduled_job_executions(self.framework_id, [], {}, {})
+        self.assertDictEqual(running_job_exes, {})
+
     def test_schedule_system_tasks(self):
         """Tests successfully calling perform_scheduling() when scheduling system tasks"""
         offer_1 = ResourceOffer('offer_1', self.agent_1.agent_id, self.framework_id,
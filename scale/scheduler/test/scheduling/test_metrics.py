@@ -0,0 +1,45 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+
+from scheduler.scheduling.metrics import GenerationMetrics, GENERATION_WINDOW
+
+
+class TestGenerationMetrics(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def test_generate_status_json(self):
+        """Tests calling generate_status_json() after adding generations"""
+
+        metrics = GenerationMetrics()
+        for i in range(1, 11):
+            metrics.add_generation({'queue_query': i / 1000.0, 'total': i / 100.0, 'unknown': 1.0})
+
+        scheduler_dict = {}
+        metrics.generate_status_json(scheduler_dict)
+
+        self.assertEqual(scheduler_dict['generations']['count'], 10)
+        phases_dict = scheduler_dict['generations']['phases']
+        self.assertSetEqual(set(phases_dict.keys()), {'queue_query', 'total'})
+        self.assertDictEqual(phases_dict['queue_query'], {'count': 10, 'avg_ms': 5.5, 'p50_ms': 5.0, 'p90_ms': 9.0,
+                                                          'p99_ms': 10.0, 'max_ms': 10.0})
+        self.assertEqual(phases_dict['total']['max_ms'], 100.0)
+
+    def test_rolling_window(self):
+        """Tests that only the most recent generations are included in the timing statistics"""
+
+        metrics = GenerationMetrics()
+        metrics.add_generation({'total': 10.0})
+        for _ in range(GENERATION_WINDOW):
+            metrics.add_generation({'total': 0.001})
+
+        scheduler_dict = {}
+        metrics.generate_status_json(scheduler_dict)
+
+        self.assertEqual(scheduler_dict['generations']['count'], GENERATION_WINDOW + 1)
+        self.assertEqual(scheduler_dict['generations']['phases']['total']['count'], GENERATION_WINDOW)
+        self.assertEqual(scheduler_dict['generations']['phases']['total']['max_ms'], 1.0)
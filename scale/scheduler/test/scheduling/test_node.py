@@ -696,6 +696,39 @@ class TestSchedulingNode(TestCase):
                                                                        job_type_resource_3, job_type_resource_4])
         self.assertEqual(score, 2)
 
+    def test_score_job_exe_for_scheduling_after_allocation(self):
+        """Tests calling score_job_exe_for_scheduling() again after the node accepts a job execution with the same
+        required resources"""
+
+        node = MagicMock()
+        node.hostname = 'host_1'
+        node.id = 1
+        node.is_ready_for_new_job = MagicMock()
+        node.is_ready_for_new_job.return_value = True
+        node.is_ready_for_next_job_task = MagicMock()
+        node.is_ready_for_next_job_task.return_value = True
+        offered_resources = NodeResources([Cpus(20.0), Mem(100.0)])
+        task_resources = NodeResources()
+        watermark_resources = NodeResources([Cpus(20.0), Mem(100.0)])
+        resource_set = ResourceSet(offered_resources, task_resources, watermark_resources)
+        scheduling_node = SchedulingNode('agent_1', node, [], [], resource_set)
+        job_type_resources = [NodeResources([Cpus(5.0), Mem(10.0)])]
+
+        queue_model_1 = queue_test_utils.create_queue(cpus_required=10.0, mem_required=40.0, disk_in_required=0.0,
+                                                      disk_out_required=0.0, disk_total_required=0.0)
+        job_exe_1 = QueuedJobExecution(queue_model_1)
+        queue_model_2 = queue_test_utils.create_queue(cpus_required=10.0, mem_required=40.0, disk_in_required=0.0,
+                                                      disk_out_required=0.0, disk_total_required=0.0)
+        job_exe_2 = QueuedJobExecution(queue_model_2)
+
+        # Job type fits in the 10 CPUs and 60 MiB memory left after the job execution
+        self.assertEqual(scheduling_node.score_job_exe_for_scheduling(job_exe_1, job_type_resources), 1)
+        self.assertEqual(scheduling_node.score_job_exe_for_scheduling(job_exe_2, job_type_resources), 1)
+
+        # After accepting the first job execution, the second one fits exactly and the job type no longer fits
+        self.assertTrue(scheduling_node.accept_new_job_exe(job_exe_1))
+        self.assertEqual(scheduling_node.score_job_exe_for_scheduling(job_exe_2, job_type_resources), 0)
+
     def test_score_job_exe_for_scheduling_insufficient_resources(self):
         """Tests calling score_job_exe_for_scheduling() when there are not enough resources to schedule the job"""
 
@@ -0,0 +1,69 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import datetime
+
+import django
+from django.test import TestCase
+from django.utils.timezone import now
+
+import job.test.utils as job_test_utils
+import queue.test.utils as queue_test_utils
+from queue.models import Queue, QUEUE_ORDER_FIFO, QUEUE_ORDER_LIFO
+from scheduler.scheduling.queue_index import QueueIndex
+
+
+class TestQueueIndex(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.when = now()
+        self.queue_1 = queue_test_utils.create_queue(priority=2, queued=self.when)
+        self.queue_2 = queue_test_utils.create_queue(priority=1, queued=self.when)
+        self.queue_3 = queue_test_utils.create_queue(priority=2, queued=self.when + datetime.timedelta(seconds=1))
+
+    def test_get_queue(self):
+        """Tests calling get_queue() with FIFO and LIFO ordering"""
+
+        queue_index = QueueIndex()
+
+        queues = queue_index.get_queue(QUEUE_ORDER_FIFO)
+        self.assertListEqual([queue.id for queue in queues], [self.queue_2.id, self.queue_1.id, self.queue_3.id])
+
+        queues = queue_index.get_queue(QUEUE_ORDER_LIFO)
+        self.assertListEqual([queue.id for queue in queues], [self.queue_2.id, self.queue_3.id, self.queue_1.id])
+
+    def test_get_queue_limit_and_ignore(self):
+        """Tests calling get_queue() with a limit and job types to ignore"""
+
+        queue_index = QueueIndex()
+
+        queues = queue_index.get_queue(QUEUE_ORDER_FIFO, [self.queue_2.job_type_id], 1)
+        self.assertListEqual([queue.id for queue in queues], [self.queue_1.id])
+
+    def test_get_queue_incremental(self):
+        """Tests calling get_queue() after queue models are created, canceled and deleted"""
+
+        queue_index = QueueIndex()
+        queue_index.get_queue(QUEUE_ORDER_FIFO)
+
+        job_type = job_test_utils.create_seed_job_type()
+        queue_4 = queue_test_utils.create_queue(job_type=job_type, priority=1, queued=self.when)
+        Queue.objects.filter(id=self.queue_1.id).update(is_canceled=True)
+        Queue.objects.filter(id=self.queue_3.id).delete()
+
+        queues = queue_index.get_queue(QUEUE_ORDER_FIFO)
+        self.assertListEqual([queue.id for queue in queues], [self.queue_2.id, queue_4.id, self.queue_1.id])
+        self.assertTrue(queues[2].is_canceled)
+
+    def test_remove(self):
+        """Tests calling remove() for scheduled queue models"""
+
+        queue_index = QueueIndex()
+        queue_index.get_queue(QUEUE_ORDER_FIFO)
+
+        queue_index.remove([self.queue_2.id])
+
+        queues = queue_index.get_queue(QUEUE_ORDER_FIFO)
+        self.assertListEqual([queue.id for queue in queues], [self.queue_1.id, self.queue_3.id])
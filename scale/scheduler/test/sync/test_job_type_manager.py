@@ -2,7 +2,10 @@ from __future__ import unicode_literals
 
 import django
 from django.test import TestCase
+from mock import patch
 
+from job.models import JobType
+from job.test import utils as job_test_utils
 from scheduler.sync.job_type_manager import JobTypeManager
 
 
@@ -22,3 +25,39 @@ class TestJobTypeManager(TestCase):
         manager.generate_status_json(status_dict)
 
         self.assertEqual(len(status_dict['job_types']), 1)
+
+    @patch('job.models.JobType.get_title', autospec=True)
+    def test_incremental_sync(self, mock_get_title):
+        """Tests that a sync only reloads modified job types and only parses each manifest revision once"""
+
+        mock_get_title.side_effect = lambda job_type: 'Title %d-%d' % (job_type.id, job_type.revision_num)
+        job_type = job_test_utils.create_seed_job_type()
+        job_type_count = JobType.objects.count()
+
+        manager = JobTypeManager()
+        manager.sync_with_database()
+        self.assertEqual(mock_get_title.call_count, job_type_count)
+        self.assertEqual(len(manager.get_job_types()), job_type_count)
+        self.assertEqual(len(manager.get_job_type_resources()), job_type_count)
+
+        # Nothing changed
+        with patch('scheduler.sync.job_type_manager.JobType.objects.filter') as mock_filter:
+            manager.sync_with_database()
+        self.assertFalse(mock_filter.called)
+        self.assertEqual(mock_get_title.call_count, job_type_count)
+
+        # Modified without a new revision, so the model is reloaded but the manifest is not parsed again
+        job_type.max_scheduled = 5
+        job_type.save()
+        manager.sync_with_database()
+        self.assertEqual(manager.get_job_type(job_type.id).max_scheduled, 5)
+        self.assertEqual(manager.get_job_type(job_type.id).title, 'Title %d-1' % job_type.id)
+        self.assertEqual(mock_get_title.call_count, job_type_count)
+
+        # New revision
+        job_type.revision_num = 2
+        job_type.save()
+        manager.sync_with_database()
+        self.assertEqual(manager.get_job_type(job_type.id).title, 'Title %d-2' % job_type.id)
+        self.assertEqual(mock_get_title.call_count, job_type_count + 1)
+        self.assertEqual(len(manager.get_job_type_resources()), job_type_count)
@@ -0,0 +1,104 @@
+from __future__ import unicode_literals
+
+import django
+from django.db.utils import OperationalError
+from django.test import TestCase
+from mock import patch
+
+from job.models import TaskUpdate
+from job.test import utils as job_test_utils
+from scheduler.task.manager import TaskUpdateManager
+
+
+class TestTaskUpdateManager(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.job_exe = job_test_utils.create_job_exe()
+
+    def _create_update(self, task_id, status, job_exe_id=None):
+        task_update = TaskUpdate()
+        task_update.job_exe_id = job_exe_id
+        task_update.task_id = task_id
+        task_update.status = status
+        return task_update
+
+    def test_push_to_database(self):
+        """Tests pushing job and system task updates to the database"""
+
+        task_update_mgr = TaskUpdateManager(coalesce=False)
+        task_update_mgr.add_task_update(self._create_update('job_task', 'TASK_RUNNING', self.job_exe.id))
+        task_update_mgr.add_task_update(self._create_update('job_task', 'TASK_FINISHED', self.job_exe.id))
+        task_update_mgr.add_task_update(self._create_update('system_task', 'TASK_RUNNING'))
+
+        with patch('scheduler.task.manager.TaskUpdateManager.MAX_BATCH_SIZE', 2):
+            count = task_update_mgr.push_to_database()
+
+        self.assertEqual(count, 3)
+        updates = TaskUpdate.objects.order_by('id')
+        self.assertListEqual([(u.job_exe_id, u.task_id, u.status) for u in updates],
+                             [(self.job_exe.id, 'job_task', 'TASK_RUNNING'),
+                              (self.job_exe.id, 'job_task', 'TASK_FINISHED'),
+                              (None, 'system_task', 'TASK_RUNNING')])
+        self.assertTrue(all(u.created for u in updates))
+        self.assertEqual(task_update_mgr.push_to_database(), 0)
+
+    def test_push_to_database_coalesce(self):
+        """Tests pushing only the most recent update for each task to the database"""
+
+        task_update_mgr = TaskUpdateManager(coalesce=True)
+        task_update_mgr.add_task_update(self._create_update('task_1', 'TASK_STAGING'))
+        task_update_mgr.add_task_update(self._create_update('task_2', 'TASK_RUNNING'))
+        task_update_mgr.add_task_update(self._create_update('task_1', 'TASK_RUNNING'))
+
+        self.assertEqual(task_update_mgr.push_to_database(), 2)
+
+        updates = TaskUpdate.objects.order_by('id')
+        self.assertListEqual([(u.task_id, u.status) for u in updates],
+                             [('task_2', 'TASK_RUNNING'), ('task_1', 'TASK_RUNNING')])
+        scheduler_dict = {}
+        task_update_mgr.generate_status_json(scheduler_dict)
+        self.assertEqual(scheduler_dict['task_updates']['pushed'], 2)
+        self.assertEqual(scheduler_dict['task_updates']['coalesced'], 1)
+        self.assertEqual(scheduler_dict['task_updates']['max_pending'], 3)
+
+    @patch('util.retry.time.sleep')
+    def test_push_to_database_unavailable(self, mock_sleep):
+        """Tests that task updates are kept when the database is unavailable"""
+
+        task_update_mgr = TaskUpdateManager(coalesce=False)
+        task_update_mgr.add_task_update(self._create_update('task_1', 'TASK_RUNNING'))
+
+        with patch('scheduler.task.manager.execute_values', side_effect=OperationalError):
+            with patch('scheduler.task.manager.connection.close') as close:
+                self.assertRaises(OperationalError, task_update_mgr.push_to_database)
+        # The broken connection is closed so that the next push reconnects
+        close.assert_called_once_with()
+        task_update_mgr.add_task_update(self._create_update('task_2', 'TASK_RUNNING'))
+
+        self.assertEqual(task_update_mgr.push_to_database(), 2)
+        self.assertListEqual([u.task_id for u in TaskUpdate.objects.order_by('id')], ['task_1', 'task_2'])
+        scheduler_dict = {}
+        task_update_mgr.generate_status_json(scheduler_dict)
+        self.assertEqual(scheduler_dict['task_updates']['failed_pushes'], 1)
+        self.assertEqual(scheduler_dict['task_updates']['pending'], 0)
+
+    @patch('util.retry.time.sleep')
+    @patch('scheduler.task.manager.TaskUpdateManager.MAX_KEPT_COUNT', 2)
+    def test_push_to_database_unavailable_limit(self, mock_sleep):
+        """Tests that only the newest task updates are kept when the database is unavailable"""
+
+        task_update_mgr = TaskUpdateManager(coalesce=False)
+        for task_id in ['task_1', 'task_2', 'task_3']:
+            task_update_mgr.add_task_update(self._create_update(task_id, 'TASK_RUNNING'))
+
+        with patch('scheduler.task.manager.execute_values', side_effect=OperationalError):
+            with patch('scheduler.task.manager.connection.close'):
+                self.assertRaises(OperationalError, task_update_mgr.push_to_database)
+
+        self.assertEqual(task_update_mgr.push_to_database(), 2)
+        self.assertListEqual([u.task_id for u in TaskUpdate.objects.order_by('id')], ['task_2', 'task_3'])
+        scheduler_dict = {}
+        task_update_mgr.generate_status_json(scheduler_dict)
+        self.assertEqual(scheduler_dict['task_updates']['dropped'], 1)
@@ -0,0 +1,100 @@
+from __future__ import unicode_literals
+
+import datetime
+import threading
+
+import django
+from django.test import TestCase
+
+from scheduler.threads.base_thread import BaseSchedulerThread
+
+
+class LoopCountingThread(BaseSchedulerThread):
+    """Test thread that counts its loops and signals each one"""
+
+    def __init__(self, throttle, wakeup_event=None, wakeup_delay=None):
+        super(LoopCountingThread, self).__init__('Test', throttle, datetime.timedelta(seconds=10),
+                                                 wakeup_event=wakeup_event, wakeup_delay=wakeup_delay)
+        self.loop_count = 0
+        self.looped = threading.Semaphore(0)
+
+    def _execute(self):
+        self.loop_count += 1
+        self.looped.release()
+
+
+class TestBaseSchedulerThread(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def _acquire(self, semaphore, timeout):
+        """Acquires the semaphore, returning False if it is not released within the timeout"""
+
+        waited = threading.Event()
+        for _ in range(int(timeout * 100)):
+            if semaphore.acquire(False):
+                return True
+            waited.wait(0.01)
+        return False
+
+    def test_wakeup(self):
+        """Tests that setting the wakeup event starts the next loop before the throttle duration elapses"""
+
+        wakeup_event = threading.Event()
+        scheduler_thread = LoopCountingThread(datetime.timedelta(minutes=10), wakeup_event=wakeup_event)
+        thread = threading.Thread(target=scheduler_thread.run)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            self.assertTrue(self._acquire(scheduler_thread.looped, 5))
+            self.assertFalse(self._acquire(scheduler_thread.looped, 0.2))
+
+            wakeup_event.set()
+            self.assertTrue(self._acquire(scheduler_thread.looped, 5))
+            self.assertEqual(scheduler_thread.loop_count, 2)
+        finally:
+            scheduler_thread.shutdown()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_wakeup_delay(self):
+        """Tests that wakeups arriving within the wakeup delay are handled in a single loop"""
+
+        wakeup_event = threading.Event()
+        scheduler_thread = LoopCountingThread(datetime.timedelta(minutes=10), wakeup_event=wakeup_event,
+                                              wakeup_delay=datetime.timedelta(milliseconds=500))
+        thread = threading.Thread(target=scheduler_thread.run)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            self.assertTrue(self._acquire(scheduler_thread.looped, 5))
+
+            wakeup_event.set()
+            threading.Event().wait(0.1)
+            wakeup_event.set()
+            self.assertTrue(self._acquire(scheduler_thread.looped, 5))
+            self.assertFalse(self._acquire(scheduler_thread.looped, 0.2))
+            self.assertEqual(scheduler_thread.loop_count, 2)
+        finally:
+            scheduler_thread.shutdown()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+    def test_throttle(self):
+        """Tests that the thread loops again after a sub-second throttle duration without being woken up"""
+
+        scheduler_thread = LoopCountingThread(datetime.timedelta(milliseconds=50))
+        thread = threading.Thread(target=scheduler_thread.run)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            for _ in range(3):
+                self.assertTrue(self._acquire(scheduler_thread.looped, 0.5))
+        finally:
+            scheduler_thread.shutdown()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
@@ -2,7 +2,7 @@
 from __future__ import unicode_literals
 
 import logging
-import math
+import threading
 import time
 from abc import ABCMeta
 
@@ -18,20 +18,28 @@ class BaseSchedulerThread(object):
 
     __metaclass__ = ABCMeta
 
-    def __init__(self, name, throttle, warning_threshold):
+    def __init__(self, name, throttle, warning_threshold, wakeup_event=None, wakeup_delay=None):
         """Constructor
 
         :param name: The name of this thread
         :type name: string
-        :param throttle: A loop of this thread should occur no more than once per this duration
+        :param throttle: Unless woken up, a loop of this thread should occur no more than once per this duration
         :type throttle: :class:`datetime.timedelta`
         :param warning_threshold: A warning is logged if loop execution exceeds this duration
         :type warning_threshold: :class:`datetime.timedelta`
+        :param wakeup_event: An event that is set when there is new work for this thread, which starts the next loop
+            without waiting for the rest of the throttle duration
+        :type wakeup_event: :class:`threading.Event`
+        :param wakeup_delay: After being woken up, the thread waits this long (but no longer than the rest of the
+            throttle duration) before starting the next loop so that work arriving in a burst is handled in one loop
+        :type wakeup_delay: :class:`datetime.timedelta`
         """
 
         self._name = name
         self._running = True
         self._throttle = throttle
+        self._wakeup_delay = wakeup_delay
+        self._wakeup_event = wakeup_event if wakeup_event else threading.Event()
         self._warning_threshold = warning_threshold
 
     def run(self):
@@ -43,6 +51,8 @@ class BaseSchedulerThread(object):
         while self._running:
 
             started = now()
+            # Clear before executing so that work added during the loop wakes up the next loop
+            self._wakeup_event.clear()
 
             try:
                 self._execute()
@@ -66,10 +76,14 @@ class BaseSchedulerThread(object):
                 logger.debug(msg, self._name, duration.total_seconds())
 
             # If time takes less than threshold, throttle
-            if duration < self._throttle:
-                # Delay until full throttle time reached
-                delay = math.ceil(self._throttle.total_seconds() - duration.total_seconds())
-                time.sleep(delay)
+            if duration < self._throttle and self._running:
+                # Delay until full throttle time reached or until woken up by new work
+                woken = self._wakeup_event.wait((self._throttle - duration).total_seconds())
+                if woken and self._wakeup_delay and self._running:
+                    # Gather any more work that arrives shortly after the wakeup
+                    delay = min(self._wakeup_delay, self._throttle - (now() - started))
+                    if delay.total_seconds() > 0:
+                        time.sleep(delay.total_seconds())
 
         logger.info('%s thread stopped', self._name)
 
@@ -79,6 +93,7 @@ class BaseSchedulerThread(object):
 
         logger.info('%s thread is shutting down', self._name)
         self._running = False
+        self._wakeup_event.set()
 
     def _execute(self):
         """Executes a single loop of this thread
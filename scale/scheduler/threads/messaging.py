@@ -11,6 +11,7 @@ from scheduler.threads.base_thread import BaseSchedulerThread
 
 THROTTLE = datetime.timedelta(seconds=1)
 WARN_THRESHOLD = datetime.timedelta(milliseconds=500)
+WAKEUP_DELAY = datetime.timedelta(milliseconds=100)
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,9 @@ class MessagingThread(BaseSchedulerThread):
         """Constructor
         """
 
-        super(MessagingThread, self).__init__('Messaging', THROTTLE, WARN_THRESHOLD)
+        super(MessagingThread, self).__init__('Messaging', THROTTLE, WARN_THRESHOLD,
+                                              wakeup_event=job_exe_mgr.new_messages_event,
+                                              wakeup_delay=WAKEUP_DELAY)
 
         self._manager = CommandMessageManager()
         self._messages = []
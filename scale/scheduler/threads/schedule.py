@@ -6,12 +6,14 @@ import logging
 
 from django.utils.timezone import now
 
+from scheduler.resources.manager import resource_mgr
 from scheduler.scheduling.manager import SchedulingManager
 from scheduler.threads.base_thread import BaseSchedulerThread
 
 
 THROTTLE = datetime.timedelta(seconds=1)
 WARN_THRESHOLD = datetime.timedelta(seconds=1)
+WAKEUP_DELAY = datetime.timedelta(milliseconds=100)
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +28,9 @@ class SchedulingThread(BaseSchedulerThread):
         :type driver: :class:`mesoshttp.client.MesosClient`
         """
 
-        super(SchedulingThread, self).__init__('Scheduling', THROTTLE, WARN_THRESHOLD)
+        super(SchedulingThread, self).__init__('Scheduling', THROTTLE, WARN_THRESHOLD,
+                                               wakeup_event=resource_mgr.new_offers_event,
+                                               wakeup_delay=WAKEUP_DELAY)
         self._client = client
         self._manager = SchedulingManager()
 
@@ -13,7 +13,9 @@ from scheduler.manager import scheduler_mgr
 from scheduler.models import Scheduler
 from scheduler.node.manager import node_mgr
 from scheduler.resources.manager import resource_mgr
+from scheduler.scheduling.metrics import generation_metrics
 from scheduler.sync.job_type_manager import job_type_mgr
+from scheduler.task.manager import task_update_mgr
 from scheduler.tasks.manager import system_task_mgr
 from scheduler.threads.base_thread import BaseSchedulerThread
 from scheduler.vault.manager import secrets_mgr
@@ -52,6 +54,8 @@ class SchedulerStatusThread(BaseSchedulerThread):
 
         status_dict = {'timestamp': datetime_to_string(when)}
         scheduler_mgr.generate_status_json(status_dict)
+        generation_metrics.generate_status_json(status_dict['scheduler'])
+        task_update_mgr.generate_status_json(status_dict['scheduler'])
         system_task_mgr.generate_status_json(status_dict)
         node_mgr.generate_status_json(status_dict)
         resource_mgr.generate_status_json(status_dict)
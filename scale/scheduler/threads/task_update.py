@@ -10,6 +10,7 @@ from scheduler.threads.base_thread import BaseSchedulerThread
 
 THROTTLE = datetime.timedelta(seconds=1)
 WARN_THRESHOLD = datetime.timedelta(milliseconds=500)
+WAKEUP_DELAY = datetime.timedelta(milliseconds=100)
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,9 @@ class TaskUpdateThread(BaseSchedulerThread):
         """Constructor
         """
 
-        super(TaskUpdateThread, self).__init__('Task update', THROTTLE, WARN_THRESHOLD)
+        super(TaskUpdateThread, self).__init__('Task update', THROTTLE, WARN_THRESHOLD,
+                                               wakeup_event=task_update_mgr.new_updates_event,
+                                               wakeup_delay=WAKEUP_DELAY)
 
     def _execute(self):
         """See :meth:`scheduler.threads.base_thread.BaseSchedulerThread._execute`
@@ -4,12 +4,16 @@ from __future__ import unicode_literals
 import logging
 import os
 import shutil
+import stat
+from functools import partial
 
+import storage.settings as settings
 from storage.brokers.broker import Broker, BrokerVolume, FileDetails
 from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.exceptions import MissingFile
 from util.command import execute_command_line
 from util.os_helper import makedirs
+from util.parallel import iterate_in_parallel
 
 logger = logging.getLogger(__name__)
 
@@ -65,32 +69,106 @@ class HostBroker(Broker):
 
     def list_files(self, volume_path, recursive):
         """See :meth:`storage.brokers.broker.Broker.list_files`
+
+        For a recursive listing, the sub-directories of the volume path are walked in parallel.
         """
 
-        for file_name in self._dir_walker(volume_path, recursive):
-            if os.path.isfile(file_name):
+        if not recursive:
+            return self._list_dir_files(volume_path, volume_path)
+
+        return self._list_tree_files(volume_path)
+
+    @staticmethod
+    def _list_dir_files(path, volume_path):
+        """Generator of the files directly within the given directory
+
+        :param path: The path of the directory to list
+        :type path: string
+        :param volume_path: The volume path that the file paths are made relative to
+        :type volume_path: string
+        :returns: Generator of the files in the directory
+        :rtype: Generator[:class:`storage.brokers.broker.FileDetails`]
+        """
+
+        files, _ = HostBroker._scan_dir(path, volume_path)
+        for file_details in files:
+            yield file_details
+
+    @staticmethod
+    def _list_tree_files(volume_path):
+        """Generator of all of the files within the given directory tree. The files directly within the volume path are
+        listed first and then each sub-directory is walked on its own thread.
+
+        :param volume_path: The path of the directory tree to list
+        :type volume_path: string
+        :returns: Generator of the files in the directory tree
+        :rtype: Generator[:class:`storage.brokers.broker.FileDetails`]
+        """
+
+        files, sub_dirs = HostBroker._scan_dir(volume_path, volume_path)
+        for file_details in files:
+            yield file_details
+
+        walkers = [partial(HostBroker._walk_files, sub_dir, volume_path) for sub_dir in sub_dirs]
+        for file_details in iterate_in_parallel(walkers, settings.LIST_FILES_THREADS):
+            yield file_details
+
+    @staticmethod
+    def _scan_dir(path, volume_path):
+        """Lists the regular files and sub-directories directly within the given directory. A single lstat call is made
+        per entry, plus a stat call for symbolic links. Like os.walk(), symbolic links to directories are not followed.
+
+        :param path: The path of the directory to list
+        :type path: string
+        :param volume_path: The volume path that the file paths are made relative to
+        :type volume_path: string
+        :returns: The details of the files in the directory and the paths of its sub-directories
+        :rtype: ([:class:`storage.brokers.broker.FileDetails`], [string])
+        """
+
+        files = []
+        sub_dirs = []
+        for name in os.listdir(path):
+            entry_path = os.path.join(path, name)
+            try:
+                entry_stat = os.lstat(entry_path)
+                is_link = stat.S_ISLNK(entry_stat.st_mode)
+                if is_link:
+                    entry_stat = os.stat(entry_path)
+            except OSError:
+                # Entry was removed while listing or is a broken link
+                continue
+
+            if stat.S_ISDIR(entry_stat.st_mode):
+                if not is_link:
+                    sub_dirs.append(entry_path)
+            elif stat.S_ISREG(entry_stat.st_mode):
                 # Strip down to a workspace relative path to the file, not an absolute path
-                relative_file_name = os.path.relpath(file_name, volume_path)
-                yield FileDetails(relative_file_name, os.path.getsize(file_name))
+                files.append(FileDetails(os.path.relpath(entry_path, volume_path), entry_stat.st_size))
+        return files, sub_dirs
 
     @staticmethod
-    def _dir_walker(path, recursive):
-        """Generator to handle both flat and recursive directory traversal
-        
-        :param path: The path to the directory tree to walk
+    def _walk_files(path, volume_path):
+        """Generator of all of the files within the given directory tree, walked on the calling thread
+
+        :param path: The path of the directory tree to walk
         :type path: string
-        :param recursive: Whether directory walk is only at path or recursive
-        :type recursive: bool
+        :param volume_path: The volume path that the file paths are made relative to
+        :type volume_path: string
+        :returns: Generator of the files in the directory tree
+        :rtype: Generator[:class:`storage.brokers.broker.FileDetails`]
         """
-        # Handle a full recursive walk of the directory tree.
-        if recursive:
-            for root, dirs, files in os.walk(path):
-                for name in files:
-                    yield os.path.join(root, name)
-        # Handle identifying files only from a single directory.
-        else:
-            for result in os.listdir(path):
-                yield os.path.join(path, result)
+
+        dirs = [path]
+        while dirs:
+            try:
+                files, sub_dirs = HostBroker._scan_dir(dirs.pop(), volume_path)
+            except OSError:
+                # Like os.walk(), skip directories that were removed or cannot be read
+                continue
+            for file_details in files:
+                yield file_details
+            dirs.extend(sub_dirs)
 
     def load_configuration(self, config):
         """See :meth:`storage.brokers.broker.Broker.load_configuration`
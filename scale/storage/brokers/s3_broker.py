@@ -4,9 +4,14 @@ from __future__ import unicode_literals
 import logging
 import os
 import ssl
+import threading
 import time
+from functools import partial
+from multiprocessing.pool import ThreadPool
 
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError, NoCredentialsError
+from django.db import transaction
 
 import storage.settings as settings
 from storage.brokers.broker import Broker, BrokerVolume
@@ -14,7 +19,7 @@ from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.exceptions import MissingFile
 from util.aws import S3Client, AWSClient
 from util.command import execute_command_line
-from util.exceptions import FileDoesNotExist
+from util.parallel import iterate_in_parallel
 from util.validation import ValidationWarning
 
 logger = logging.getLogger(__name__)
@@ -31,53 +36,69 @@ class S3Broker(Broker):
         self._credentials = None
         self._bucket_name = None
         self._region_name = None
+        self._transfer_config = TransferConfig(multipart_threshold=settings.S3_MULTIPART_CHUNKSIZE,
+                                               multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE,
+                                               max_concurrency=settings.S3_MULTIPART_CONCURRENCY)
 
     def delete_files(self, volume_path, files, update_model=True):
         """See :meth:`storage.brokers.broker.Broker.delete_files`"""
 
+        if not files:
+            return
+
         with S3Client(self._credentials, self._region_name) as client:
-            for scale_file in files:
-                s3_object = client.get_object(self._bucket_name, scale_file.file_path)
+            errors = self._delete_objects(client, [scale_file.file_path for scale_file in files])
+
+        failed_paths = set()
+        for error in errors:
+            logger.error('Failed to delete %s: %s', error.get('Key'), error.get('Message'))
+            failed_paths.add(error.get('Key'))
 
-                self._delete_file(s3_object, scale_file)
+        if update_model:
+            # Update model attributes in a single transaction
+            with transaction.atomic():
+                for scale_file in files:
+                    if scale_file.file_path not in failed_paths:
+                        scale_file.set_deleted()
+                        scale_file.save()
 
-                if update_model:
-                    # Update model attributes
-                    scale_file.set_deleted()
-                    scale_file.save()
+        if errors:
+            raise ClientError({'Error': errors[0]}, 'DeleteObjects')
 
     def download_files(self, volume_path, file_downloads):
         """See :meth:`storage.brokers.broker.Broker.download_files`"""
 
-        with S3Client(self._credentials, self._region_name) as client:
-            for file_download in file_downloads:
-                # If file supports partial mount and volume is configured attempt sym-link
-                if file_download.partial and self._volume:
-                    logger.debug('Partial S3 file accessed by mounted bucket.')
-                    path_to_download = os.path.join(volume_path, file_download.file.file_path)
-
-                    logger.info('Checking path %s', path_to_download)
-                    if not os.path.exists(path_to_download):
-                        raise MissingFile(file_download.file.file_name)
-
-                    # Create symlink to the file in the host mount
-                    logger.info('Creating link %s -> %s', file_download.local_path, path_to_download)
-                    execute_command_line(['ln', '-s', path_to_download, file_download.local_path])
-                # Fall-back to default S3 file download
-                else:
-                    try:
-                        s3_object = client.get_object(self._bucket_name, file_download.file.file_path)
-                    except FileDoesNotExist:
-                        raise MissingFile(file_download.file.file_name)
+        s3_downloads = []
+        for file_download in file_downloads:
+            # If file supports partial mount and volume is configured attempt sym-link
+            if file_download.partial and self._volume:
+                logger.debug('Partial S3 file accessed by mounted bucket.')
+                path_to_download = os.path.join(volume_path, file_download.file.file_path)
 
-                    self._download_file(s3_object, file_download.file, file_download.local_path)
+                logger.info('Checking path %s', path_to_download)
+                if not os.path.exists(path_to_download):
+                    raise MissingFile(file_download.file.file_name)
+
+                # Create symlink to the file in the host mount
+                logger.info('Creating link %s -> %s', file_download.local_path, path_to_download)
+                execute_command_line(['ln', '-s', path_to_download, file_download.local_path])
+            # Fall-back to default S3 file download
+            else:
+                s3_downloads.append(file_download)
+
+        self._transfer_files(self._download_file, s3_downloads)
 
     def list_files(self, volume_path, recursive):
         """See :meth:`storage.brokers.broker.Broker.list_files`
+
+        For a recursive listing, the prefixes directly within the volume path are listed in parallel.
         """
 
-        with S3Client(self._credentials, self._region_name) as client:
-            return client.list_objects(self._bucket_name, recursive, volume_path)
+        if not recursive:
+            with S3Client(self._credentials, self._region_name) as client:
+                return client.list_objects(self._bucket_name, False, volume_path)
+
+        return self._list_prefix_files(volume_path)
 
     def load_configuration(self, config):
         """See :meth:`storage.brokers.broker.Broker.load_configuration`"""
@@ -97,30 +118,31 @@ class S3Broker(Broker):
     def move_files(self, volume_path, file_moves):
         """See :meth:`storage.brokers.broker.Broker.move_files`"""
 
-        with S3Client(self._credentials, self._region_name) as client:
-            for file_move in file_moves:
-                try:
-                    s3_object_src = client.get_object(self._bucket_name, file_move.file.file_path)
-                except FileDoesNotExist:
-                    raise MissingFile(file_move.file.file_name)
-                s3_object_dest = client.get_object(self._bucket_name, file_move.new_path, False)
+        if not file_moves:
+            return
 
-                self._move_file(s3_object_src, s3_object_dest, file_move.file, file_move.new_path)
+        self._transfer_files(self._copy_file, file_moves)
 
-                # Update model attributes
+        # S3 does not support an atomic move, so remove the originals once every copy has succeeded
+        with S3Client(self._credentials, self._region_name) as client:
+            errors = self._delete_objects(client, [file_move.file.file_path for file_move in file_moves])
+        for error in errors:
+            logger.error('Failed to delete %s after copy: %s', error.get('Key'), error.get('Message'))
+
+        # Update model attributes in a single transaction
+        with transaction.atomic():
+            for file_move in file_moves:
                 file_move.file.file_path = file_move.new_path
                 file_move.file.save()
 
     def upload_files(self, volume_path, file_uploads):
         """See :meth:`storage.brokers.broker.Broker.upload_files`"""
 
-        with S3Client(self._credentials, self._region_name) as client:
-            for file_upload in file_uploads:
-                s3_object = client.get_object(self._bucket_name, file_upload.file.file_path, False)
-
-                self._upload_file(s3_object, file_upload.file, file_upload.local_path)
+        self._transfer_files(self._upload_file, file_uploads)
 
-                # Create new model
+        # Create new models in a single transaction
+        with transaction.atomic():
+            for file_upload in file_uploads:
                 file_upload.file.save()
 
     def validate_configuration(self, config):
@@ -143,106 +165,101 @@ class S3Broker(Broker):
 
         return warnings
 
-    def _delete_file(self, s3_object, scale_file, retries=settings.S3_RETRY_COUNT):
-        """Deletes a file from the S3 file system.
+    def _copy_file(self, client, file_move, retries=settings.S3_RETRY_COUNT):
+        """Copies a file to its new path within the S3 file system. Large files are copied in parts.
 
-        This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
+        This method will attempt to retry the copy if :class:`ssl.SSLError` is raised up to a number of retries given.
 
-        :param s3_object: The S3 object representing the file to delete.
-        :type s3_object: :class:`boto3.s3.Object`
-        :param scale_file: The model associated with the file to delete.
-        :type scale_file: :class:`storage.models.ScaleFile`
+        :param client: The S3 client to use for the copy
+        :type client: :class:`util.aws.S3Client`
+        :param file_move: The file to copy and its destination path
+        :type file_move: :class:`storage.brokers.broker.FileMove`
+
+        :raises :class:`storage.exceptions.MissingFile`: If the file to copy does not exist
         """
 
-        logger.info('Deleting %s', scale_file.file_path)
+        scale_file = file_move.file
+        s3_object_dest = client.get_object(self._bucket_name, file_move.new_path, False)
+        copy_source = {'Bucket': self._bucket_name, 'Key': scale_file.file_path}
+
+        logger.info('Copying %s -> %s', scale_file.file_path, file_move.new_path)
         for attempt in range(retries):
             try:
-                s3_object.delete()
+                s3_object_dest.copy(copy_source, ExtraArgs=self._get_transfer_options(scale_file),
+                                    Config=self._transfer_config)
                 return
+            except ClientError as err:
+                if self._is_missing_object_error(err):
+                    raise MissingFile(scale_file.file_name)
+                raise
             except ssl.SSLError:
-                if attempt >= retries:
+                if attempt + 1 >= retries:
                     raise
                 time.sleep(settings.S3_RETRY_DELAY * attempt)
-                logger.exception('Retrying S3 delete attempt: %i', attempt + 1)
+                logger.exception('Retrying S3 copy attempt: %i', attempt + 1)
 
-    def _download_file(self, s3_object, scale_file, path, retries=settings.S3_RETRY_COUNT):
-        """Downloads a file in S3 storage to the local file system.
+    def _delete_objects(self, client, key_names, retries=settings.S3_RETRY_COUNT):
+        """Deletes the given objects from the S3 file system in batches.
 
         This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
 
-        :param s3_object: The S3 object representing the file to download.
-        :type s3_object: :class:`boto3.s3.Object`
-        :param scale_file: The model associated with the file to download.
-        :type scale_file: :class:`storage.models.ScaleFile`
-        :param path: The destination path for the file download.
-        :type path: string
+        :param client: The S3 client to use for the delete
+        :type client: :class:`util.aws.S3Client`
+        :param key_names: The paths of the objects to delete
+        :type key_names: [string]
+        :returns: The errors reported by S3 for any objects that failed to delete
+        :rtype: [dict]
         """
 
-        logger.info('Downloading %s -> %s', scale_file.file_path, path)
+        logger.info('Deleting %i file(s) from %s', len(key_names), self._bucket_name)
         for attempt in range(retries):
             try:
-                s3_object.download_file(path)
-                return
+                return client.delete_objects(self._bucket_name, key_names)
             except ssl.SSLError:
-                if attempt >= retries:
+                if attempt + 1 >= retries:
                     raise
                 time.sleep(settings.S3_RETRY_DELAY * attempt)
-                logger.exception('Retrying S3 download attempt: %i', attempt + 1)
+                logger.exception('Retrying S3 delete attempt: %i', attempt + 1)
 
-    def _move_file(self, s3_object_src, s3_object_dest, scale_file, path, retries=settings.S3_RETRY_COUNT):
-        """Moves a file within the S3 file system.
+    def _download_file(self, client, file_download, retries=settings.S3_RETRY_COUNT):
+        """Downloads a file in S3 storage to the local file system. Large files are downloaded in parts.
 
-        Note that S3 does not support an atomic move, so this operation is implemented as a copy and delete.
+        This method will attempt to retry the download if :class:`ssl.SSLError` is raised up to a number of retries
+        given.
 
-        This method will attempt to retry the move if :class:`ssl.SSLError` is raised up to a number of retries given.
-        Note that since S3 does not support an atomic move, this method copies the file to the new destination and then
-        attempts to delete the original file content.
+        :param client: The S3 client to use for the download
+        :type client: :class:`util.aws.S3Client`
+        :param file_download: The file to download and its destination path
+        :type file_download: :class:`storage.brokers.broker.FileDownload`
 
-        :param s3_object_src: The S3 object representing the source of the file to move.
-        :type s3_object_src: :class:`boto3.s3.Object`
-        :param s3_object_dest: The S3 object representing the destination of the file to move.
-        :type s3_object_dest: :class:`boto3.s3.Object`
-        :param scale_file: The model associated with the file to move.
-        :type scale_file: :class:`storage.models.ScaleFile`
-        :param path: The destination path for the file move.
-        :type path: string
+        :raises :class:`storage.exceptions.MissingFile`: If the file to download does not exist
         """
 
-        logger.info('Copying %s -> %s', scale_file.file_path, path)
-        options = dict()
-        options['CopySource'] = {
-            'Bucket': s3_object_src.bucket_name,
-            'Key': s3_object_src.key,
-        }
-        options['StorageClass'] = settings.S3_STORAGE_CLASS
-        if settings.S3_SERVER_SIDE_ENCRYPTION:
-            options['ServerSideEncryption'] = settings.S3_SERVER_SIDE_ENCRYPTION
-        if scale_file.media_type:
-            options['ContentType'] = scale_file.media_type
+        scale_file = file_download.file
+        s3_object = client.get_object(self._bucket_name, scale_file.file_path, False)
 
+        logger.info('Downloading %s -> %s', scale_file.file_path, file_download.local_path)
         for attempt in range(retries):
             try:
-                s3_object_dest.copy_from(**options)
-                break
+                s3_object.download_file(file_download.local_path, Config=self._transfer_config)
+                return
+            except ClientError as err:
+                if self._is_missing_object_error(err):
+                    raise MissingFile(scale_file.file_name)
+                raise
             except ssl.SSLError:
-                if attempt >= retries:
+                if attempt + 1 >= retries:
                     raise
                 time.sleep(settings.S3_RETRY_DELAY * attempt)
-                logger.exception('Retrying S3 copy attempt: %i', attempt + 1)
-
-        self._delete_file(s3_object_src, scale_file)
+                logger.exception('Retrying S3 download attempt: %i', attempt + 1)
 
-    def _upload_file(self, s3_object, scale_file, path, retries=settings.S3_RETRY_COUNT):
-        """Uploads a file in local storage to the S3 remote file system.
+    def _get_transfer_options(self, scale_file):
+        """Returns the extra S3 arguments for writing the given file
 
-        This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
-
-        :param s3_object: The S3 object representing the file to upload.
-        :type s3_object: :class:`boto3.s3.Object`
-        :param scale_file: The model associated with the file to upload.
+        :param scale_file: The model associated with the file being written
         :type scale_file: :class:`storage.models.ScaleFile`
-        :param path: The source path for the file upload.
-        :type path: string
+        :returns: The extra arguments for the S3 transfer
+        :rtype: dict
         """
 
         options = dict()
@@ -251,14 +268,108 @@ class S3Broker(Broker):
             options['ServerSideEncryption'] = settings.S3_SERVER_SIDE_ENCRYPTION
         if scale_file.media_type:
             options['ContentType'] = scale_file.media_type
+        return options
+
+    def _is_missing_object_error(self, err):
+        """Indicates whether the given S3 error was caused by a missing object
+
+        :param err: The S3 error
+        :type err: :class:`botocore.exceptions.ClientError`
+        :returns: True if the object was not found, False otherwise
+        :rtype: bool
+        """
+
+        error_code = err.response.get('Error', {}).get('Code')
+        status_code = err.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        return error_code in ('404', 'NoSuchKey') or status_code == 404
+
+    def _list_prefix_files(self, prefix):
+        """Generator of all of the files under the given prefix. The files directly within the prefix are listed first
+        and then each of its common prefixes is listed recursively on its own thread.
+
+        :param prefix: The prefix to list, possibly None
+        :type prefix: string
+        :returns: Generator of the files under the prefix
+        :rtype: Generator[:class:`storage.brokers.broker.FileDetails`]
+        """
+
+        sub_prefixes = []
+        with S3Client(self._credentials, self._region_name) as client:
+            for files, prefixes in client.list_objects_and_prefixes(self._bucket_name, prefix):
+                for file_details in files:
+                    yield file_details
+                sub_prefixes.extend(prefixes)
+
+        def list_sub_prefix(sub_prefix):
+            with S3Client(self._credentials, self._region_name) as client:
+                for file_details in client.list_objects(self._bucket_name, True, sub_prefix):
+                    yield file_details
+
+        listers = [partial(list_sub_prefix, sub_prefix) for sub_prefix in sub_prefixes]
+        for file_details in iterate_in_parallel(listers, settings.LIST_FILES_THREADS):
+            yield file_details
+
+    def _transfer_files(self, transfer_func, transfers):
+        """Performs the given transfers concurrently on a bounded pool of threads. The transfers are split evenly
+        between the threads and each thread uses its own S3 client, since boto3 sessions and resources are not
+        thread-safe. If any transfer fails, the remaining transfers are abandoned and the first error is raised.
+
+        :param transfer_func: The function that performs a single transfer, called with an S3 client and a transfer
+        :type transfer_func: func
+        :param transfers: The transfers to perform
+        :type transfers: :func:`list`
+        """
+
+        if not transfers:
+            return
+
+        thread_count = max(min(settings.S3_TRANSFER_THREADS, len(transfers)), 1)
+        failed = threading.Event()
+
+        def transfer_batch(batch):
+            with S3Client(self._credentials, self._region_name) as client:
+                for transfer in batch:
+                    if failed.is_set():
+                        return
+                    try:
+                        transfer_func(client, transfer)
+                    except Exception:
+                        failed.set()
+                        raise
+
+        if thread_count == 1:
+            transfer_batch(transfers)
+            return
+
+        pool = ThreadPool(thread_count)
+        try:
+            pool.map(transfer_batch, [transfers[i::thread_count] for i in range(thread_count)])
+        finally:
+            pool.close()
+            pool.join()
+
+    def _upload_file(self, client, file_upload, retries=settings.S3_RETRY_COUNT):
+        """Uploads a file in local storage to the S3 remote file system. Large files are uploaded in parts.
+
+        This method will attempt to retry the upload if :class:`ssl.SSLError` is raised up to a number of retries given.
+
+        :param client: The S3 client to use for the upload
+        :type client: :class:`util.aws.S3Client`
+        :param file_upload: The file to upload and its source path
+        :type file_upload: :class:`storage.brokers.broker.FileUpload`
+        """
+
+        scale_file = file_upload.file
+        s3_object = client.get_object(self._bucket_name, scale_file.file_path, False)
+        options = self._get_transfer_options(scale_file)
 
-        logger.info('Uploading %s -> %s', path, scale_file.file_path)
+        logger.info('Uploading %s -> %s', file_upload.local_path, scale_file.file_path)
         for attempt in range(retries):
             try:
-                s3_object.upload_file(path, options)
+                s3_object.upload_file(file_upload.local_path, ExtraArgs=options, Config=self._transfer_config)
                 return
             except ssl.SSLError:
-                if attempt >= retries:
+                if attempt + 1 >= retries:
                     raise
                 time.sleep(settings.S3_RETRY_DELAY * attempt)
                 logger.exception('Retrying S3 upload attempt: %i', attempt + 1)
@@ -11,7 +11,7 @@ import django.contrib.gis.db.models as models
 import django.contrib.gis.geos as geos
 import django.utils.timezone as timezone
 import django.contrib.postgres.fields
-from django.db import transaction
+from django.db import connection, transaction
 
 import storage.geospatial_utils as geospatial_utils
 from storage.brokers.factory import get_broker
@@ -98,6 +98,32 @@ class CountryDataManager(models.Manager):
                 rval[val.name] = val
         return rval
 
+    def get_intersects_by_file(self, file_ids):
+        """Get the countries whose borders intersect the geometries of the given files using a single query. For each
+        file and country name, the most recent entry whose effective date is before the file's target date (in order of
+        preference data_started, data_ended, or created) is returned. Files without a geometry have no countries.
+
+        :param file_ids: The IDs of the saved files
+        :type file_ids: [int]
+        :returns: A dict of file ID mapped to the list of intersected country data IDs
+        :rtype: dict
+        """
+
+        countries_by_file = {}
+        if not file_ids:
+            return countries_by_file
+
+        qry = 'SELECT DISTINCT ON (f.id, c.name) f.id, c.id FROM scale_file f '
+        qry += 'JOIN country_data c ON c.effective <= COALESCE(f.data_started, f.data_ended, f.created) '
+        qry += 'AND ST_Intersects(c.border, f.geometry) '
+        qry += 'WHERE f.id = ANY(%s) AND f.geometry IS NOT NULL '
+        qry += 'ORDER BY f.id, c.name, c.effective DESC'
+        with connection.cursor() as cursor:
+            cursor.execute(qry, [list(file_ids)])
+            for file_id, country_id in cursor.fetchall():
+                countries_by_file.setdefault(file_id, []).append(country_id)
+        return countries_by_file
+
 
 class CountryData(models.Model):
     """Represents country borders and official abbreviations
@@ -551,14 +577,34 @@ class ScaleFileManager(models.Manager):
         workspace.upload_files(file_uploads)
 
         # Populate the country list for all files that were saved
-        for file_upload in file_uploads:
-            scale_file = file_upload.file
-            if scale_file.pk:
-                scale_file.set_countries()
-                scale_file.save()
+        self.set_countries([scale_file for scale_file in file_list if scale_file.pk])
 
         return file_list
 
+    def set_countries(self, scale_files):
+        """Clears the countries list for each of the given saved files and then recreates it from the CountryData
+        table, using one query to find the intersected countries for all of the files and one bulk insert. This is
+        the batch equivalent of :meth:`storage.models.ScaleFile.set_countries` and reads each file's geometry and
+        dates from the database.
+
+        :param scale_files: The saved files
+        :type scale_files: [:class:`storage.models.ScaleFile`]
+        """
+
+        file_ids = [scale_file.id for scale_file in scale_files]
+        if not file_ids:
+            return
+
+        file_country_model = ScaleFile.countries.through
+        with transaction.atomic():
+            countries_by_file = CountryData.objects.get_intersects_by_file(file_ids)
+            file_country_model.objects.filter(scalefile_id__in=file_ids).delete()
+            file_countries = []
+            for file_id, country_ids in countries_by_file.items():
+                for country_id in country_ids:
+                    file_countries.append(file_country_model(scalefile_id=file_id, countrydata_id=country_id))
+            file_country_model.objects.bulk_create(file_countries)
+
 
 class ScaleFile(models.Model):
     """Represents a file that is stored within a Scale workspace
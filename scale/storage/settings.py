@@ -11,3 +11,15 @@ S3_RETRY_COUNT = getattr(settings, 'S3_RETRY_COUNT', 3)
 
 # The delay between retry attempts
 S3_RETRY_DELAY = getattr(settings, 'S3_RETRY_DELAY', 60)  # 1 minute
+
+# Number of files transferred concurrently by a single broker call
+S3_TRANSFER_THREADS = getattr(settings, 'S3_TRANSFER_THREADS', 8)
+
+# Number of threads used to transfer the parts of a single multipart file transfer
+S3_MULTIPART_CONCURRENCY = getattr(settings, 'S3_MULTIPART_CONCURRENCY', 4)
+
+# The size in bytes of each part of a multipart transfer, files larger than this are transferred in parts
+S3_MULTIPART_CHUNKSIZE = getattr(settings, 'S3_MULTIPART_CHUNKSIZE', 8 * 1024 * 1024)  # 8 MiB
+
+# Number of threads used to list the sub-directories or prefixes of a workspace in parallel
+LIST_FILES_THREADS = getattr(settings, 'LIST_FILES_THREADS', 8)
@@ -97,113 +97,61 @@ class TestHostBrokerListFiles(TestCase):
 
     def setUp(self):
         django.setup()
-        
-        self.root_path = '/my/test/path'
+
+        self.root_path = tempfile.mkdtemp()
         self.broker = HostBroker()
 
-    @patch('os.listdir')
-    def test_no_files_flat_walk(self, list_dir):
-        """Tests calling HostBroker._dir_walker() with no files in directory"""
-        
-        file_list = [x for x in HostBroker._dir_walker(self.root_path, False)]
-        
-        self.assertEqual(len(file_list), 0)
-
-    @patch('os.listdir')
-    def test_with_files_flat_dir_walker(self, list_dir):
-        """Tests calling HostBroker._dir_walker() with files in a directory"""
-        
-        files = [str(uuid.uuid4()), str(uuid.uuid4())]
-
-        list_dir.return_value = files
-        
-        file_list = [x for x in HostBroker._dir_walker(self.root_path, False)]
-
-        for i in range(2):
-            self.assertEqual(os.path.join(self.root_path, files[i]), file_list[i])
-            
-        self.assertEqual(len(file_list), 2)
-
-    @patch('os.walk')
-    def test_with_files_recursive_dir_walker(self, walk):
-        """Tests calling HostBroker._dir_walker() with files throughout tree"""
-        
-        files = []
-        dirs = {self.root_path: str(uuid.uuid4()),
-                os.path.join(self.root_path, str(uuid.uuid4())): str(uuid.uuid4()),
-                os.path.join(self.root_path, str(uuid.uuid4())): str(uuid.uuid4())}
-
-        files = [os.path.join(x, dirs[x]) for x in dirs]
-
-        walk.return_value = [(x, (), (dirs[x],)) for x in dirs]
-        
-        file_list = [x for x in HostBroker._dir_walker(self.root_path, True)]
-        
-        for i in range(3):
-            self.assertEqual(os.path.join(self.root_path, files[i]), file_list[i])
-        self.assertEqual(len(file_list), 3)
-
-    @patch('storage.brokers.host_broker.HostBroker._dir_walker')
-    def test_no_files(self, walk):
+        self.file_paths = ['file_1.txt', os.path.join('dir_1', 'file_2.txt'),
+                           os.path.join('dir_2', 'sub_dir', 'file_3.txt')]
+        for file_path in self.file_paths:
+            full_path = os.path.join(self.root_path, file_path)
+            if not os.path.exists(os.path.dirname(full_path)):
+                os.makedirs(os.path.dirname(full_path))
+            with open(full_path, 'w') as f:
+                f.write('data')
+        os.mkdir(os.path.join(self.root_path, 'empty_dir'))
+
+    def tearDown(self):
+        shutil.rmtree(self.root_path)
+
+    def test_no_files(self):
         """Tests calling HostBroker.list_files() with no files in directory"""
-        
-        walk.return_value = []
-        files = self.broker.list_files(self.root_path, False)
-        self.assertEqual(len(list(files)), 0)
-    
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
-    @patch('storage.brokers.host_broker.HostBroker._dir_walker')
-    def test_list_a_thousand(self, walk):
-        """Tests calling HostBroker.list_files() with multiple batches (1000+)"""
-        
-        walk.return_value = [str(uuid.uuid4()) for _ in range(1500)]
-        
-        files = self.broker.list_files(self.root_path, True)
-        
-        self.assertEqual(len(list(files)), 1500)
-    
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
-    @patch('storage.brokers.host_broker.HostBroker._dir_walker')
-    def test_list_ten(self, walk):
-        """Tests calling HostBroker.list_files() to search directory"""
-        
-        walk.return_value = [str(uuid.uuid4()) for _ in range(10)]
-        
-        files = self.broker.list_files(self.root_path, True)
-        
-        self.assertEqual(len(list(files)), 10)
-    
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
-    @patch('storage.brokers.host_broker.HostBroker._dir_walker')
-    def test_recursive_successfully(self, walk):
-        """Tests calling HostBroker.list_files() with files across multi-level 
-        directory tree"""
-        
-        walk.return_value = [os.path.join(str(x), str(uuid.uuid4())) for x in range(10)]
-
-        files = self.broker.list_files(self.root_path, True)
-        
-        self.assertEqual(len(list(files)), 10)
-        
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
-    @patch('storage.brokers.host_broker.HostBroker._dir_walker')
-    def test_recursive_successfully_strip_path(self, walk):
-        """Tests calling HostBroker.list_files() with files across multi-level 
-        directory tree verifying the host volume path is removed"""
-        
-        walk.return_value = [os.path.join(self.root_path, str(x), str(uuid.uuid4())) for x in range(10)]
-
-        files = self.broker.list_files(self.root_path, True)
-        
-        file_list = list(files)
-        for file_details in file_list:
-            self.assertNotIn(self.root_path, file_details.file)
-        
-        self.assertEqual(len(file_list), 10)
+
+        empty_path = os.path.join(self.root_path, 'empty_dir')
+
+        self.assertEqual(len(list(self.broker.list_files(empty_path, False))), 0)
+        self.assertEqual(len(list(self.broker.list_files(empty_path, True))), 0)
+
+    def test_flat(self):
+        """Tests calling HostBroker.list_files() to list only the top level of the directory"""
+
+        file_list = list(self.broker.list_files(self.root_path, False))
+
+        self.assertEqual(len(file_list), 1)
+        self.assertEqual(file_list[0].file, 'file_1.txt')
+        self.assertEqual(file_list[0].size, 4)
+
+    def test_recursive_successfully(self):
+        """Tests calling HostBroker.list_files() with files across multi-level directory tree, verifying the host
+        volume path is removed"""
+
+        file_list = list(self.broker.list_files(self.root_path, True))
+
+        self.assertSetEqual({file_details.file for file_details in file_list}, set(self.file_paths))
+
+    @patch('storage.brokers.host_broker.settings.LIST_FILES_THREADS', 2)
+    def test_list_a_thousand(self):
+        """Tests calling HostBroker.list_files() with more sub-directories than threads and multiple batches (1000+)"""
+
+        for i in range(5):
+            dir_path = os.path.join(self.root_path, 'many_%i' % i)
+            os.mkdir(dir_path)
+            for j in range(300):
+                open(os.path.join(dir_path, str(uuid.uuid4())), 'w').close()
+
+        file_list = list(self.broker.list_files(self.root_path, True))
+
+        self.assertEqual(len(file_list), 1503)
 
 
 class TestHostBrokerLoadConfiguration(TestCase):
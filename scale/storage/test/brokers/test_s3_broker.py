@@ -1,15 +1,20 @@
 from __future__ import unicode_literals
 
 import os
+import ssl
 
 import django
+from botocore.exceptions import ClientError
 from django.test import TestCase
 from mock import MagicMock, Mock, call, mock_open, patch
 
+import storage.settings as storage_settings
 import storage.test.utils as storage_test_utils
-from storage.brokers.broker import FileDownload, FileMove, FileUpload
+from storage.brokers.broker import FileDetails, FileDownload, FileMove, FileUpload
 from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.brokers.s3_broker import S3Broker
+from storage.exceptions import MissingFile
+from storage.models import ScaleFile
 from util.aws import S3Client
 
 
@@ -33,10 +38,8 @@ class TestS3Broker(TestCase):
     def test_delete_files(self, mock_client_class):
         """Tests deleting files successfully"""
 
-        s3_object_1 = MagicMock()
-        s3_object_2 = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1, s3_object_2]
+        mock_client.delete_objects.return_value = []
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_path_1 = os.path.join('my_dir', 'my_file.txt')
@@ -49,13 +52,51 @@ class TestS3Broker(TestCase):
         self.broker.delete_files(None, [file_1, file_2])
 
         # Check results
-        self.assertTrue(s3_object_1.delete.called)
-        self.assertTrue(s3_object_2.delete.called)
+        mock_client.delete_objects.assert_called_once_with('my_bucket.domain.com', [file_path_1, file_path_2])
         self.assertTrue(file_1.is_deleted)
         self.assertIsNotNone(file_1.deleted)
         self.assertTrue(file_2.is_deleted)
         self.assertIsNotNone(file_2.deleted)
 
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_delete_files_error(self, mock_client_class):
+        """Tests deleting files when S3 fails to delete one of them"""
+
+        file_path_1 = os.path.join('my_dir', 'my_file.txt')
+        file_path_2 = os.path.join('my_dir', 'my_file.json')
+        mock_client = MagicMock(S3Client)
+        mock_client.delete_objects.return_value = [{'Key': file_path_2, 'Code': 'AccessDenied',
+                                                    'Message': 'Access Denied'}]
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_1 = storage_test_utils.create_file(file_path=file_path_1)
+        file_2 = storage_test_utils.create_file(file_path=file_path_2)
+
+        # Call method to test
+        self.assertRaises(ClientError, self.broker.delete_files, None, [file_1, file_2])
+
+        # Check results
+        self.assertTrue(ScaleFile.objects.get(id=file_1.id).is_deleted)
+        self.assertFalse(ScaleFile.objects.get(id=file_2.id).is_deleted)
+
+    @patch('storage.brokers.s3_broker.time.sleep')
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_delete_files_ssl_error(self, mock_client_class, mock_sleep):
+        """Tests deleting files when every attempt raises an SSL error"""
+
+        mock_client = MagicMock(S3Client)
+        mock_client.delete_objects.side_effect = ssl.SSLError('The read operation timed out')
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_1 = storage_test_utils.create_file(file_path=os.path.join('my_dir', 'my_file.txt'))
+
+        # Call method to test
+        self.assertRaises(ssl.SSLError, self.broker.delete_files, None, [file_1])
+
+        # Check results
+        self.assertEqual(mock_client.delete_objects.call_count, storage_settings.S3_RETRY_COUNT)
+        self.assertFalse(ScaleFile.objects.get(id=file_1.id).is_deleted)
+
     @patch('os.path.exists')
     @patch('storage.brokers.s3_broker.S3Client')
     def test_download_files(self, mock_client_class, mock_exists):
@@ -89,6 +130,51 @@ class TestS3Broker(TestCase):
         self.assertTrue(s3_object_1.download_file.called)
         self.assertTrue(s3_object_2.download_file.called)
 
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_download_files_missing(self, mock_client_class):
+        """Tests downloading a file that does not exist in S3"""
+
+        s3_object = MagicMock()
+        s3_object.download_file.side_effect = ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}},
+                                                          'HeadObject')
+        mock_client = MagicMock(S3Client)
+        mock_client.get_object.return_value = s3_object
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        scale_file = storage_test_utils.create_file(file_path=os.path.join('my_wrk_dir', 'my_file.txt'))
+        file_dl = FileDownload(scale_file, os.path.join('my_dir', 'my_file.txt'), False)
+
+        # Call method to test
+        self.assertRaises(MissingFile, self.broker.download_files, None, [file_dl])
+
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_download_files_many(self, mock_client_class):
+        """Tests downloading more files than there are transfer threads"""
+
+        s3_objects = {}
+
+        def get_object(bucket_name, key_name, validate=True):
+            s3_objects[key_name] = MagicMock()
+            return s3_objects[key_name]
+
+        mock_client = MagicMock(S3Client)
+        mock_client.get_object.side_effect = get_object
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_downloads = []
+        for i in range(25):
+            scale_file = storage_test_utils.create_file(file_path=os.path.join('my_wrk_dir', 'file_%i.txt' % i))
+            file_downloads.append(FileDownload(scale_file, os.path.join('my_dir', 'file_%i.txt' % i), False))
+
+        # Call method to test
+        self.broker.download_files(None, file_downloads)
+
+        # Check results
+        self.assertEqual(len(s3_objects), 25)
+        for file_download in file_downloads:
+            s3_object = s3_objects[file_download.file.file_path]
+            self.assertEqual(s3_object.download_file.call_args[0][0], file_download.local_path)
+
     # Patching in storage.brokers.s3_broker as opposed to util.aws / util.command because patch must be applied where
     # import is made, not on source
     @patch('os.path.exists')
@@ -121,6 +207,30 @@ class TestS3Broker(TestCase):
                      call(['ln', '-s', full_workspace_path_file_2, local_path_file_2])]
         mock_execute.assert_has_calls(two_calls)
 
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_list_files_recursive(self, mock_client_class):
+        """Tests listing files recursively, with the top level prefixes listed in parallel"""
+
+        def list_objects(bucket_name, recursive=False, prefix=None):
+            self.assertTrue(recursive)
+            return iter([FileDetails('%sfile_%i.txt' % (prefix, i), 1) for i in range(3)])
+
+        mock_client = MagicMock(S3Client)
+        mock_client.list_objects.side_effect = list_objects
+        mock_client.list_objects_and_prefixes.return_value = iter([([FileDetails('root/file_1.txt', 1)], ['root/a/']),
+                                                                   ([], ['root/b/'])])
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        # Call method to test
+        files = list(self.broker.list_files('root/', True))
+
+        # Check results
+        self.assertEqual(files[0].file, 'root/file_1.txt')
+        self.assertSetEqual({f.file for f in files[1:]}, {'root/a/file_0.txt', 'root/a/file_1.txt', 'root/a/file_2.txt',
+                                                          'root/b/file_0.txt', 'root/b/file_1.txt', 'root/b/file_2.txt'})
+        # The top level is listed in a single pass
+        mock_client.list_objects_and_prefixes.assert_called_once_with('my_bucket.domain.com', 'root/')
+
     def test_load_configuration(self):
         """Tests loading a valid configuration successfully"""
 
@@ -161,18 +271,16 @@ class TestS3Broker(TestCase):
         self.assertEqual(broker._credentials.access_key_id, 'ABC')
         self.assertEqual(broker._credentials.secret_access_key, '123')
 
-    @patch('os.path.exists')
     @patch('storage.brokers.s3_broker.S3Client')
-    def test_move_files(self, mock_client_class, mock_exists):
+    def test_move_files(self, mock_client_class):
         """Tests moving files successfully"""
 
-        mock_exists.return_value = True
-        s3_object_1a = MagicMock()
-        s3_object_1b = MagicMock()
-        s3_object_2a = MagicMock()
-        s3_object_2b = MagicMock()
+        s3_object_1 = MagicMock()
+        s3_object_2 = MagicMock()
+        s3_objects = {}
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1a, s3_object_1b, s3_object_2a, s3_object_2b]
+        mock_client.get_object.side_effect = lambda bucket_name, key_name, validate=True: s3_objects[key_name]
+        mock_client.delete_objects.return_value = []
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_name_1 = 'my_file.txt'
@@ -181,6 +289,8 @@ class TestS3Broker(TestCase):
         old_workspace_path_2 = os.path.join('my_dir_2', file_name_2)
         new_workspace_path_1 = os.path.join('my_new_dir_1', file_name_1)
         new_workspace_path_2 = os.path.join('my_new_dir_2', file_name_2)
+        s3_objects[new_workspace_path_1] = s3_object_1
+        s3_objects[new_workspace_path_2] = s3_object_2
 
         file_1 = storage_test_utils.create_file(file_path=old_workspace_path_1)
         file_2 = storage_test_utils.create_file(file_path=old_workspace_path_2)
@@ -191,12 +301,13 @@ class TestS3Broker(TestCase):
         self.broker.move_files(None, [file_1_mv, file_2_mv])
 
         # Check results
-        self.assertTrue(s3_object_1b.copy_from.called)
-        self.assertTrue(s3_object_1a.delete.called)
-        self.assertTrue(s3_object_2b.copy_from.called)
-        self.assertTrue(s3_object_2a.delete.called)
+        self.assertEqual(s3_object_1.copy.call_args[0][0]['Key'], old_workspace_path_1)
+        self.assertEqual(s3_object_2.copy.call_args[0][0]['Key'], old_workspace_path_2)
+        mock_client.delete_objects.assert_called_once_with('my_bucket.domain.com', [old_workspace_path_1,
+                                                                                    old_workspace_path_2])
         self.assertEqual(file_1.file_path, new_workspace_path_1)
         self.assertEqual(file_2.file_path, new_workspace_path_2)
+        self.assertEqual(ScaleFile.objects.get(id=file_1.id).file_path, new_workspace_path_1)
 
     @patch('storage.brokers.s3_broker.S3Client')
     def test_upload_files(self, mock_client_class):
@@ -205,7 +316,6 @@ class TestS3Broker(TestCase):
         s3_object_1 = MagicMock()
         s3_object_2 = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1, s3_object_2]
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_name_1 = 'my_file.txt'
@@ -214,6 +324,8 @@ class TestS3Broker(TestCase):
         local_path_file_2 = os.path.join('my_dir_2', file_name_2)
         workspace_path_file_1 = os.path.join('my_wrk_dir_1', file_name_1)
         workspace_path_file_2 = os.path.join('my_wrk_dir_2', file_name_2)
+        s3_objects = {workspace_path_file_1: s3_object_1, workspace_path_file_2: s3_object_2}
+        mock_client.get_object.side_effect = lambda bucket_name, key_name, validate=True: s3_objects[key_name]
 
         file_1 = storage_test_utils.create_file(file_path=workspace_path_file_1, media_type='text/plain')
         file_2 = storage_test_utils.create_file(file_path=workspace_path_file_2, media_type='application/json')
@@ -228,8 +340,8 @@ class TestS3Broker(TestCase):
         # Check results
         self.assertTrue(s3_object_1.upload_file.called)
         self.assertTrue(s3_object_2.upload_file.called)
-        self.assertEqual(s3_object_1.upload_file.call_args[0][1]['ContentType'], 'text/plain')
-        self.assertEqual(s3_object_2.upload_file.call_args[0][1]['ContentType'], 'application/json')
+        self.assertEqual(s3_object_1.upload_file.call_args[1]['ExtraArgs']['ContentType'], 'text/plain')
+        self.assertEqual(s3_object_2.upload_file.call_args[1]['ExtraArgs']['ContentType'], 'application/json')
 
     def test_validate_configuration_roles(self):
         """Tests validating a configuration based on IAM roles successfully"""
@@ -422,6 +422,69 @@ class TestScaleFileManagerUploadFiles(TestCase):
         self.assertRaises(Exception, ScaleFile.objects.upload_files, upload_dir, work_dir, workspace, files)
 
 
+class TestScaleFileManagerSetCountries(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        effective = datetime.datetime(2000, 1, 1, 0, 0, 0, tzinfo=utc)
+        self.country_1 = CountryData.objects.create(name='Test Country', fips='TC', gmi='TCY', iso2='TC', iso3='TCY',
+                                                    iso_num=42, effective=effective,
+                                                    border=geos.Polygon(((0, 0), (0, 10), (10, 10), (10, 0), (0, 0))))
+        self.country_2 = CountryData.objects.create(name='Test Country 2', fips='TT', gmi='TCT', iso2='TT',
+                                                    iso3='TCT', iso_num=43, effective=effective,
+                                                    border=geos.Polygon(((11, 0), (11, 8), (19, 8), (19, 0), (11, 0))))
+        # Newer border for the first country that only applies to files with later data
+        self.country_1_new = CountryData.objects.create(name='Test Country', fips='TC', gmi='TCY', iso2='TC',
+                                                        iso3='TCY', iso_num=42,
+                                                        effective=datetime.datetime(2010, 1, 1, tzinfo=utc),
+                                                        border=geos.Polygon(((0, 0), (0, 12), (12, 12), (12, 0),
+                                                                             (0, 0))))
+
+    def test_set_countries(self):
+        """Tests setting the countries for several files at once"""
+
+        file_1 = storage_test_utils.create_file(file_name='test_1.txt')
+        file_1.geometry = geos.Polygon(((5, 5), (5, 10), (12, 10), (12, 5), (5, 5)))
+        file_1.data_started = datetime.datetime(2005, 1, 1, tzinfo=utc)
+        file_1.save()
+        file_1.countries.add(self.country_1_new)
+        file_2 = storage_test_utils.create_file(file_name='test_2.txt')
+        file_2.geometry = geos.Point(11, 11)
+        file_2.data_ended = datetime.datetime(2015, 1, 1, tzinfo=utc)
+        file_2.save()
+        file_3 = storage_test_utils.create_file(file_name='test_3.txt')
+        file_3.countries.add(self.country_2)
+
+        ScaleFile.objects.set_countries([file_1, file_2, file_3])
+
+        self.assertSetEqual({c.id for c in file_1.countries.all()}, {self.country_1.id, self.country_2.id})
+        self.assertSetEqual({c.id for c in file_2.countries.all()}, {self.country_1_new.id})
+        self.assertEqual(file_3.countries.count(), 0)
+
+    def test_matches_single_file(self):
+        """Tests that setting the countries for several files matches setting them for each file"""
+
+        geometries = [geos.Point(5, 5), geos.Point(11, 11), geos.Point(15, 5), geos.Point(30, 30)]
+        scale_files = []
+        for i, geometry in enumerate(geometries):
+            scale_file = storage_test_utils.create_file(file_name='test_%d.txt' % i)
+            scale_file.geometry = geometry
+            scale_file.save()
+            scale_files.append(scale_file)
+
+        expected = {}
+        for scale_file in scale_files:
+            scale_file.set_countries()
+            expected[scale_file.id] = {c.id for c in scale_file.countries.all()}
+            scale_file.countries.clear()
+
+        ScaleFile.objects.set_countries(scale_files)
+
+        for scale_file in scale_files:
+            self.assertSetEqual({c.id for c in scale_file.countries.all()}, expected[scale_file.id])
+
+
 class TestScaleFile(TestCase):
 
     def setUp(self):
@@ -14,6 +14,9 @@ logger = logging.getLogger(__name__)
 
 AWSCredentials = namedtuple('AWSCredentials', ['access_key_id', 'secret_access_key'])
 
+# The maximum number of keys S3 accepts in a single delete objects request
+S3_DELETE_BATCH_SIZE = 1000
+
 
 class AWSClient(object):
     """Manages automatically creating and destroying clients to AWS services."""
@@ -102,6 +105,65 @@ class SQSClient(AWSClient):
         :type region_name: string
         """
         AWSClient.__init__(self, 'sqs', None, credentials, region_name)
+        self._queue_urls = {}
+
+    def open(self):
+        """Creates the client for a caller that holds it open across many requests instead of using a with statement.
+        The caller must call :meth:`close` when it is done with the client.
+
+        :return: This client
+        :rtype: :class:`util.aws.SQSClient`
+        """
+
+        return self.__enter__()
+
+    def close(self):
+        """Destroys a client that was created with :meth:`open`"""
+
+        self.__exit__(None, None, None)
+        self._client = None
+        self._resource = None
+        self._queue_urls = {}
+
+    def change_message_visibility(self, queue_name, receipt_handle, visibility_timeout_seconds):
+        """Changes how long a received message stays hidden from other consumers of an SQS queue. A timeout of zero
+        makes the message available to be received again immediately. This uses the low-level client, so it is safe to
+        call from multiple threads.
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :param receipt_handle: The receipt handle of the received message
+        :type receipt_handle: string
+        :param visibility_timeout_seconds: The new visibility timeout, counted from now
+        :type visibility_timeout_seconds: int
+        """
+
+        self._client.change_message_visibility(QueueUrl=self.get_queue_url(queue_name), ReceiptHandle=receipt_handle,
+                                               VisibilityTimeout=visibility_timeout_seconds)
+
+    def delete_message_batch(self, queue_name, receipt_handles):
+        """Deletes the messages with the given receipt handles from an SQS queue, up to 10 messages per request. This
+        uses the low-level client, so it is safe to call from multiple threads.
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :param receipt_handles: The receipt handles of the messages to delete
+        :type receipt_handles: [string]
+        :return: The receipt handles of the messages that failed to be deleted
+        :rtype: [string]
+        """
+
+        queue_url = self.get_queue_url(queue_name)
+
+        failed = []
+        for i in xrange(0, len(receipt_handles), 10):
+            batch = receipt_handles[i:i + 10]
+            entries = [{'Id': str(index), 'ReceiptHandle': handle} for index, handle in enumerate(batch)]
+            response = self._client.delete_message_batch(QueueUrl=queue_url, Entries=entries)
+            for failure in response.get('Failed', []):
+                logger.warning('Failed to delete SQS message: %s', failure.get('Message'))
+                failed.append(batch[int(failure['Id'])])
+        return failed
 
     def get_queue_by_name(self, queue_name):
         """Gets a SQS queue by the given name
@@ -114,6 +176,19 @@ class SQSClient(AWSClient):
 
         return self._resource.get_queue_by_name(QueueName=queue_name)
         
+    def get_queue_url(self, queue_name):
+        """Gets the URL of the SQS queue by the given name, caching it for subsequent calls
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :return: The queue URL
+        :rtype: string
+        """
+
+        if queue_name not in self._queue_urls:
+            self._queue_urls[queue_name] = self._client.get_queue_url(QueueName=queue_name)['QueueUrl']
+        return self._queue_urls[queue_name]
+
     def get_queue_size(self, queue_name):
         """Gets the size of the SQS queue by the given name
 
@@ -190,6 +265,45 @@ class SQSClient(AWSClient):
             if count % 10 != 0 or not count:
                 break
 
+    def receive_message_batch(self,
+                              queue_name,
+                              batch_size=10,
+                              wait_time_seconds=20,
+                              visibility_timeout_seconds=30):
+        """Receive a batch of raw messages from an SQS queue. This uses the low-level client, so it is safe to call
+        from multiple threads. Only the first request long-polls; any further requests needed to fill the batch return
+        immediately.
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :param batch_size: Maximum number of messages to retrieve
+        :type batch_size: int
+        :param wait_time_seconds: Long-poll duration of request (max of 20). Ends immediately when message published.
+        :type wait_time_seconds: int
+        :param visibility_timeout_seconds: Duration for a message to be hidden after retrieved from the queue.
+        :type visibility_timeout_seconds: int
+        :return: The received messages, each a dict including 'Body' and 'ReceiptHandle' keys
+        :rtype: [dict]
+        """
+
+        queue_url = self.get_queue_url(queue_name)
+
+        messages = []
+        while len(messages) < batch_size:
+            max_messages = min(batch_size - len(messages), 10)
+            response = self._client.receive_message(QueueUrl=queue_url,
+                                                    MaxNumberOfMessages=max_messages,
+                                                    WaitTimeSeconds=wait_time_seconds if not messages else 0,
+                                                    VisibilityTimeout=visibility_timeout_seconds)
+            received = response.get('Messages', [])
+            messages.extend(received)
+
+            # If fewer messages came back than were requested, the queue has been drained
+            if len(received) < max_messages:
+                break
+
+        return messages
+
 
 class S3Client(AWSClient):
     def __init__(self, credentials=None, region_name=None):
@@ -204,6 +318,28 @@ class S3Client(AWSClient):
         config = Config(s3={'addressing_style': getattr(settings, 'S3_ADDRESSING_STYLE', 'auto')})
         AWSClient.__init__(self, 's3', config, credentials, region_name)
 
+    def delete_objects(self, bucket_name, key_names):
+        """Deletes the S3 objects with the given identifiers, using as few requests as possible. Keys that do not exist
+        are ignored by S3.
+
+        :param bucket_name: The unique name of the bucket containing the objects.
+        :type bucket_name: string
+        :param key_names: The unique names of the objects to delete.
+        :type key_names: [string]
+        :returns: The errors reported by S3 for any objects that failed to delete, each with Key, Code and Message
+        :rtype: [dict]
+
+        :raises :class:`botocore.exceptions.ClientError`: If a request is invalid.
+        """
+
+        errors = []
+        for i in range(0, len(key_names), S3_DELETE_BATCH_SIZE):
+            objects = [{'Key': key_name} for key_name in key_names[i:i + S3_DELETE_BATCH_SIZE]]
+            logger.debug('Deleting %i objects from S3 bucket: %s', len(objects), bucket_name)
+            response = self._client.delete_objects(Bucket=bucket_name, Delete={'Objects': objects, 'Quiet': True})
+            errors.extend(response.get('Errors', []))
+        return errors
+
     def get_bucket(self, bucket_name, validate=True):
         """Gets a reference to an S3 bucket with the given identifier.
 
@@ -278,11 +414,35 @@ class S3Client(AWSClient):
         iterator = paginator.paginate(**params)
 
         for page in iterator:
-            # In the event of 0 results, exit loop
+            # In the event of 0 results, move on to the next page since a page may hold only common prefixes
             if 'Contents' not in page:
-                break
+                continue
 
             for result in page['Contents']:
                 # Filter out 0 size keys, these are directory keys as S3 objects must be at least 1 Byte
                 if result['Size'] > 0:
                     yield FileDetails(result['Key'], result['Size'])
+
+    def list_objects_and_prefixes(self, bucket_name, prefix=None):
+        """Generator function to retrieve the objects and the common prefixes (sub-directories) directly within the
+        given prefix of an S3 bucket in a single paginated listing. Each page of results is yielded as it is retrieved.
+
+        :param bucket_name: The unique name of the bucket to retrieve.
+        :type bucket_name: string
+        :param prefix: The parent key from which to search bucket. Trailing slash is optional
+        :type prefix: string
+        :return: Generator of the objects and the common prefixes, each ending in a slash, found in each page
+        :rtype: Generator[([:class:`storage.brokers.broker.FileDetails`], [string])]
+        """
+
+        params = {'Bucket': bucket_name, 'Delimiter': '/'}
+        if prefix:
+            params['Prefix'] = prefix
+
+        paginator = self._client.get_paginator('list_objects')
+        for page in paginator.paginate(**params):
+            # Filter out 0 size keys, these are directory keys as S3 objects must be at least 1 Byte
+            files = [FileDetails(result['Key'], result['Size']) for result in page.get('Contents', [])
+                     if result['Size'] > 0]
+            prefixes = [result['Prefix'] for result in page.get('CommonPrefixes', [])]
+            yield files, prefixes
@@ -1,5 +1,8 @@
 """Helper methods for os operations"""
+import json
 import time
+
+from django.db import connections
 from django.db.models.functions import Lower
 
 MAX_SLEEP_MS = 500
@@ -48,3 +51,22 @@ def alphabetize(order, fields):
             ordering.append(o)
 
     return ordering
+
+
+def estimate_count(queryset):
+    """Returns the number of rows that the database query planner estimates the given queryset will return. This avoids
+    the cost of an exact COUNT(*) over a large table, but the estimate is only as accurate as the table statistics.
+
+    :param queryset: The queryset
+    :type queryset: :class:`django.db.models.query.QuerySet`
+    :returns: The estimated number of rows
+    :rtype: int
+    """
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if not isinstance(plan, list):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,128 @@
+"""Defines a minimal wrapper around the Linux inotify API for watching a directory for changed files"""
+from __future__ import unicode_literals
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+
+# inotify event masks, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+# inotify_init1() flags
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# The fixed size header of each inotify event (wd, mask, cookie, len), followed by len bytes of file name
+EVENT_HEADER = struct.Struct(b'iIII')
+
+# Number of bytes read from the inotify file descriptor at once
+READ_SIZE = 64 * 1024
+
+
+class DirectoryWatcher(object):
+    """Watches a single directory (not recursively) for files that finish being written or are moved into it. Creating
+    a watcher raises :class:`OSError` if inotify is not supported by the platform or the file system.
+    """
+
+    def __init__(self, path, mask=IN_CLOSE_WRITE | IN_MOVED_TO):
+        """Constructor
+
+        :param path: The path of the directory to watch
+        :type path: string
+        :param mask: The inotify events to watch for
+        :type mask: int
+
+        :raises OSError: If inotify is unavailable or the directory cannot be watched
+        """
+
+        self._fs_encoding = sys.getfilesystemencoding() or 'utf-8'
+        self._libc = _load_libc()
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, 'inotify_init1 failed: %s' % os.strerror(err))
+
+        encoded_path = path.encode(self._fs_encoding) if isinstance(path, unicode) else path
+        if self._libc.inotify_add_watch(self._fd, encoded_path, mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, 'inotify_add_watch failed for %s: %s' % (path, os.strerror(err)))
+
+    def close(self):
+        """Stops watching the directory and releases the inotify file descriptor
+        """
+
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def read_changes(self, timeout):
+        """Blocks until files change in the directory or the given timeout elapses and then returns the names of the
+        changed files in the order they changed. Sub-directories are ignored. If the kernel event queue overflowed and
+        changes may have been lost, None is returned and the caller should rescan the whole directory.
+
+        :param timeout: The maximum number of seconds to wait for changes
+        :type timeout: float
+        :returns: The names of the changed files without duplicates, possibly empty, or None on overflow
+        :rtype: [string]
+        """
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        file_names = []
+        seen_names = set()
+        overflowed = False
+        while True:
+            try:
+                data = os.read(self._fd, READ_SIZE)
+            except OSError as ex:
+                if ex.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if not data:
+                break
+
+            offset = 0
+            while offset + EVENT_HEADER.size <= len(data):
+                _, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+                if mask & IN_Q_OVERFLOW:
+                    overflowed = True
+                elif name and not mask & IN_ISDIR:
+                    file_name = name.decode(self._fs_encoding)
+                    if file_name not in seen_names:
+                        seen_names.add(file_name)
+                        file_names.append(file_name)
+
+        return None if overflowed else file_names
+
+
+def _load_libc():
+    """Loads the C library and checks that it provides the inotify functions
+
+    :returns: The C library
+    :rtype: :class:`ctypes.CDLL`
+
+    :raises OSError: If the inotify functions are unavailable
+    """
+
+    if not sys.platform.startswith('linux'):
+        raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    if not hasattr(libc, 'inotify_init1') or not hasattr(libc, 'inotify_add_watch'):
+        raise OSError(errno.ENOSYS, 'inotify is not supported by the C library')
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
@@ -0,0 +1,94 @@
+"""Defines utility functions for running generators in parallel"""
+from __future__ import unicode_literals
+
+import Queue
+import sys
+import threading
+
+from django.utils import six
+
+# Seconds a worker waits on a full result queue before checking whether the consumer has stopped
+PUT_TIMEOUT = 1.0
+
+# Marks that a worker thread has finished
+_WORKER_DONE = object()
+
+
+class _WorkerError(object):
+    """Wraps an exception raised within a worker thread so that it can be re-raised by the consumer"""
+
+    def __init__(self, exc_info):
+        """Constructor
+
+        :param exc_info: The exception information from :func:`sys.exc_info`
+        :type exc_info: tuple
+        """
+
+        self.exc_info = exc_info
+
+
+def iterate_in_parallel(generator_funcs, thread_count, queue_size=1000):
+    """Generator that runs the given generator functions on a bounded pool of threads and yields their items as they
+    are produced. Items from a single generator are yielded in order, but items from different generators are
+    interleaved. At most queue_size items are buffered, so the threads only run ahead of the consumer by that much. If a
+    generator raises an exception, the remaining generators are abandoned and the exception is raised by this generator.
+
+    :param generator_funcs: The functions, taking no arguments, that each return a generator to run
+    :type generator_funcs: :func:`list`
+    :param thread_count: The maximum number of threads to use
+    :type thread_count: int
+    :param queue_size: The maximum number of items to buffer
+    :type queue_size: int
+    :returns: Generator of the items from all of the generators
+    :rtype: Generator
+    """
+
+    funcs = Queue.Queue()
+    for generator_func in generator_funcs:
+        funcs.put(generator_func)
+    results = Queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                results.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def work():
+        try:
+            while not stopped.is_set():
+                try:
+                    generator_func = funcs.get_nowait()
+                except Queue.Empty:
+                    break
+                for item in generator_func():
+                    if not put(item):
+                        return
+        except Exception:
+            put(_WorkerError(sys.exc_info()))
+        finally:
+            put(_WORKER_DONE)
+
+    threads = []
+    for _ in range(max(min(thread_count, funcs.qsize()), 1)):
+        thread = threading.Thread(target=work)
+        thread.daemon = True
+        thread.start()
+        threads.append(thread)
+
+    try:
+        running_count = len(threads)
+        while running_count:
+            item = results.get()
+            if item is _WORKER_DONE:
+                running_count -= 1
+            elif isinstance(item, _WorkerError):
+                six.reraise(*item.exc_info)
+            else:
+                yield item
+    finally:
+        stopped.set()
@@ -1,8 +1,11 @@
 """Defines utilities for building RESTful APIs."""
 from __future__ import unicode_literals
 
+import base64
 import datetime
+import json
 import uuid
+from collections import namedtuple, OrderedDict
 
 from django.contrib.auth.models import AnonymousUser, User
 from django.template.defaultfilters import slugify
@@ -13,11 +16,17 @@ import rest_framework.serializers as serializers
 import rest_framework.status as status
 from django.conf import settings
 from django.conf.urls import include, url
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import OrderBy
 from rest_framework import permissions
 from rest_framework.exceptions import APIException
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 
 import util.parse as parse_util
+from util.database import estimate_count
 
 
 class ScaleAPIPermissions(permissions.BasePermission):
@@ -41,12 +50,207 @@ class ScaleAPIPermissions(permissions.BasePermission):
 
         return False
 
+
+# An ordering key of a cursor paginated queryset, annotated on the queryset with the given name
+CursorKey = namedtuple('CursorKey', ['name', 'output_field', 'descending', 'nulls_last', 'nullable'])
+
+
 class DefaultPagination(pagination.PageNumberPagination):
-    """Default configuration class for the paging system."""
+    """Default configuration class for the paging system. Results are paged by page number unless the request opts into
+    cursor pagination with pagination=cursor. Cursor pagination seeks directly to the rows after the last row of the
+    previous page using the queryset's ordering with the ID as a tie-breaker, so deep pages cost the same as the first
+    page when the ordering fields are indexed. Cursor pages only count the results when requested with count=estimated
+    (planner statistics) or count=exact.
+    """
     page_size = 100
     page_size_query_param = 'page_size'
     max_page_size = 1000
 
+    count_query_param = 'count'
+    cursor_query_param = 'cursor'
+    pagination_query_param = 'pagination'
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self.cursor_page = None
+
+    def get_paginated_response(self, data):
+        """See :meth:`rest_framework.pagination.BasePagination.get_paginated_response`
+        """
+
+        if self.cursor_page is None:
+            return super(DefaultPagination, self).get_paginated_response(data)
+
+        count, next_cursor = self.cursor_page
+        next_link = None
+        if next_cursor:
+            next_link = replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, next_cursor)
+        return Response(OrderedDict([('count', count), ('next', next_link), ('previous', None), ('results', data)]))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """See :meth:`rest_framework.pagination.BasePagination.paginate_queryset`
+        """
+
+        is_cursor = self.cursor_query_param in request.query_params
+        mode = parse_string(request, self.pagination_query_param, 'cursor' if is_cursor else 'page', False,
+                            ['cursor', 'page'])
+        if mode == 'page':
+            return super(DefaultPagination, self).paginate_queryset(queryset, request, view)
+        if not isinstance(queryset, QuerySet):
+            raise BadParameter('Cursor pagination is not supported for this resource')
+
+        self.request = request
+        count_mode = parse_string(request, self.count_query_param, 'none', False, ['none', 'estimated', 'exact'])
+        count = None
+        if count_mode == 'estimated':
+            count = estimate_count(queryset)
+        elif count_mode == 'exact':
+            count = queryset.count()
+
+        queryset, keys = self._order_by_keys(queryset)
+        cursor = parse_string(request, self.cursor_query_param, None, False)
+        if cursor:
+            queryset = queryset.filter(self._get_after_filter(keys, self._decode_cursor(cursor, keys)))
+
+        page_size = self.get_page_size(request)
+        results = list(queryset[:page_size + 1])
+        next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            next_cursor = self._encode_cursor(results[-1], keys)
+        self.cursor_page = (count, next_cursor)
+        return results
+
+    def _decode_cursor(self, cursor, keys):
+        """Decodes the given cursor into the ordering key values of the last row of the previous page
+
+        :param cursor: The cursor from the request
+        :type cursor: string
+        :param keys: The ordering keys
+        :type keys: [:class:`util.rest.CursorKey`]
+        :returns: The key values
+        :rtype: :func:`list`
+
+        :raises :class:`util.rest.BadParameter`: If the cursor is invalid or was created for a different ordering
+        """
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            if len(values) != len(keys):
+                raise ValueError('Cursor does not match ordering')
+            return [None if v is None else key.output_field.to_python(v) for key, v in zip(keys, values)]
+        except (TypeError, ValueError, ValidationError):
+            raise BadParameter('Invalid cursor: %s' % cursor)
+
+    def _encode_cursor(self, row, keys):
+        """Encodes the ordering key values of the given row as a cursor
+
+        :param row: The last row of the page, either a model or a dict
+        :type row: :class:`django.db.models.Model` or dict
+        :param keys: The ordering keys
+        :type keys: [:class:`util.rest.CursorKey`]
+        :returns: The cursor
+        :rtype: string
+        """
+
+        values = []
+        for key in keys:
+            value = row[key.name] if isinstance(row, dict) else getattr(row, key.name)
+            if isinstance(value, (datetime.date, datetime.time)):
+                value = value.isoformat()  # Keep microseconds so that no rows are skipped
+            elif value is not None and not isinstance(value, (bool, float, int, long, basestring)):
+                value = unicode(value)
+            values.append(value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+    def _get_after_filter(self, keys, values):
+        """Returns the filter for the rows that come after the row with the given ordering key values. PostgreSQL sorts
+        null values last in ascending order and first in descending order, unless the ordering says otherwise.
+
+        :param keys: The ordering keys
+        :type keys: [:class:`util.rest.CursorKey`]
+        :param values: The key values of the last row of the previous page
+        :type values: :func:`list`
+        :returns: The filter
+        :rtype: :class:`django.db.models.Q`
+        """
+
+        after_filter = Q(pk__in=[])
+        equal_filter = Q()
+        for key, value in zip(keys, values):
+            if value is None:
+                if not key.nulls_last:
+                    after_filter |= equal_filter & Q(**{'%s__isnull' % key.name: False})
+                equal_filter &= Q(**{'%s__isnull' % key.name: True})
+                continue
+            key_filter = Q(**{'%s__%s' % (key.name, 'lt' if key.descending else 'gt'): value})
+            if key.nullable and key.nulls_last:
+                key_filter |= Q(**{'%s__isnull' % key.name: True})
+            after_filter |= equal_filter & key_filter
+            equal_filter &= Q(**{key.name: value})
+
+        # Bound the first key as well so that the database can seek to the first row with an index range scan
+        first_key, first_value = keys[0], values[0]
+        if first_value is not None and not (first_key.nullable and first_key.nulls_last):
+            after_filter &= Q(**{'%s__%s' % (first_key.name, 'lte' if first_key.descending else 'gte'): first_value})
+        return after_filter
+
+    def _order_by_keys(self, queryset):
+        """Annotates the given queryset with the value of each of its ordering fields and orders it by those values,
+        adding the ID as the final ordering key so that every row has a unique position
+
+        :param queryset: The queryset
+        :type queryset: :class:`django.db.models.query.QuerySet`
+        :returns: The ordered queryset and its ordering keys
+        :rtype: tuple
+
+        :raises :class:`util.rest.BadParameter`: If the ordering cannot be used for cursor pagination
+        """
+
+        ordering = list(queryset.query.order_by)
+        if not ordering and queryset.query.default_ordering:
+            ordering = list(queryset.query.get_meta().ordering)
+        if not any(o in ('id', '-id', 'pk', '-pk') for o in ordering if isinstance(o, basestring)):
+            last = ordering[-1] if ordering else None
+            is_descending = getattr(last, 'descending', isinstance(last, basestring) and last.startswith('-'))
+            ordering.append('-pk' if is_descending else 'pk')
+
+        annotations = OrderedDict()
+        orders = []
+        for i, order in enumerate(ordering):
+            name = 'cursor_key_%d' % i
+            descending = False
+            nulls_last = None
+            if isinstance(order, basestring):
+                if order == '?' or '.' in order:
+                    raise BadParameter('Cursor pagination does not support ordering by %s' % order)
+                descending = order.startswith('-')
+                expression = F(order.lstrip('-'))
+            elif isinstance(order, OrderBy):
+                descending = order.descending
+                nulls_last = True if order.nulls_last else (False if order.nulls_first else None)
+                expression = order.expression
+            else:
+                expression = order
+            if nulls_last is None:
+                nulls_last = not descending
+            annotations[name] = expression
+            order_by = OrderBy(F(name), descending=descending)
+            if nulls_last != (not descending):
+                order_by = OrderBy(F(name), descending=descending, nulls_last=nulls_last, nulls_first=not nulls_last)
+            orders.append((name, descending, nulls_last, order_by))
+
+        queryset = queryset.annotate(**annotations).order_by(*[o[3] for o in orders])
+        keys = []
+        for name, descending, nulls_last, _order_by in orders:
+            output_field = queryset.query.annotations[name].output_field
+            if output_field.is_relation:
+                raise BadParameter('Cursor pagination does not support ordering by a related model')
+            keys.append(CursorKey(name, output_field, descending, nulls_last, getattr(output_field, 'null', True)))
+        return queryset, keys
+
 
 class ModelIdSerializer(serializers.Serializer):
     """Converts a model to a lightweight place holder object with only an identifier to REST output"""
@@ -116,6 +116,21 @@ class TestS3Client(TestCase):
 
         self.assertEqual(len(list(results)), 0)
 
+    @patch('botocore.paginate.PageIterator._make_request')
+    def test_list_objects_and_prefixes(self, mock_func):
+        response = self.sample_response
+        response['CommonPrefixes'] = [{'Prefix': 'test/a/'}, {'Prefix': 'test/b/'}]
+        mock_func.return_value = response
+
+        with S3Client(self.credentials) as client:
+            pages = list(client.list_objects_and_prefixes('sample-bucket', 'test/'))
+
+        self.assertEqual(len(pages), 1)
+        files, prefixes = pages[0]
+        self.assertEqual(len(files), 1)
+        self.assertListEqual(prefixes, ['test/a/', 'test/b/'])
+        self.assertEqual(mock_func.call_count, 1)
+
     def test_list_objects_invalid_bucket_name(self):
         with self.assertRaises(ParamValidationError):
             with S3Client(self.credentials) as client:
@@ -143,6 +158,22 @@ class TestS3Client(TestCase):
 
         self.assertEqual(len(list(results)), 2)
 
+    def test_delete_objects_batches(self):
+        """Tests that delete_objects() splits the keys into requests of at most 1,000 keys"""
+
+        key_names = ['key_%i' % i for i in range(2500)]
+        error = {'Key': 'key_7', 'Code': 'AccessDenied', 'Message': 'Access Denied'}
+
+        with S3Client(self.credentials) as client:
+            client._client = MagicMock()
+            client._client.delete_objects.side_effect = [{'Errors': [error]}, {}, {'Deleted': []}]
+            errors = client.delete_objects('sample-bucket', key_names)
+
+        self.assertListEqual(errors, [error])
+        calls = client._client.delete_objects.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertListEqual([len(c[1]['Delete']['Objects']) for c in calls], [1000, 1000, 500])
+        self.assertDictEqual(calls[2][1]['Delete']['Objects'][-1], {'Key': 'key_2499'})
 
 
 class TestSQSClient(TestCase):
@@ -221,4 +252,35 @@ class TestSQSClient(TestCase):
             results = list(client.receive_messages('queue'))
             self.assertEquals(results, outputs)
 
-        self.assertEquals(receive_messages.call_count, 2)
\ No newline at end of file
+        self.assertEquals(receive_messages.call_count, 2)
+
+    def test_receive_message_batch(self):
+        responses = [{'Messages': [x for x in range(0, 10)]},
+                     {'Messages': [x for x in range(10, 15)]}]
+
+        with SQSClient(self.credentials, self.region_name) as client:
+            client._client = MagicMock()
+            client._client.get_queue_url.return_value = {'QueueUrl': 'url'}
+            client._client.receive_message.side_effect = responses
+            results = client.receive_message_batch('queue', batch_size=20)
+
+        self.assertEquals(results, [x for x in range(0, 15)])
+        # Only the first request long-polls
+        client._client.receive_message.assert_has_calls([
+            call(QueueUrl='url', MaxNumberOfMessages=10, WaitTimeSeconds=20, VisibilityTimeout=30),
+            call(QueueUrl='url', MaxNumberOfMessages=10, WaitTimeSeconds=0, VisibilityTimeout=30)])
+        client._client.get_queue_url.assert_called_once_with(QueueName='queue')
+
+    def test_delete_message_batch(self):
+        handles = ['handle-%i' % x for x in range(0, 15)]
+
+        with SQSClient(self.credentials, self.region_name) as client:
+            client._client = MagicMock()
+            client._client.get_queue_url.return_value = {'QueueUrl': 'url'}
+            client._client.delete_message_batch.side_effect = [{'Failed': [{'Id': '3', 'Message': 'error'}]}, {}]
+            failed = client.delete_message_batch('queue', handles)
+
+        self.assertEquals(failed, ['handle-3'])
+        self.assertEquals(client._client.delete_message_batch.call_count, 2)
+        entries = client._client.delete_message_batch.call_args_list[1][1]['Entries']
+        self.assertEquals([entry['ReceiptHandle'] for entry in entries], handles[10:])
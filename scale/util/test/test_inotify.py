@@ -0,0 +1,47 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+import django
+from django.test import TestCase
+
+from util.inotify import DirectoryWatcher
+
+
+class TestDirectoryWatcher(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.dir_path = tempfile.mkdtemp()
+        self.watcher = DirectoryWatcher(self.dir_path)
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.dir_path)
+
+    def test_read_changes(self):
+        """Tests calling read_changes() after files are written and moved into the directory"""
+
+        with open(os.path.join(self.dir_path, 'file_1.txt_tmp'), 'w') as f:
+            f.write('data')
+        os.rename(os.path.join(self.dir_path, 'file_1.txt_tmp'), os.path.join(self.dir_path, 'file_1.txt'))
+        os.mkdir(os.path.join(self.dir_path, 'ingesting'))
+        with open(os.path.join(self.dir_path, 'file_2.txt'), 'w') as f:
+            f.write('data')
+
+        file_names = self.watcher.read_changes(1.0)
+
+        self.assertListEqual(file_names, ['file_1.txt_tmp', 'file_1.txt', 'file_2.txt'])
+
+    def test_read_changes_timeout(self):
+        """Tests calling read_changes() when nothing changes"""
+
+        self.assertListEqual(self.watcher.read_changes(0.01), [])
+
+    def test_missing_directory(self):
+        """Tests creating a watcher for a directory that does not exist"""
+
+        self.assertRaises(OSError, DirectoryWatcher, os.path.join(self.dir_path, 'missing'))
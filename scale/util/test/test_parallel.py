@@ -0,0 +1,108 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+
+from django.test import SimpleTestCase
+from mock import patch
+
+from util.parallel import iterate_in_parallel
+
+
+class TestIterateInParallel(SimpleTestCase):
+    """Tests the iterate_in_parallel generator function"""
+
+    def test_order_within_generator(self):
+        """Tests that all items are yielded and the items of each generator stay in order"""
+
+        def generator(name):
+            for i in range(100):
+                yield name, i
+
+        generator_funcs = [lambda name=name: generator(name) for name in ['a', 'b', 'c']]
+        results = list(iterate_in_parallel(generator_funcs, 2))
+
+        self.assertEqual(len(results), 300)
+        for name in ['a', 'b', 'c']:
+            self.assertListEqual([i for item_name, i in results if item_name == name], range(100))
+
+    def test_no_generators(self):
+        """Tests iterating over no generators"""
+
+        self.assertListEqual(list(iterate_in_parallel([], 4)), [])
+
+    def test_worker_exception(self):
+        """Tests that an exception raised within a generator is raised by the consumer"""
+
+        def failing_generator():
+            yield 1
+            raise ValueError('Bad!')
+
+        results = iterate_in_parallel([failing_generator], 2)
+
+        self.assertEqual(next(results), 1)
+        self.assertRaises(ValueError, next, results)
+
+    @patch('util.parallel.PUT_TIMEOUT', 0.01)
+    def test_early_close(self):
+        """Tests that closing the generator early stops the worker threads"""
+
+        produced = []
+        finished = threading.Event()
+
+        def endless_generator():
+            try:
+                while True:
+                    produced.append(None)
+                    yield len(produced)
+            finally:
+                finished.set()
+
+        results = iterate_in_parallel([endless_generator], 1, queue_size=5)
+        self.assertEqual(next(results), 1)
+        results.close()
+
+        self.assertTrue(finished.wait(5))
+        produced_count = len(produced)
+        time.sleep(0.1)
+        self.assertEqual(len(produced), produced_count)
+
+    def test_thread_count(self):
+        """Tests that no more than the given number of generators run at the same time"""
+
+        lock = threading.Lock()
+        running = [0, 0]  # [Currently running, Most running at once]
+
+        def generator():
+            with lock:
+                running[0] += 1
+                running[1] = max(running[1], running[0])
+            time.sleep(0.01)
+            yield 1
+            with lock:
+                running[0] -= 1
+
+        results = list(iterate_in_parallel([generator] * 20, 3))
+
+        self.assertEqual(len(results), 20)
+        self.assertLessEqual(running[1], 3)
+        self.assertGreater(running[1], 0)
+
+    @patch('util.parallel.PUT_TIMEOUT', 0.01)
+    def test_queue_size(self):
+        """Tests that the worker threads only run ahead of the consumer by the queue size"""
+
+        produced = []
+
+        def generator():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        results = iterate_in_parallel([generator], 1, queue_size=5)
+        self.assertEqual(next(results), 0)
+        time.sleep(0.2)
+
+        # The yielded item, the buffered items and the item waiting to be buffered
+        self.assertLessEqual(len(produced), 7)
+        self.assertListEqual(list(results), range(1, 100))
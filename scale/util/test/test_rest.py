@@ -4,11 +4,13 @@ import datetime
 
 import django
 import mock
+from django.contrib.auth.models import User
 from django.http import QueryDict
 from django.test import TestCase
 from django.utils.timezone import utc
 from mock import MagicMock
 from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
 import util.rest as rest_util
 from util.rest import BadParameter, ReadOnly
@@ -751,4 +753,81 @@ class TestRest(TestCase):
         set = None
         self.assertEqual(rest_util.title_to_name(set, title1), 'boring-normal-title')
         self.assertEqual(rest_util.title_to_name(set, title2), 'underscore-title')
-        self.assertEqual(rest_util.title_to_name(set, title3), 'title-1')
\ No newline at end of file
+        self.assertEqual(rest_util.title_to_name(set, title3), 'title-1')
+
+
+class TestDefaultPagination(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        joined = datetime.datetime(2015, 1, 1, tzinfo=utc)
+        for i in range(5):
+            last_login = joined + datetime.timedelta(microseconds=i) if i % 2 else None
+            User.objects.create(username='user_%d' % i, date_joined=joined, last_login=last_login)
+
+    def _get_pages(self, queryset, query):
+        """Pages through the queryset with cursor pagination and returns the pages"""
+        pages = []
+        url = '/?%s' % query
+        while url:
+            request = Request(APIRequestFactory().get(url))
+            paginator = rest_util.DefaultPagination()
+            pages.append(paginator.paginate_queryset(queryset, request))
+            url = paginator.get_paginated_response([]).data['next']
+        return pages
+
+    def test_cursor_pagination(self):
+        """Tests paging through results with cursors when the ordering field has ties."""
+        queryset = User.objects.order_by('-date_joined')
+        pages = self._get_pages(queryset, 'pagination=cursor&page_size=2')
+
+        self.assertListEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertListEqual([user.id for page in pages for user in page],
+                             list(queryset.order_by('-date_joined', '-id').values_list('id', flat=True)))
+
+    def test_cursor_pagination_nulls(self):
+        """Tests paging through results with cursors when the ordering field has null values."""
+        for order in ['last_login', '-last_login']:
+            queryset = User.objects.order_by(order)
+            pages = self._get_pages(queryset, 'pagination=cursor&page_size=1')
+
+            self.assertEqual(len(pages), 5)
+            self.assertListEqual([user.id for page in pages for user in page],
+                                 list(queryset.order_by(order, order[:-len('last_login')] + 'id')
+                                      .values_list('id', flat=True)))
+
+    def test_cursor_pagination_count(self):
+        """Tests counting the results of cursor pages."""
+        queryset = User.objects.order_by('username')
+        for count, expected in [('none', None), ('exact', 5)]:
+            request = Request(APIRequestFactory().get('/?pagination=cursor&count=%s' % count))
+            paginator = rest_util.DefaultPagination()
+            self.assertEqual(len(paginator.paginate_queryset(queryset, request)), 5)
+            response = paginator.get_paginated_response([])
+            self.assertEqual(response.data['count'], expected)
+            self.assertIsNone(response.data['next'])
+
+        request = Request(APIRequestFactory().get('/?pagination=cursor&count=estimated'))
+        paginator = rest_util.DefaultPagination()
+        paginator.paginate_queryset(queryset, request)
+        self.assertIsInstance(paginator.get_paginated_response([]).data['count'], int)
+
+    def test_cursor_pagination_invalid(self):
+        """Tests cursor pagination with an invalid cursor and an unsupported ordering."""
+        request = Request(APIRequestFactory().get('/?cursor=bad'))
+        self.assertRaises(BadParameter, rest_util.DefaultPagination().paginate_queryset, User.objects.all(), request)
+
+        request = Request(APIRequestFactory().get('/?pagination=cursor'))
+        self.assertRaises(BadParameter, rest_util.DefaultPagination().paginate_queryset, [1, 2], request)
+
+    def test_page_number_pagination(self):
+        """Tests that results are paged by page number by default."""
+        request = Request(APIRequestFactory().get('/?page=2&page_size=2'))
+        paginator = rest_util.DefaultPagination()
+        page = paginator.paginate_queryset(User.objects.order_by('username'), request)
+
+        self.assertListEqual([user.username for user in page], ['user_2', 'user_3'])
+        response = paginator.get_paginated_response([])
+        self.assertEqual(response.data['count'], 5)
+        self.assertIn('page=3', response.data['next'])